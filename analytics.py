@@ -0,0 +1,364 @@
+# admin_orders_management/analytics.py
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from psycopg.rows import tuple_row
+
+from queries import ANALYTICS_ORDERS_AFTER, ANALYTICS_ORDERS_BY_ID
+from utils import IST, statistics_period
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, statistics stay on SQL without it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while catching up with new orders
+REFRESH_BATCH_SIZE = 50000
+
+# Status codes; unknown statuses get the next free code when first seen
+STATUSES = ('pending', 'processing', 'completed', 'delivered', 'cancelled')
+CANCELLED = STATUSES.index('cancelled')
+OPEN_STATUSES = ('pending', 'processing')
+
+# Status code of orders no longer in the table
+DELETED = -1
+
+IST_OFFSET_SECONDS = 19800
+EPOCH_DAY = date(1970, 1, 1)
+
+FIELDS = (
+    ('order_id', 'int64'),
+    ('day', 'int32'),       # IST calendar day, days since 1970-01-01
+    ('hour', 'int8'),       # IST hour of day
+    ('amount', 'int64'),    # total_amount in paise
+    ('status', 'int8'),
+    ('user_id', 'int64')    # -1 when missing
+)
+
+
+def epoch_day(day):
+    return (day - EPOCH_DAY).days
+
+
+def _money(paise):
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def _distinct(ids):
+    """Number of distinct non-negative IDs; serial IDs are dense, so counting beats sorting"""
+    ids = ids[ids >= 0]
+    if not ids.size:
+        return 0
+    if ids.max() <= 4 * ids.size:
+        return int(np.count_nonzero(np.bincount(ids)))
+    return np.unique(ids).size
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class Columns:
+    """Growable numpy column buffers; the first `size` entries are valid"""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.arrays = {name: np.empty(capacity, dtype) for name, dtype in FIELDS}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.arrays[name][:self.size]
+
+    @property
+    def high_water(self):
+        return int(self.arrays['order_id'][self.size - 1]) if self.size else 0
+
+    def append(self, values):
+        end = self.size + len(values['order_id'])
+        capacity = len(self.arrays['order_id'])
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, array in self.arrays.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = grown
+        for name, array in self.arrays.items():
+            array[self.size:end] = values[name]
+        self.size = end
+
+
+class AnalyticsSnapshot:
+    """
+    Columnar copy of orders (IST day and hour, amount, status, customer)
+    held in numpy arrays, so the statistics page and charts are computed
+    in-process instead of by GROUP BY queries.
+
+    ensure_fresh() appends orders above the order_id high-water mark and
+    re-reads the orders changed since the last refresh, at most every
+    refresh_interval seconds. Changed orders are the ones the change log
+    (changes, a ChangeFeed) recorded since changes_cursor; without the log
+    the still open (pending/processing) orders are re-read instead. Every
+    rebuild_interval the snapshot is reloaded in the background, which also
+    drops orders deleted or archived since.
+    """
+
+    def __init__(self, enabled=True, refresh_interval=30, rebuild_interval=3600, changes=None):
+        self.enabled = enabled and np is not None
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.changes = changes
+        self.statuses = list(STATUSES)
+        self.columns = None
+        # pg_snapshot the change log has been applied up to
+        self.changes_cursor = None
+        self.last_refresh = 0.0
+        self.last_rebuild = 0.0
+        self._lock = threading.RLock()
+        self._rebuilding = False
+        if enabled and np is None:
+            logger.warning("ANALYTICS_SNAPSHOT is on but numpy is not installed; using SQL")
+
+    # Loading
+
+    def _code(self, status):
+        # Shared by refresh() and a concurrent rebuild()
+        with self._lock:
+            try:
+                return self.statuses.index(status)
+            except ValueError:
+                self.statuses.append(status)
+                return len(self.statuses) - 1
+
+    def _convert(self, rows):
+        epoch = np.fromiter((row[1] for row in rows), np.int64, len(rows)) + IST_OFFSET_SECONDS
+        return {
+            'order_id': np.fromiter((row[0] for row in rows), np.int64, len(rows)),
+            'day': epoch // 86400,
+            'hour': (epoch % 86400) // 3600,
+            'amount': np.fromiter((row[2] for row in rows), np.int64, len(rows)),
+            'status': np.fromiter((self._code(row[3]) for row in rows), np.int8, len(rows)),
+            'user_id': np.fromiter((-1 if row[4] is None else row[4] for row in rows), np.int64, len(rows))
+        }
+
+    def _append_new(self, cur, columns):
+        while True:
+            cur.execute(*ANALYTICS_ORDERS_AFTER.bind(after_id=columns.high_water, limit=REFRESH_BATCH_SIZE))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            columns.append(self._convert(rows))
+            if len(rows) < REFRESH_BATCH_SIZE:
+                break
+
+    def _reread(self, cur, columns, order_ids):
+        """Re-read loaded orders by id; the ones no longer in the table are marked DELETED"""
+        if not order_ids.size:
+            return
+        cur.execute(*ANALYTICS_ORDERS_BY_ID.bind(order_ids=order_ids.tolist()))
+        rows = cur.fetchall()
+        positions = np.searchsorted(columns['order_id'], order_ids)
+        columns['status'][positions] = DELETED
+        if rows:
+            fresh = self._convert(rows)
+            positions = np.searchsorted(columns['order_id'], fresh['order_id'])
+            for name in ('day', 'hour', 'amount', 'status', 'user_id'):
+                columns[name][positions] = fresh[name]
+
+    def _recheck_open(self, cur, columns):
+        """Pick up status and amount changes of orders that are not closed yet"""
+        open_codes = [self.statuses.index(status) for status in OPEN_STATUSES]
+        self._reread(cur, columns, columns['order_id'][np.isin(columns['status'], open_codes)])
+
+    def _recheck_changed(self, cur, columns, order_ids):
+        """Re-read the loaded ones of these order_ids; newer ones are appended anyway"""
+        order_ids = np.unique(np.fromiter(order_ids, np.int64))
+        loaded = columns['order_id']
+        positions = np.minimum(np.searchsorted(loaded, order_ids), max(len(loaded) - 1, 0))
+        if len(loaded):
+            self._reread(cur, columns, order_ids[loaded[positions] == order_ids])
+
+    def _read_changes(self, cur):
+        """
+        (order_ids recorded in the change log since changes_cursor, new
+        cursor). order_ids is None when the log cannot tell: not installed,
+        no cursor yet, or too many changes waiting.
+        """
+        if self.changes is None or not self.changes.is_installed(cur):
+            return None, None
+        if self.changes_cursor is None:
+            return None, self.changes.snapshot(cur)
+        records, cursor = self.changes.read(cur, self.changes_cursor)
+        if records is None:
+            return None, cursor
+        return {record['row_id'] for record in records if record['table_name'] == 'orders'}, cursor
+
+    def refresh(self, conn):
+        """Load orders added, and orders changed, since the last refresh"""
+        with self._lock:
+            loading = self.columns is None
+            if loading:
+                self.columns = Columns()
+                self.last_rebuild = time.monotonic()
+            # The cursor is taken before the orders are read, so whatever
+            # commits in between is re-read next time
+            with conn.cursor() as cur:
+                changed, cursor = self._read_changes(cur)
+            with conn.cursor(row_factory=tuple_row) as cur:
+                if changed is not None:
+                    self._recheck_changed(cur, self.columns, changed)
+                elif not loading:
+                    self._recheck_open(cur, self.columns)
+                    if cursor is not None:
+                        # The log overflowed or was just installed; only a
+                        # reload catches every change
+                        self.last_rebuild = float('-inf')
+                self._append_new(cur, self.columns)
+            self.changes_cursor = cursor
+            self.last_refresh = time.monotonic()
+
+    def rebuild(self, connect):
+        """Load a complete new snapshot and swap it in; readers keep the old one meanwhile"""
+        try:
+            columns = Columns(max(1024, len(self.columns or ())))
+            cursor = None
+            with connect() as conn:
+                if self.changes is not None:
+                    with conn.cursor() as cur:
+                        if self.changes.is_installed(cur):
+                            cursor = self.changes.snapshot(cur)
+                with conn.cursor(row_factory=tuple_row) as cur:
+                    self._append_new(cur, columns)
+            with self._lock:
+                self.columns = columns
+                self.changes_cursor = cursor
+                self.last_rebuild = time.monotonic()
+                self.last_refresh = 0.0
+            logger.info(f"Analytics snapshot rebuilt: {len(columns)} orders")
+        except Exception as e:
+            logger.error(f"Analytics snapshot rebuild failed: {e}")
+        finally:
+            self._rebuilding = False
+
+    def ensure_fresh(self, connect):
+        """Refresh through connect() (a get_db_connection-style factory) when due"""
+        now = time.monotonic()
+        if (self.columns is not None and not self._rebuilding
+                and now - self.last_rebuild >= self.rebuild_interval):
+            self._rebuilding = True
+            self.last_rebuild = now
+            threading.Thread(target=self.rebuild, args=(connect,), name='analytics-rebuild', daemon=True).start()
+        if self.columns is None or now - self.last_refresh >= self.refresh_interval:
+            with connect() as conn:
+                self.refresh(conn)
+
+    # Queries
+
+    def _mask(self, first=None, last=None):
+        columns = self.columns
+        mask = columns['status'] >= 0
+        if first is not None:
+            mask &= columns['day'] >= epoch_day(first)
+        if last is not None:
+            mask &= columns['day'] <= epoch_day(last)
+        return mask
+
+    def _period_days(self, period, start_date=None, end_date=None, today=None):
+        today = today or datetime.now(IST).date()
+        key = statistics_period(period, start_date, end_date)
+        if key == 'today':
+            return today, today
+        if key == 'week':
+            return today - timedelta(days=7), None
+        if key == 'month':
+            return today - timedelta(days=30), None
+        if key == 'custom':
+            return _as_date(start_date), _as_date(end_date)
+        return None, None
+
+    def _totals(self, mask):
+        columns = self.columns
+        status = columns['status'][mask]
+        amount = columns['amount'][mask]
+        earning = status != CANCELLED
+        counts = np.bincount(status, minlength=len(self.statuses))
+        return status.size, int(amount[earning].sum()), int(earning.sum()), counts
+
+    def statistics(self, period='today', start_date=None, end_date=None, today=None):
+        """Rows shaped like the statistics_queries() results: (period summary, today)"""
+        today = today or datetime.now(IST).date()
+        with self._lock:
+            mask = self._mask(*self._period_days(period, start_date, end_date, today))
+            orders, revenue, earning, counts = self._totals(mask)
+            customers = _distinct(self.columns['user_id'][mask])
+            today_orders, today_revenue, _, _ = self._totals(self._mask(today, today))
+
+        return {
+            'total_orders': orders,
+            'total_revenue': _money(revenue),
+            'total_customers': customers,
+            'avg_order_value': _money(revenue) / earning if earning else None,
+            'revenue_orders': earning,
+            'pending_orders': int(counts[STATUSES.index('pending')]),
+            'completed_orders': int(counts[STATUSES.index('completed')] + counts[STATUSES.index('delivered')]),
+            'cancelled_orders': int(counts[CANCELLED])
+        }, {
+            'today_orders': today_orders,
+            'today_revenue': _money(today_revenue)
+        }
+
+    def daily(self, first=None, last=None):
+        """Orders and revenue per IST day with orders, like STATISTICS_DAILY_RANGE"""
+        with self._lock:
+            mask = self._mask(_as_date(first), _as_date(last))
+            days = self.columns['day'][mask]
+            amounts = self.columns['amount'][mask]
+        if not days.size:
+            return []
+        base = int(days.min())
+        counts = np.bincount(days - base)
+        revenue = np.bincount(days - base, weights=amounts)
+        return [{
+            'date': EPOCH_DAY + timedelta(days=base + int(offset)),
+            'order_count': int(counts[offset]),
+            'total_revenue': _money(revenue[offset])
+        } for offset in np.flatnonzero(counts)]
+
+    def hourly(self, first=None, last=None):
+        """Orders per IST hour of day (24 counts)"""
+        with self._lock:
+            hours = self.columns['hour'][self._mask(_as_date(first), _as_date(last))]
+        return np.bincount(hours, minlength=24).tolist()
+
+    def status_distribution(self):
+        """Orders per status, like CHART_STATUS_DISTRIBUTION"""
+        with self._lock:
+            counts = np.bincount(self.columns['status'][self._mask()], minlength=len(self.statuses))
+            statuses = list(self.statuses)
+        return [{'status': status, 'count': int(count)} for status, count in zip(statuses, counts) if count]
+
+    def customers_without_orders(self, user_ids):
+        """How many of user_ids have no order in the snapshot"""
+        if not user_ids:
+            return 0
+        with self._lock:
+            users = self.columns['user_id'][self._mask()]
+            return int(np.setdiff1d(np.fromiter(user_ids, np.int64, len(user_ids)), users).size)
+
+    def status(self):
+        with self._lock:
+            size = len(self.columns or ())
+            nbytes = sum(array.nbytes for array in self.columns.arrays.values()) if self.columns else 0
+        return {
+            'enabled': self.enabled,
+            'orders': size,
+            'bytes': nbytes,
+            'high_water': self.columns.high_water if self.columns else 0,
+            'seconds_since_refresh': round(time.monotonic() - self.last_refresh, 1) if self.last_refresh else None
+        }
@@ -8,36 +8,64 @@ from functools import wraps
 
 import pytz
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 import psycopg
 from psycopg.rows import dict_row
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
 
 # Import local modules
 from config import Config
 from utils import (
     parse_location_data, 
-    format_ist_datetime, 
     generate_map_link,
-    calculate_statistics,
-    upload_to_cloudinary
+    statistics_period,
+    statistics_queries,
+    build_statistics,
+    fetch_pipelined,
+    upload_to_cloudinary,
+    encode_listing_cursor,
+    decode_listing_cursor
+)
+from db_metrics import InstrumentedCursor, init_db_metrics
+from profiler import init_profiler
+from log_setup import setup_logging, init_request_logging
+from json_provider import FastJSONProvider, json_response
+from assets import init_assets
+from models import Order, OrderItem, User, model_row
+from async_db import AsyncDB
+from cache import statistics_cache, catalog_cache, count_cache, principal_cache, header_cache
+from auth import AdminDirectory, init_auth
+from counts import CountStrategy
+from db_pool import PoolRegistry
+from templating import init_templating, template_metrics
+from warmup import Warmup, init_warmup, precompile_templates
+from partitioning import PartitionManager, init_partitioning
+from archive import OrderArchive, init_archive
+from analytics import AnalyticsSnapshot
+from status_counters import StatusCounters, init_status_counters, with_percentages
+from popularity import ItemPopularity, init_popularity, WINDOWS as POPULARITY_WINDOWS, METRICS as POPULARITY_METRICS
+from changelog import ChangeFeed, init_change_feed
+from conditional import ConditionalGet
+from db_router import DBRouter, init_db_router, PRIMARY, REPLICA
+from geo import geo_index, parse_bbox, parse_point, parse_polygon
+import queries
+from formatting import (
+    DASHBOARD_ORDERS,
+    ORDER_DETAIL,
+    ORDER_ITEMS,
+    CUSTOMER_DETAIL,
+    CATALOG_ITEMS
 )
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (queued JSON lines, written by a background listener)
+setup_logging(Config)
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
@@ -48,6 +76,28 @@ app = Flask(__name__,
 )
 app.config.from_object(Config)
 
+# Compiled templates are shared between workers and restarts
+os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+
+# {% cache %} layout fragments and per-template render times
+init_templating(app)
+
+# Decimal/datetime-aware JSON for all API responses
+app.json = FastJSONProvider(app)
+
+# Fingerprinted, precompressed static assets (build with `flask build-assets`)
+init_assets(app)
+
+# Request IDs for log correlation
+init_request_logging(app)
+
+# Per-request DB timings, Server-Timing header and /metrics
+init_db_metrics(app)
+
+# Sampled / on-demand request profiling and slow-request log
+init_profiler(app)
+
 # Configure Cloudinary
 cloudinary.config(
     cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME'),
@@ -66,9 +116,12 @@ login_manager.login_message = 'Please log in to access this page.'
 IST = pytz.timezone('Asia/Kolkata')
 
 # Database connection
-def get_db_connection():
-    """Establish database connection"""
-    database_url = os.environ.get('DATABASE_URL')
+def get_database_url(target=PRIMARY):
+    """DATABASE_URL (or REPLICA_DATABASE_URL) normalised for psycopg"""
+    if target == REPLICA:
+        database_url = app.config['REPLICA_DATABASE_URL']
+    else:
+        database_url = os.environ.get('DATABASE_URL')
     
     if not database_url:
         raise ValueError("DATABASE_URL environment variable is not set")
@@ -76,33 +129,83 @@ def get_db_connection():
     if database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     
+    return database_url
+
+# Reads go to the replica when one is configured and caught up
+db_router = DBRouter(
+    replica_url=get_database_url(REPLICA) if app.config['REPLICA_DATABASE_URL'] else None,
+    max_lag=app.config['REPLICA_MAX_LAG_SECONDS'],
+    check_interval=app.config['REPLICA_CHECK_SECONDS'],
+    primary_endpoints=('health_check', 'init_db', 'login', 'logout')
+)
+init_db_router(app, db_router)
+
+# Per-worker connection pools (when psycopg_pool is installed)
+db_pools = PoolRegistry(min_size=app.config['DB_POOL_MIN_SIZE'],
+                        max_size=app.config['DB_POOL_MAX_SIZE'],
+                        timeout=app.config['DB_POOL_TIMEOUT'],
+                        enabled=app.config['DB_POOL_ENABLED'],
+                        row_factory=dict_row,
+                        cursor_factory=InstrumentedCursor)
+
+def get_db_connection(target=None):
+    """
+    Establish database connection (the request's routed target by default).
+    Use as a context manager; pooled connections are returned on exit.
+    """
+    target = target or db_router.current_target()
+    database_url = get_database_url(target)
+    
+    pool = db_pools.get(target, database_url)
+    if pool is not None:
+        return pool.connection()
+    
     try:
-        conn = psycopg.connect(database_url, row_factory=dict_row)
+        conn = psycopg.connect(database_url, row_factory=dict_row,
+                               cursor_factory=InstrumentedCursor)
         return conn
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         raise
 
-# User class for Flask-Login
-class AdminUser(UserMixin):
-    def __init__(self, id, username, email, role):
-        self.id = id
-        self.username = username
-        self.email = email
-        self.role = role
+# Async serving mode: gevent workers, independent page queries run concurrently
+async_db = AsyncDB(timeout=app.config['ASYNC_DB_TIMEOUT']) if app.config['ASYNC_DB_MODE'] else None
+
+def fetch_statements(statements):
+    """
+    Run independent read statements and return each one's rows: concurrently
+    on gevent workers when ASYNC_DB_MODE is on, otherwise as one pipelined
+    batch on a regular connection
+    """
+    target = db_router.current_target()
+    if async_db is not None and async_db.available():
+        return async_db.fetch_concurrent(statements, lambda: get_db_connection(target))
+    with get_db_connection(target) as conn:
+        return fetch_pipelined(conn, statements)
+
+# Admin accounts live in admin_users; identity lookups go to the primary
+principal_cache.ttl = app.config['PRINCIPAL_CACHE_SECONDS']
+admin_directory = AdminDirectory(
+    lambda: get_db_connection(PRIMARY),
+    principal_cache,
+    hash_method=app.config['AUTH_PASSWORD_METHOD'],
+    max_concurrent_hashes=app.config['AUTH_MAX_CONCURRENT_HASHES']
+)
+init_auth(app, admin_directory)
+
+# ETag/304 for listings and detail APIs, validated against change_log
+conditional_get = ConditionalGet(
+    get_db_connection,
+    enabled=app.config['CONDITIONAL_GET'],
+    retention_hours=app.config['CHANGE_FEED_RETENTION_HOURS']
+)
+app.extensions['conditional_get'] = conditional_get
 
 @login_manager.user_loader
 def load_user(user_id):
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # In production, you'd have an admin_users table
-                # For demo, using a simple check
-                admin_users = {
-                    '1': AdminUser('1', 'admin', 'admin@bitemebuddy.com', 'superadmin'),
-                    '2': AdminUser('2', 'manager', 'manager@bitemebuddy.com', 'manager')
-                }
-                return admin_users.get(user_id)
+        # Served from the principal cache; the database is only asked on a miss
+        return admin_directory.load(user_id)
     except Exception as e:
         logger.error(f"Error loading user: {e}")
         return None
@@ -171,6 +274,27 @@ def init_database():
                     
                     logger.info("Admin tables created successfully!")
                 
+                # Sessions are tied to this version; bumping it signs the admin out
+                cur.execute("""
+                    ALTER TABLE admin_users
+                    ADD COLUMN IF NOT EXISTS session_version INTEGER NOT NULL DEFAULT 1
+                """)
+                
+                if app.config['CHANGE_FEED']:
+                    installed = change_feed.install(cur)
+                    logger.info(f"Change log capturing: {', '.join(installed)}")
+                
+                if app.config['ITEM_POPULARITY'] and not item_popularity.is_installed(cur):
+                    info = item_popularity.install(cur)
+                    logger.info(f"Item popularity counters built for {info['items']} items")
+                
+                if app.config['STATUS_COUNTERS'] and not status_counters.is_installed(cur):
+                    status_counters.install(cur)
+                    logger.info("Order status counters installed")
+                
+                cur.execute("SELECT COUNT(*) as count FROM admin_users")
+                needs_bootstrap_admin = cur.fetchone()['count'] == 0
+                
                 # Check for existing tables and log status
                 tables_to_check = ['users', 'orders', 'order_items', 'payments', 'addresses']
                 for table in tables_to_check:
@@ -185,6 +309,14 @@ def init_database():
                 
                 conn.commit()
         
+        if needs_bootstrap_admin:
+            if app.config['ADMIN_USERNAME'] and app.config['ADMIN_PASSWORD']:
+                admin_directory.create(app.config['ADMIN_USERNAME'], app.config['ADMIN_EMAIL'],
+                                       app.config['ADMIN_PASSWORD'], role='superadmin')
+                logger.info(f"Created superadmin '{app.config['ADMIN_USERNAME']}'")
+            else:
+                logger.warning("No admin users; set ADMIN_USERNAME/ADMIN_PASSWORD or run 'flask create-admin'")
+        
         logger.info("Database initialization completed!")
         return True
         
@@ -218,18 +350,16 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        # For demo purposes - in production, use proper authentication
-        if username == 'admin' and password == 'admin123':
-            user = AdminUser('1', 'admin', 'admin@bitemebuddy.com', 'superadmin')
-            login_user(user)
-            flash('Login successful!', 'success')
-            logger.info(f"Admin user '{username}' logged in")
-            return redirect(url_for('dashboard'))
-        elif username == 'manager' and password == 'manager123':
-            user = AdminUser('2', 'manager', 'manager@bitemebuddy.com', 'manager')
+        try:
+            user = admin_directory.authenticate(username, password)
+        except Exception as e:
+            logger.error(f"Login error for username {username}: {e}")
+            user = None
+        
+        if user:
             login_user(user)
             flash('Login successful!', 'success')
-            logger.info(f"Manager user '{username}' logged in")
+            logger.info(f"{user.role.title()} user '{username}' logged in")
             return redirect(url_for('dashboard'))
         else:
             flash('Invalid username or password', 'error')
@@ -249,6 +379,49 @@ def logout():
 # DASHBOARD ROUTES
 # ============================================
 
+def dashboard_statements(today, filter_type):
+    """
+    The dashboard's independent queries as (query, params[, row_factory])
+    statements for fetch_pipelined()
+    """
+    return [
+        # Today's orders
+        (*queries.DASHBOARD_TODAYS_ORDERS.bind(day=today), model_row(Order)),
+        # Statistics for the selected period and for today
+        *statistics_queries(filter_type),
+        queries.DASHBOARD_RECENT_ACTIVITIES.bind(),
+        status_counters.statement() if status_counters.enabled else queries.DASHBOARD_STATUS_DISTRIBUTION.bind(),
+        top_items_statement(today, filter_type),
+        *archive_statements(filter_type)
+    ]
+
+def top_items_statement(today, filter_type):
+    """Top items of the filter's days from the popularity counters, or all-time SQL without them"""
+    if not item_popularity.enabled:
+        return queries.DASHBOARD_TOP_ITEMS.bind(limit=order_archive.top_items_limit())
+    first_day = {
+        'today': today,
+        'week': today - timedelta(days=today.weekday()),
+        'month': today.replace(day=1)
+    }.get(filter_type)
+    if first_day is None:
+        return item_popularity.statement()
+    return item_popularity.statement(start_date=first_day, end_date=today)
+
+def archive_statements(period, start_date=None, end_date=None):
+    """Extra statements all-time statistics need once orders have been archived"""
+    if statistics_period(period, start_date, end_date) != 'all':
+        return []
+    statement = order_archive.customers_statement()
+    return [statement] if statement else []
+
+def merge_archived_statistics(stats_row, archive_rows, period, start_date=None, end_date=None):
+    """Statistics row of the period, plus the archived orders for all time"""
+    if statistics_period(period, start_date, end_date) != 'all':
+        return stats_row
+    archived_only = archive_rows[0][0]['count'] if archive_rows else 0
+    return order_archive.merge_statistics(stats_row, archived_only)
+
 @app.route('/')
 @app.route('/dashboard')
 @login_required
@@ -275,83 +448,21 @@ def dashboard():
             start_date = None
             end_date = None
         
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Get today's orders
-                cur.execute("""
-                    SELECT 
-                        o.order_id,
-                        o.user_name,
-                        o.user_phone,
-                        o.total_amount,
-                        o.status,
-                        o.order_date,
-                        COUNT(oi.order_item_id) as item_count
-                    FROM orders o
-                    LEFT JOIN order_items oi ON o.order_id = oi.order_id
-                    WHERE DATE(o.order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') = %s
-                    GROUP BY o.order_id
-                    ORDER BY o.order_date DESC
-                    LIMIT 50
-                """, (today,))
-                
-                todays_orders = cur.fetchall()
-                
-                # Format dates for display
-                for order in todays_orders:
-                    order['order_date_formatted'] = format_ist_datetime(order['order_date'])
-                
-                # Get statistics
-                stats = calculate_statistics(conn, filter_type)
-                
-                # Get recent activities
-                cur.execute("""
-                    SELECT 
-                        o.order_id,
-                        o.user_name,
-                        o.status,
-                        o.order_date,
-                        CASE 
-                            WHEN o.status = 'pending' THEN 'warning'
-                            WHEN o.status = 'processing' THEN 'info'
-                            WHEN o.status = 'completed' THEN 'success'
-                            WHEN o.status = 'cancelled' THEN 'danger'
-                            ELSE 'secondary'
-                        END as status_badge
-                    FROM orders o
-                    ORDER BY o.order_date DESC
-                    LIMIT 10
-                """)
-                
-                recent_activities = cur.fetchall()
-                
-                # Get order status distribution
-                cur.execute("""
-                    SELECT 
-                        status,
-                        COUNT(*) as count,
-                        ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM orders), 1) as percentage
-                    FROM orders
-                    GROUP BY status
-                    ORDER BY count DESC
-                """)
-                
-                status_distribution = cur.fetchall()
-                
-                # Get top ordered items
-                cur.execute("""
-                    SELECT 
-                        oi.item_name,
-                        oi.item_type,
-                        SUM(oi.quantity) as total_quantity,
-                        SUM(oi.total) as total_revenue
-                    FROM order_items oi
-                    GROUP BY oi.item_name, oi.item_type
-                    ORDER BY total_quantity DESC
-                    LIMIT 10
-                """)
-                
-                top_items = cur.fetchall()
+        # Every dashboard query is independent, so they go out together
+        # instead of one round trip each
+        (todays_orders, stats_rows, today_stats_rows, recent_activities,
+         status_distribution, top_items, *archive_rows) = fetch_statements(dashboard_statements(today, filter_type))
+        
+        DASHBOARD_ORDERS.apply(todays_orders)
+        stats = build_statistics(merge_archived_statistics(stats_rows[0], archive_rows, filter_type),
+                                 today_stats_rows[0])
+        
+        if status_counters.enabled:
+            status_distribution = with_percentages(status_distribution)
+        # All-time figures include the archived orders (the popularity counters already do)
+        status_distribution = order_archive.merge_status_distribution(status_distribution, percentages=True)
+        if not item_popularity.enabled:
+            top_items = order_archive.merge_top_items(top_items)
         
         return render_template('dashboard.html',
                              todays_orders=todays_orders,
@@ -377,8 +488,40 @@ def dashboard():
 # ORDERS MANAGEMENT ROUTES
 # ============================================
 
+orders_count = CountStrategy('orders', queries.ORDERS_COUNT, queries.ORDERS_COUNT_CAPPED,
+                             cap=app.config['COUNT_CAP'], cache=count_cache)
+
+def order_filters(args):
+    """
+    Bind values for the orders listing statements; empty filters are bound
+    as NULL, which switches them off
+    """
+    search = args.get('search', '')
+    near = args.get('near', '')
+    zone = args.get('zone', '')
+    
+    # Spatial filters are answered by the in-process grid index
+    point = parse_point(near)
+    polygon = parse_polygon(zone, app.config['DELIVERY_ZONES'])
+    spatial_ids = None
+    if point or polygon:
+        geo_index.refresh_interval = app.config['GEO_REFRESH_SECONDS']
+        geo_index.rebuild_interval = app.config['GEO_REBUILD_SECONDS']
+        geo_index.ensure_fresh(get_db_connection)
+        spatial_ids = geo_index.filter_refs('orders', point, args.get('radius_km', 5.0, type=float), polygon)
+    
+    return {
+        'search': f"%{search}%" if search else None,
+        'status': args.get('status') or None,
+        'start_date': args.get('start_date') or None,
+        'end_date': args.get('end_date') or None,
+        'order_ids': spatial_ids
+    }
+
 @app.route('/orders')
 @login_required
+@conditional_get(lambda since: queries.CHANGED_SINCE_TABLES.bind(
+    since=since, tables=['orders', 'order_items', 'payments', 'addresses', 'admin_users']), clock=True)
 def orders():
     """Orders management page with search and filters"""
     try:
@@ -387,105 +530,35 @@ def orders():
         status = request.args.get('status', '')
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
+        near = request.args.get('near', '')
+        radius_km = request.args.get('radius_km', 5.0, type=float)
+        zone = request.args.get('zone', '')
         page = int(request.args.get('page', 1))
         per_page = 20
+        zones = app.config['DELIVERY_ZONES']
+        filters = order_filters(request.args)
         
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Build dynamic query
-                query = """
-                    SELECT 
-                        o.order_id,
-                        o.user_id,
-                        o.user_name,
-                        o.user_phone,
-                        o.user_email,
-                        o.total_amount,
-                        o.status,
-                        o.order_date,
-                        o.delivery_location,
-                        COUNT(oi.order_item_id) as item_count,
-                        p.payment_status,
-                        p.payment_mode
-                    FROM orders o
-                    LEFT JOIN order_items oi ON o.order_id = oi.order_id
-                    LEFT JOIN payments p ON o.order_id = p.order_id
-                    WHERE 1=1
-                """
-                
-                params = []
-                
-                # Add search conditions
-                if search:
-                    query += """
-                        AND (o.user_name ILIKE %s 
-                        OR o.user_phone ILIKE %s 
-                        OR o.user_email ILIKE %s 
-                        OR CAST(o.order_id AS TEXT) ILIKE %s)
-                    """
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param, search_param, search_param])
-                
-                # Add status filter
-                if status:
-                    query += " AND o.status = %s"
-                    params.append(status)
-                
-                # Add date filters
-                if start_date:
-                    query += " AND DATE(o.order_date) >= %s"
-                    params.append(start_date)
-                
-                if end_date:
-                    query += " AND DATE(o.order_date) <= %s"
-                    params.append(end_date)
-                
-                # Add grouping and ordering
-                query += """
-                    GROUP BY o.order_id, o.user_id, o.user_name, o.user_phone, 
-                             o.user_email, o.total_amount, o.status, o.order_date, 
-                             o.delivery_location, p.payment_status, p.payment_mode
-                    ORDER BY o.order_date DESC
-                """
-                
-                # Get total count for pagination
-                count_query = f"SELECT COUNT(*) FROM ({query}) AS subquery"
-                cur.execute(count_query, params)
-                total_count = cur.fetchone()['count']
-                
-                # Add pagination
-                query += " LIMIT %s OFFSET %s"
-                params.extend([per_page, (page - 1) * per_page])
+            with conn.cursor() as cur, conn.cursor(row_factory=model_row(Order)) as order_cur:
+                # Estimated or capped total for pagination; the page fetches
+                # the exact one from /api/orders/count afterwards
+                count = orders_count.fast(cur, filters, db_router.current_target(),
+                                          min_cap=page * per_page)
                 
                 # Execute main query
-                cur.execute(query, params)
-                orders_list = cur.fetchall()
-                
-                # Format dates and amounts
-                for order in orders_list:
-                    order['order_date_formatted'] = format_ist_datetime(order['order_date'])
-                    order['total_amount_formatted'] = f"₹{order['total_amount']:,.2f}"
-                    
-                    # Status badge class
-                    status_class = {
-                        'pending': 'warning',
-                        'processing': 'info',
-                        'completed': 'success',
-                        'cancelled': 'danger',
-                        'delivered': 'success'
-                    }.get(order['status'], 'secondary')
-                    order['status_class'] = status_class
+                order_cur.execute(*queries.ORDERS_PAGE.bind(
+                    **filters, limit=per_page, offset=(page - 1) * per_page))
+                # Order models format dates, amounts and badges on first access
+                orders_list = order_cur.fetchall()
                 
                 # Get status counts for filter
-                cur.execute("""
-                    SELECT status, COUNT(*) as count
-                    FROM orders
-                    GROUP BY status
-                    ORDER BY count DESC
-                """)
+                if status_counters.enabled:
+                    cur.execute(*status_counters.statement())
+                else:
+                    cur.execute(*queries.ORDERS_STATUS_COUNTS.bind())
                 status_counts = cur.fetchall()
         
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = count.total_pages(per_page, page, len(orders_list))
         
         return render_template('orders.html',
                              orders=orders_list,
@@ -493,9 +566,14 @@ def orders():
                              status=status,
                              start_date=start_date,
                              end_date=end_date,
+                             near=near,
+                             radius_km=radius_km,
+                             zone=zone,
+                             zones=zones,
                              page=page,
                              total_pages=total_pages,
-                             total_count=total_count,
+                             total_count=count.display,
+                             count_exact=count.exact,
                              status_counts=status_counts)
         
     except Exception as e:
@@ -507,87 +585,123 @@ def orders():
                              status='',
                              start_date='',
                              end_date='',
+                             near='',
+                             radius_km=5.0,
+                             zone='',
+                             zones=app.config['DELIVERY_ZONES'],
                              page=1,
                              total_pages=1,
                              total_count=0,
+                             count_exact=True,
                              status_counts=[])
 
+@app.route('/api/orders/count')
+@login_required
+def get_orders_count():
+    """Exact total for the orders listing with the same filters"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                total_count = orders_count.exact(cur, order_filters(request.args),
+                                                 db_router.current_target())
+        
+        per_page = 20
+        return jsonify({
+            'success': True,
+            'total_count': total_count,
+            'total_pages': (total_count + per_page - 1) // per_page
+        })
+        
+    except Exception as e:
+        logger.error(f"Orders count error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
+# Columns the orders table shows; the JSON listing sends only these
+ORDER_LISTING_FIELDS = ('order_id', 'user_id', 'user_name', 'user_phone', 'user_email',
+                        'total_amount', 'total_amount_formatted', 'status', 'order_date_formatted',
+                        'item_count', 'payment_status', 'payment_mode')
+
+@app.route('/api/orders')
+@login_required
+@conditional_get(lambda since: queries.CHANGED_SINCE_TABLES.bind(
+    since=since, tables=['orders', 'order_items', 'payments', 'addresses']))
+def get_orders_listing():
+    """
+    Orders table rows as JSON for the same filters as /orders, paged by an
+    opaque cursor; the first page also carries the total
+    """
+    try:
+        cursor = request.args.get('cursor', '')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        after_date, after_id = decode_listing_cursor(cursor) if cursor else (None, None)
+        filters = order_filters(request.args)
+        
+        with get_db_connection() as conn:
+            with conn.cursor() as cur, conn.cursor(row_factory=model_row(Order)) as order_cur:
+                # One extra row tells whether there is a next page
+                order_cur.execute(*queries.ORDERS_PAGE_AFTER.bind(
+                    **filters, after_date=after_date, after_id=after_id, limit=limit + 1))
+                rows = order_cur.fetchall()
+                count = None
+                if not cursor:
+                    count = orders_count.fast(cur, filters, db_router.current_target(), min_cap=limit)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_listing_cursor(rows[-1]['order_date'], rows[-1]['order_id'])
+        
+        result = {
+            'success': True,
+            'orders': [{field: row.get(field) for field in ORDER_LISTING_FIELDS} for row in rows],
+            'next_cursor': next_cursor
+        }
+        if count is not None:
+            result.update(total_count=count.display, count_exact=count.exact)
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Orders listing error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/orders/<int:order_id>')
 @login_required
+@conditional_get(queries.CHANGED_SINCE_ORDER.bind)
 def get_order_details(order_id):
     """Get complete order details for modal"""
     try:
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
+            with conn.cursor() as cur, \
+                    conn.cursor(row_factory=model_row(Order)) as order_cur, \
+                    conn.cursor(row_factory=model_row(OrderItem)) as item_cur:
                 # Get order basic info
-                cur.execute("""
-                    SELECT 
-                        o.*,
-                        p.payment_status,
-                        p.payment_mode,
-                        p.transaction_id,
-                        p.payment_date,
-                        p.razorpay_order_id,
-                        p.razorpay_payment_id,
-                        p.razorpay_signature
-                    FROM orders o
-                    LEFT JOIN payments p ON o.order_id = p.order_id
-                    WHERE o.order_id = %s
-                """, (order_id,))
-                
-                order = cur.fetchone()
-                
-                if not order:
-                    return jsonify({'success': False, 'message': 'Order not found'})
+                order_cur.execute(*queries.ORDER_DETAIL.bind(order_id=order_id))
                 
-                # Get order items
-                cur.execute("""
-                    SELECT 
-                        oi.*,
-                        CASE 
-                            WHEN oi.item_type = 'service' THEN s.photo
-                            WHEN oi.item_type = 'menu' THEN m.photo
-                            ELSE oi.item_photo
-                        END as item_photo_cloudinary
-                    FROM order_items oi
-                    LEFT JOIN services s ON oi.item_type = 'service' AND oi.item_id = s.id
-                    LEFT JOIN menu m ON oi.item_type = 'menu' AND oi.item_id = m.id
-                    WHERE oi.order_id = %s
-                    ORDER BY oi.order_item_id
-                """, (order_id,))
+                order = order_cur.fetchone()
                 
-                order_items = cur.fetchall()
+                if order:
+                    # Get order items
+                    item_cur.execute(*queries.ORDER_ITEMS.bind(order_id=order_id, order_date=order['order_date']))
+                    
+                    order_items = item_cur.fetchall()
+                else:
+                    # Old closed orders live in the archive
+                    archived = order_archive.get_order(order_id)
+                    if archived is None:
+                        return jsonify({'success': False, 'message': 'Order not found'})
+                    order = Order(archived[0])
+                    order_items = OrderItem.from_rows(archived[1])
                 
                 # Get customer details
-                cur.execute("""
-                    SELECT 
-                        u.*,
-                        a.full_name as address_name,
-                        a.phone as address_phone,
-                        a.address_line1,
-                        a.address_line2,
-                        a.landmark,
-                        a.city,
-                        a.state,
-                        a.pincode,
-                        a.latitude,
-                        a.longitude
-                    FROM users u
-                    LEFT JOIN addresses a ON u.id = a.user_id AND a.is_default = TRUE
-                    WHERE u.id = %s
-                """, (order['user_id'],))
+                cur.execute(*queries.ORDER_CUSTOMER.bind(user_id=order['user_id']))
                 
                 customer = cur.fetchone()
                 
-                # Format dates
-                if order.get('order_date'):
-                    order['order_date_formatted'] = format_ist_datetime(order['order_date'])
-                
-                if order.get('delivery_date'):
-                    order['delivery_date_formatted'] = format_ist_datetime(order['delivery_date'])
-                
-                if order.get('payment_date'):
-                    order['payment_date_formatted'] = format_ist_datetime(order['payment_date'])
+                # Format dates and amounts
+                ORDER_DETAIL.apply([order])
+                ORDER_ITEMS.apply(order_items)
                 
                 # Generate map link if coordinates exist
                 if customer and customer.get('latitude') and customer.get('longitude'):
@@ -596,23 +710,17 @@ def get_order_details(order_id):
                         customer['longitude']
                     )
                 
-                # Format amounts
-                order['total_amount_formatted'] = f"₹{order['total_amount']:,.2f}"
-                
                 for item in order_items:
-                    item['price_formatted'] = f"₹{item['price']:,.2f}"
-                    item['total_formatted'] = f"₹{item['total']:,.2f}"
-                    
                     # Use Cloudinary photo if available
                     if not item.get('item_photo') and item.get('item_photo_cloudinary'):
                         item['item_photo'] = item['item_photo_cloudinary']
                 
-                return jsonify({
+                # Orders with very many items are streamed
+                return json_response({
                     'success': True,
                     'order': order,
-                    'order_items': order_items,
                     'customer': customer
-                })
+                }, {'order_items': order_items})
                 
     except Exception as e:
         logger.error(f"Error getting order details for {order_id}: {e}")
@@ -638,12 +746,8 @@ def update_order_status(order_id):
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 # Update order status
-                cur.execute("""
-                    UPDATE orders 
-                    SET status = %s, notes = COALESCE(%s, notes)
-                    WHERE order_id = %s
-                    RETURNING order_id, status
-                """, (new_status, notes, order_id))
+                cur.execute(*queries.ORDER_UPDATE_STATUS.bind(
+                    status=new_status, notes=notes, order_id=order_id))
                 
                 updated_order = cur.fetchone()
                 
@@ -651,13 +755,14 @@ def update_order_status(order_id):
                     return jsonify({'success': False, 'message': 'Order not found'})
                 
                 # Log the activity
-                cur.execute("""
-                    INSERT INTO orders_status_history 
-                    (order_id, old_status, new_status, changed_by, notes)
-                    VALUES (%s, (SELECT status FROM orders WHERE order_id = %s), %s, %s, %s)
-                """, (order_id, order_id, new_status, current_user.username, notes))
+                cur.execute(*queries.ORDER_STATUS_HISTORY_INSERT.bind(
+                    order_id=order_id, status=new_status,
+                    changed_by=current_user.username, notes=notes))
                 
                 conn.commit()
+                db_router.record_write(conn)
+                # The pending badge changed; this worker shows it right away
+                header_cache.invalidate()
                 
                 logger.info(f"Order {order_id} status updated to {new_status} by {current_user.username}")
                 
@@ -692,35 +797,19 @@ def update_payment_status(order_id):
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 # Update payment status
-                cur.execute("""
-                    UPDATE payments 
-                    SET payment_status = %s, 
-                        transaction_id = CASE WHEN %s != '' THEN %s ELSE transaction_id END,
-                        payment_date = CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP ELSE payment_date END
-                    WHERE order_id = %s
-                    RETURNING payment_id, payment_status
-                """, (payment_status, transaction_id, transaction_id, payment_status, order_id))
+                cur.execute(*queries.PAYMENT_UPDATE_STATUS.bind(
+                    payment_status=payment_status, transaction_id=transaction_id, order_id=order_id))
                 
                 updated_payment = cur.fetchone()
                 
                 if not updated_payment:
                     # Try to create payment record if it doesn't exist
-                    cur.execute("""
-                        INSERT INTO payments (order_id, user_id, amount, payment_mode, payment_status, transaction_id)
-                        SELECT 
-                            o.order_id, 
-                            o.user_id, 
-                            o.total_amount, 
-                            o.payment_mode, 
-                            %s, 
-                            %s
-                        FROM orders o
-                        WHERE o.order_id = %s
-                        RETURNING payment_id, payment_status
-                    """, (payment_status, transaction_id, order_id))
+                    cur.execute(*queries.PAYMENT_CREATE_FOR_ORDER.bind(
+                        payment_status=payment_status, transaction_id=transaction_id, order_id=order_id))
                     updated_payment = cur.fetchone()
                 
                 conn.commit()
+                db_router.record_write(conn)
                 
                 logger.info(f"Payment for order {order_id} updated to {payment_status} by {current_user.username}")
                 
@@ -739,6 +828,71 @@ def update_payment_status(order_id):
 # STATISTICS ROUTES
 # ============================================
 
+analytics = AnalyticsSnapshot(
+    enabled=app.config['ANALYTICS_SNAPSHOT'],
+    refresh_interval=app.config['ANALYTICS_REFRESH_SECONDS'],
+    rebuild_interval=app.config['ANALYTICS_REBUILD_SECONDS']
+)
+
+def analytics_snapshot():
+    """The numpy snapshot when enabled and loaded, otherwise None (use SQL)"""
+    if not analytics.enabled:
+        return None
+    try:
+        analytics.ensure_fresh(get_db_connection)
+        return analytics
+    except Exception as e:
+        logger.error(f"Analytics snapshot refresh failed: {e}")
+        return None
+
+def load_statistics_data(period='week', start_date='', end_date=''):
+    """Everything the statistics page shows for a period"""
+    custom_range = period == 'custom' and start_date and end_date
+    snapshot = analytics_snapshot()
+    
+    if snapshot is not None:
+        categories, payment_methods = fetch_statements([
+            queries.STATISTICS_CATEGORIES.bind(),
+            queries.STATISTICS_PAYMENT_METHODS.bind()
+        ])
+        stats_row, today_stats_row = snapshot.statistics(period, start_date, end_date)
+        archived = order_archive.summary()
+        if statistics_period(period, start_date, end_date) == 'all' and archived is not None:
+            archived_only = snapshot.customers_without_orders(archived.user_ids)
+            stats_row = order_archive.merge_statistics(stats_row, archived_only)
+        # Daily orders for the chart: the custom range, or the last 7 days
+        if custom_range:
+            daily_data = snapshot.daily(start_date, end_date)
+        else:
+            daily_data = snapshot.daily(datetime.now(IST).date() - timedelta(days=7))
+    else:
+        # Get daily orders for chart
+        if custom_range:
+            daily_statement = queries.STATISTICS_DAILY_RANGE.bind(start_date=start_date, end_date=end_date)
+        else:
+            # Default to last 7 days
+            daily_statement = queries.STATISTICS_DAILY_LAST_7_DAYS.bind()
+        
+        (stats_rows, today_stats_rows, daily_data, categories,
+         payment_methods, *archive_rows) = fetch_statements([
+            # Statistics for the period
+            *statistics_queries(period, start_date, end_date),
+            daily_statement,
+            queries.STATISTICS_CATEGORIES.bind(),
+            queries.STATISTICS_PAYMENT_METHODS.bind(),
+            *archive_statements(period, start_date, end_date)
+        ])
+        stats_row = merge_archived_statistics(stats_rows[0], archive_rows, period, start_date, end_date)
+        today_stats_row = today_stats_rows[0]
+    
+    return {
+        'stats': build_statistics(stats_row, today_stats_row),
+        'daily_data': daily_data,
+        # All-time breakdowns include the archived orders
+        'categories': order_archive.merge_categories(categories),
+        'payment_methods': order_archive.merge_payment_methods(payment_methods)
+    }
+
 @app.route('/statistics')
 @login_required
 def statistics():
@@ -749,70 +903,14 @@ def statistics():
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
         
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Calculate statistics
-                stats = calculate_statistics(conn, period, start_date, end_date)
-                
-                # Get daily orders for chart
-                if period == 'custom' and start_date and end_date:
-                    cur.execute("""
-                        SELECT 
-                            DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
-                            COUNT(*) as order_count,
-                            SUM(total_amount) as total_revenue
-                        FROM orders
-                        WHERE DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') BETWEEN %s AND %s
-                        GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
-                        ORDER BY date
-                    """, (start_date, end_date))
-                else:
-                    # Default to last 7 days
-                    cur.execute("""
-                        SELECT 
-                            DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
-                            COUNT(*) as order_count,
-                            SUM(total_amount) as total_revenue
-                        FROM orders
-                        WHERE order_date >= CURRENT_DATE - INTERVAL '7 days'
-                        GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
-                        ORDER BY date
-                    """)
-                
-                daily_data = cur.fetchall()
-                
-                # Get top categories
-                cur.execute("""
-                    SELECT 
-                        item_type as category,
-                        COUNT(*) as order_count,
-                        SUM(total) as total_revenue
-                    FROM order_items
-                    GROUP BY item_type
-                    ORDER BY total_revenue DESC
-                """)
-                
-                categories = cur.fetchall()
-                
-                # Get payment method distribution
-                cur.execute("""
-                    SELECT 
-                        COALESCE(payment_mode, 'Unknown') as method,
-                        COUNT(*) as order_count,
-                        SUM(amount) as total_amount
-                    FROM payments
-                    WHERE payment_status = 'completed'
-                    GROUP BY payment_mode
-                    ORDER BY total_amount DESC
-                """)
-                
-                payment_methods = cur.fetchall()
+        # Shared by all admins for STATISTICS_CACHE_SECONDS; the relative
+        # periods move at IST midnight, so the date is part of the key
+        data = statistics_cache.get_or_set(
+            (db_router.current_target(), datetime.now(IST).date(), period, start_date, end_date),
+            lambda: load_statistics_data(period, start_date, end_date))
         
         return render_template('statistics.html',
-                             stats=stats,
-                             daily_data=daily_data,
-                             categories=categories,
-                             payment_methods=payment_methods,
+                             **data,
                              period=period,
                              start_date=start_date,
                              end_date=end_date)
@@ -840,24 +938,20 @@ def get_chart_data():
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 
+                snapshot = analytics_snapshot()
+                
                 if chart_type == 'daily_orders':
                     # Daily orders and revenue
-                    cur.execute("""
-                        SELECT 
-                            TO_CHAR(DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata'), 'Mon DD') as label,
-                            DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
-                            COUNT(*) as orders,
-                            COALESCE(SUM(total_amount), 0) as revenue
-                        FROM orders
-                        WHERE order_date >= CURRENT_DATE - INTERVAL '30 days'
-                        GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
-                        ORDER BY date
-                    """)
-                    
-                    data = cur.fetchall()
+                    if snapshot is not None:
+                        data = [{'label': row['date'].strftime('%b %d'), 'orders': row['order_count'],
+                                 'revenue': row['total_revenue']}
+                                for row in snapshot.daily(datetime.now(IST).date() - timedelta(days=30))]
+                    else:
+                        cur.execute(*queries.CHART_DAILY_ORDERS.bind())
+                        
+                        data = cur.fetchall()
                     
-                    return jsonify({
-                        'success': True,
+                    return json_response({'success': True}, {
                         'labels': [item['label'] for item in data],
                         'datasets': [
                             {
@@ -878,15 +972,15 @@ def get_chart_data():
                 
                 elif chart_type == 'status_distribution':
                     # Order status distribution
-                    cur.execute("""
-                        SELECT 
-                            status,
-                            COUNT(*) as count
-                        FROM orders
-                        GROUP BY status
-                    """)
-                    
-                    data = cur.fetchall()
+                    if status_counters.enabled:
+                        data = status_counters.counts(cur)
+                    elif snapshot is not None:
+                        data = snapshot.status_distribution()
+                    else:
+                        cur.execute(*queries.CHART_STATUS_DISTRIBUTION.bind())
+                        
+                        data = cur.fetchall()
+                    data = order_archive.merge_status_distribution(data)
                     
                     status_colors = {
                         'pending': '#ffc107',
@@ -896,8 +990,7 @@ def get_chart_data():
                         'delivered': '#20c997'
                     }
                     
-                    return jsonify({
-                        'success': True,
+                    return json_response({'success': True}, {
                         'labels': [item['status'].title() for item in data],
                         'datasets': [{
                             'data': [item['count'] for item in data],
@@ -906,25 +999,23 @@ def get_chart_data():
                     })
                 
                 elif chart_type == 'top_items':
-                    # Top ordered items
-                    cur.execute("""
-                        SELECT 
-                            item_name,
-                            SUM(quantity) as total_quantity
-                        FROM order_items
-                        GROUP BY item_name
-                        ORDER BY total_quantity DESC
-                        LIMIT 10
-                    """)
-                    
-                    data = cur.fetchall()
+                    # Top ordered items (of a window, by quantity or revenue, with the counters)
+                    window = top_items_window(request.args)
+                    if item_popularity.enabled:
+                        data = item_popularity.top(cur, **window)
+                    else:
+                        window['by'] = 'quantity'
+                        cur.execute(*queries.CHART_TOP_ITEMS.bind(limit=order_archive.top_items_limit()))
+                        
+                        data = order_archive.merge_top_items(cur.fetchall(), by_type=False)
                     
-                    return jsonify({
-                        'success': True,
+                    by_revenue = window['by'] == 'revenue'
+                    return json_response({'success': True}, {
                         'labels': [item['item_name'] for item in data],
                         'datasets': [{
-                            'label': 'Quantity Sold',
-                            'data': [item['total_quantity'] for item in data],
+                            'label': 'Revenue (₹)' if by_revenue else 'Quantity Sold',
+                            'data': [float(item['total_revenue']) if by_revenue else item['total_quantity']
+                                     for item in data],
                             'backgroundColor': 'rgba(153, 102, 255, 0.6)'
                         }]
                     })
@@ -936,87 +1027,121 @@ def get_chart_data():
         logger.error(f"Chart data error: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/statistics/hourly-data')
+@login_required
+def get_hourly_data():
+    """Orders per IST hour of day over the last 30 days"""
+    try:
+        snapshot = analytics_snapshot()
+        if snapshot is not None:
+            hourly_data = snapshot.hourly(datetime.now(IST).date() - timedelta(days=30))
+        else:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(*queries.CHART_HOURLY_ORDERS.bind())
+                    hourly_data = [0] * 24
+                    for row in cur.fetchall():
+                        hourly_data[row['hour']] = row['orders']
+        
+        return jsonify({'success': True, 'hourly_data': hourly_data})
+        
+    except Exception as e:
+        logger.error(f"Hourly data error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
+def top_items_window(args):
+    """Window and metric of a top-items request: ?days=1|7|30 or ?start_date&end_date, ?by=quantity|revenue"""
+    window = {'by': args.get('by') if args.get('by') in POPULARITY_METRICS else 'quantity'}
+    start_date = args.get('start_date', '')
+    end_date = args.get('end_date', '')
+    days = args.get('days', type=int)
+    if start_date and end_date:
+        window.update(start_date=start_date, end_date=end_date)
+    elif days in POPULARITY_WINDOWS:
+        window['days'] = days
+    return window
+
+@app.route('/api/statistics/top-items')
+@login_required
+def get_top_items():
+    """Top items by quantity or revenue for a window, from the popularity counters"""
+    try:
+        if not item_popularity.enabled:
+            return jsonify({'success': False, 'message': 'Item popularity counters are not enabled'})
+        
+        window = top_items_window(request.args)
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                items = item_popularity.top(cur, limit=limit, **window)
+        
+        return jsonify({'success': True, 'items': items, **window})
+        
+    except Exception as e:
+        logger.error(f"Top items error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # CUSTOMERS MANAGEMENT ROUTES
 # ============================================
 
+customers_count = CountStrategy('users', queries.CUSTOMERS_COUNT, queries.CUSTOMERS_COUNT_CAPPED,
+                                cap=app.config['COUNT_CAP'], cache=count_cache)
+
+def customer_filters(args):
+    """Bind values for the customers listing statements"""
+    search = args.get('search', '')
+    
+    # Customers with a saved address within radius_km of the point
+    point = parse_point(args.get('near', ''))
+    spatial_ids = None
+    if point:
+        geo_index.refresh_interval = app.config['GEO_REFRESH_SECONDS']
+        geo_index.rebuild_interval = app.config['GEO_REBUILD_SECONDS']
+        geo_index.ensure_fresh(get_db_connection)
+        spatial_ids = geo_index.filter_refs('addresses', point, args.get('radius_km', 5.0, type=float))
+    
+    return {
+        'search': f"%{search}%" if search else None,
+        'user_ids': spatial_ids
+    }
+
 @app.route('/customers')
 @login_required
+@conditional_get(lambda since: queries.CHANGED_SINCE_TABLES.bind(
+    since=since, tables=['users', 'orders', 'addresses', 'admin_users']), clock=True)
 def customers():
     """Customers management page"""
     try:
         search = request.args.get('search', '')
+        near = request.args.get('near', '')
+        radius_km = request.args.get('radius_km', 5.0, type=float)
         page = int(request.args.get('page', 1))
         per_page = 20
+        filters = customer_filters(request.args)
         
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Build query
-                query = """
-                    SELECT 
-                        u.id,
-                        u.full_name,
-                        u.phone,
-                        u.email,
-                        u.profile_pic,
-                        u.location,
-                        u.created_at,
-                        u.last_login,
-                        u.is_active,
-                        COUNT(o.order_id) as total_orders,
-                        COALESCE(SUM(o.total_amount), 0) as total_spent
-                    FROM users u
-                    LEFT JOIN orders o ON u.id = o.user_id
-                    WHERE 1=1
-                """
-                
-                params = []
-                
-                if search:
-                    query += """
-                        AND (u.full_name ILIKE %s 
-                        OR u.phone ILIKE %s 
-                        OR u.email ILIKE %s)
-                    """
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param, search_param])
-                
-                query += """
-                    GROUP BY u.id, u.full_name, u.phone, u.email, u.profile_pic, 
-                             u.location, u.created_at, u.last_login, u.is_active
-                    ORDER BY u.created_at DESC
-                """
-                
-                # Get total count
-                count_query = f"SELECT COUNT(*) FROM ({query}) AS subquery"
-                cur.execute(count_query, params)
-                total_count = cur.fetchone()['count']
-                
-                # Add pagination
-                query += " LIMIT %s OFFSET %s"
-                params.extend([per_page, (page - 1) * per_page])
-                
-                cur.execute(query, params)
-                customers_list = cur.fetchall()
-                
-                # Format dates
-                for customer in customers_list:
-                    if customer.get('created_at'):
-                        customer['created_at_formatted'] = format_ist_datetime(customer['created_at'])
-                    
-                    if customer.get('last_login'):
-                        customer['last_login_formatted'] = format_ist_datetime(customer['last_login'])
-                    
-                    customer['total_spent_formatted'] = f"₹{customer['total_spent']:,.2f}"
+            with conn.cursor() as cur, conn.cursor(row_factory=model_row(User)) as customer_cur:
+                # Estimated or capped total; the exact one is fetched by the page
+                count = customers_count.fast(cur, filters, db_router.current_target(),
+                                             min_cap=page * per_page)
+                
+                customer_cur.execute(*queries.CUSTOMERS_PAGE.bind(
+                    **filters, limit=per_page, offset=(page - 1) * per_page))
+                # User models format dates and amounts on first access
+                customers_list = customer_cur.fetchall()
         
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = count.total_pages(per_page, page, len(customers_list))
         
         return render_template('customers.html',
                              customers=customers_list,
                              search=search,
+                             near=near,
+                             radius_km=radius_km,
                              page=page,
                              total_pages=total_pages,
-                             total_count=total_count)
+                             total_count=count.display,
+                             count_exact=count.exact)
         
     except Exception as e:
         logger.error(f"Customers page error: {e}")
@@ -1024,96 +1149,67 @@ def customers():
         return render_template('customers.html',
                              customers=[],
                              search='',
+                             near='',
+                             radius_km=5.0,
                              page=1,
                              total_pages=1,
-                             total_count=0)
+                             total_count=0,
+                             count_exact=True)
+
+@app.route('/api/customers/count')
+@login_required
+def get_customers_count():
+    """Exact total for the customers listing with the same filters"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                total_count = customers_count.exact(cur, customer_filters(request.args),
+                                                    db_router.current_target())
+        
+        per_page = 20
+        return jsonify({
+            'success': True,
+            'total_count': total_count,
+            'total_pages': (total_count + per_page - 1) // per_page
+        })
+        
+    except Exception as e:
+        logger.error(f"Customers count error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
 
 @app.route('/api/customers/<int:customer_id>')
 @login_required
+@conditional_get(queries.CHANGED_SINCE_CUSTOMER.bind)
 def get_customer_details(customer_id):
     """Get complete customer details"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Get customer info
-                cur.execute("""
-                    SELECT 
-                        u.*,
-                        a.address_id,
-                        a.full_name as address_name,
-                        a.phone as address_phone,
-                        a.address_line1,
-                        a.address_line2,
-                        a.landmark,
-                        a.city,
-                        a.state,
-                        a.pincode,
-                        a.latitude,
-                        a.longitude,
-                        a.is_default
-                    FROM users u
-                    LEFT JOIN addresses a ON u.id = a.user_id
-                    WHERE u.id = %s
-                    ORDER BY a.is_default DESC, a.created_at DESC
-                """, (customer_id,))
-                
-                customer_data = cur.fetchall()
-                
-                if not customer_data:
-                    return jsonify({'success': False, 'message': 'Customer not found'})
-                
-                # Get customer orders summary
-                cur.execute("""
-                    SELECT 
-                        status,
-                        COUNT(*) as count,
-                        SUM(total_amount) as total_amount
-                    FROM orders
-                    WHERE user_id = %s
-                    GROUP BY status
-                """, (customer_id,))
-                
-                orders_summary = cur.fetchall()
-                
-                # Get recent orders
-                cur.execute("""
-                    SELECT 
-                        order_id,
-                        total_amount,
-                        status,
-                        order_date
-                    FROM orders
-                    WHERE user_id = %s
-                    ORDER BY order_date DESC
-                    LIMIT 5
-                """, (customer_id,))
-                
-                recent_orders = cur.fetchall()
-                
-                # Format data
-                customer = customer_data[0]
-                
-                if customer.get('created_at'):
-                    customer['created_at_formatted'] = format_ist_datetime(customer['created_at'])
-                
-                if customer.get('last_login'):
-                    customer['last_login_formatted'] = format_ist_datetime(customer['last_login'])
-                
-                # Generate map links for addresses
-                addresses = []
-                for addr in customer_data:
-                    if addr.get('latitude') and addr.get('longitude'):
-                        addr['map_link'] = generate_map_link(addr['latitude'], addr['longitude'])
-                    addresses.append(addr)
-                
-                return jsonify({
-                    'success': True,
-                    'customer': customer,
-                    'addresses': addresses,
-                    'orders_summary': orders_summary,
-                    'recent_orders': recent_orders
-                })
-                
+        customer_data, orders_summary, recent_orders = fetch_statements([
+            queries.CUSTOMER_PROFILE.bind(customer_id=customer_id),
+            queries.CUSTOMER_ORDERS_SUMMARY.bind(customer_id=customer_id),
+            queries.CUSTOMER_RECENT_ORDERS.bind(customer_id=customer_id)
+        ])
+        
+        if not customer_data:
+            return jsonify({'success': False, 'message': 'Customer not found'})
+        
+        # Format data
+        customer = customer_data[0]
+        CUSTOMER_DETAIL.apply([customer])
+        
+        # Generate map links for addresses
+        addresses = []
+        for addr in customer_data:
+            if addr.get('latitude') and addr.get('longitude'):
+                addr['map_link'] = generate_map_link(addr['latitude'], addr['longitude'])
+            addresses.append(addr)
+        
+        return json_response({
+            'success': True,
+            'customer': customer,
+            'orders_summary': orders_summary,
+            'recent_orders': recent_orders
+        }, {'addresses': addresses})
+        
     except Exception as e:
         logger.error(f"Error getting customer details for {customer_id}: {e}")
         return jsonify({'success': False, 'message': str(e)})
@@ -1122,6 +1218,12 @@ def get_customer_details(customer_id):
 # ITEMS MANAGEMENT ROUTES
 # ============================================
 
+def load_item_categories(conn):
+    """Distinct service and menu categories for the items filter"""
+    with conn.cursor() as cur:
+        cur.execute(*queries.CATALOG_CATEGORIES.bind())
+        return cur.fetchall()
+
 @app.route('/items')
 @login_required
 def items():
@@ -1133,69 +1235,27 @@ def items():
         
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Get services
-                services_query = """
-                    SELECT 
-                        s.*,
-                        'service' as item_type,
-                        (SELECT COUNT(*) FROM order_items WHERE item_type = 'service' AND item_id = s.id) as times_ordered
-                    FROM services s
-                    WHERE 1=1
-                """
-                
-                services_params = []
-                
-                if search and item_type in ['all', 'service']:
-                    services_query += " AND s.name ILIKE %s"
-                    services_params.append(f"%{search}%")
+                # Filters only apply to the selected item type
+                search_param = f"%{search}%" if search else None
                 
-                if category and item_type in ['all', 'service']:
-                    services_query += " AND s.category = %s"
-                    services_params.append(category)
-                
-                services_query += " ORDER BY s.position, s.name"
-                
-                cur.execute(services_query, services_params)
+                # Get services
+                in_services = item_type in ['all', 'service']
+                cur.execute(*queries.CATALOG_SERVICES.bind(
+                    search=search_param if in_services else None,
+                    category=(category or None) if in_services else None))
                 services = cur.fetchall()
                 
                 # Get menu items
-                menu_query = """
-                    SELECT 
-                        m.*,
-                        'menu' as item_type,
-                        (SELECT COUNT(*) FROM order_items WHERE item_type = 'menu' AND item_id = m.id) as times_ordered
-                    FROM menu m
-                    WHERE 1=1
-                """
-                
-                menu_params = []
-                
-                if search and item_type in ['all', 'menu']:
-                    menu_query += " AND m.name ILIKE %s"
-                    menu_params.append(f"%{search}%")
-                
-                if category and item_type in ['all', 'menu']:
-                    menu_query += " AND m.category = %s"
-                    menu_params.append(category)
-                
-                menu_query += " ORDER BY m.position, m.name"
-                
-                cur.execute(menu_query, menu_params)
+                in_menu = item_type in ['all', 'menu']
+                cur.execute(*queries.CATALOG_MENU.bind(
+                    search=search_param if in_menu else None,
+                    category=(category or None) if in_menu else None))
                 menu_items = cur.fetchall()
                 
-                # Get categories
-                cur.execute("""
-                    SELECT category, 'service' as type FROM services 
-                    WHERE category IS NOT NULL 
-                    GROUP BY category
-                    UNION
-                    SELECT category, 'menu' as type FROM menu 
-                    WHERE category IS NOT NULL 
-                    GROUP BY category
-                    ORDER BY category
-                """)
-                
-                categories = cur.fetchall()
+                # Get categories (rarely change, cached per worker)
+                categories = catalog_cache.get_or_set(
+                    ('categories', db_router.current_target()),
+                    lambda: load_item_categories(conn))
                 
                 # Combine items based on filter
                 items_list = []
@@ -1205,11 +1265,7 @@ def items():
                     items_list.extend(menu_items)
                 
                 # Format prices
-                for item in items_list:
-                    item['price_formatted'] = f"₹{item['price']:,.2f}"
-                    item['final_price_formatted'] = f"₹{item['final_price']:,.2f}"
-                    if item.get('discount'):
-                        item['discount_formatted'] = f"₹{item['discount']:,.2f}"
+                CATALOG_ITEMS.apply(items_list)
         
         return render_template('items.html',
                              items=items_list,
@@ -1228,6 +1284,41 @@ def items():
                              search='',
                              categories=[])
 
+# ============================================
+# MAPS ROUTES
+# ============================================
+
+@app.route('/api/maps/clusters')
+@login_required
+def get_map_clusters():
+    """Delivery/address density as grid clusters for a zoom level"""
+    try:
+        source = request.args.get('source', 'orders')
+        zoom = request.args.get('zoom', 11, type=int)
+        limit = min(request.args.get('limit', 1000, type=int), 5000)
+        bbox = parse_bbox(request.args.get('bbox'))
+        
+        if source not in geo_index.sources:
+            return jsonify({'success': False, 'message': 'Invalid source'})
+        
+        geo_index.refresh_interval = app.config['GEO_REFRESH_SECONDS']
+        geo_index.rebuild_interval = app.config['GEO_REBUILD_SECONDS']
+        geo_index.ensure_fresh(get_db_connection)
+        
+        clusters = geo_index.clusters(source, zoom, bbox, limit)
+        
+        return jsonify({
+            'success': True,
+            'source': source,
+            'zoom': zoom,
+            'total_points': len(geo_index.sources[source]),
+            'clusters': clusters
+        })
+        
+    except Exception as e:
+        logger.error(f"Map clusters error: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # UTILITY ROUTES
 # ============================================
@@ -1244,6 +1335,7 @@ def health_check():
             'status': 'healthy',
             'service': 'Admin Orders Management',
             'database': 'connected',
+            'replica': db_router.status(),
             'timestamp': datetime.now(IST).isoformat()
         })
     except Exception as e:
@@ -1274,6 +1366,48 @@ def init_db():
             'message': str(e)
         }), 500
 
+@app.route('/admin/profiles')
+@login_required
+@role_required('superadmin')
+def list_profiles():
+    """Browse captured request profiles"""
+    store = app.extensions['profile_store']
+    return render_template('profiles.html',
+                         profiles=store.list(),
+                         selected=None,
+                         profile=None)
+
+@app.route('/admin/profiles/<name>')
+@login_required
+@role_required('superadmin')
+def view_profile(name):
+    """Show the call tree of one captured profile"""
+    store = app.extensions['profile_store']
+    profile = store.load(name)
+    
+    if profile is None:
+        flash('Profile not found', 'error')
+        return redirect(url_for('list_profiles'))
+    
+    return render_template('profiles.html',
+                         profiles=store.list(),
+                         selected=name,
+                         profile=profile)
+
+@app.route('/admin/queries')
+@login_required
+@role_required('superadmin')
+def query_stats():
+    """Per-statement execution counts and timings from the query catalog"""
+    return jsonify({'success': True, 'statements': queries.catalog.stats()})
+
+@app.route('/admin/templates')
+@login_required
+@role_required('superadmin')
+def template_stats():
+    """Per-template render times and layout fragment cache hits"""
+    return jsonify({'success': True, **template_metrics.stats()})
+
 # ============================================
 # ERROR HANDLERS
 # ============================================
@@ -1305,48 +1439,207 @@ def inject_now():
     """Inject current time into all templates"""
     return dict(now=datetime.now(IST))
 
+def load_header_stats():
+    """Counters shown in the header, sidebar and footer of every page"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Get today's order count
+            cur.execute(*queries.HEADER_TODAY_ORDERS.bind())
+            today_orders = cur.fetchone()['count']
+            
+            # Get pending orders
+            if status_counters.enabled:
+                cur.execute(*status_counters.count_statement('pending'))
+            else:
+                cur.execute(*queries.HEADER_PENDING_ORDERS.bind())
+            pending_orders = cur.fetchone()['count']
+            
+            # Get today's revenue
+            cur.execute(*queries.HEADER_TODAY_REVENUE.bind())
+            today_revenue = float(cur.fetchone()['revenue'])
+            
+            return dict(
+                today_orders=today_orders,
+                pending_orders=pending_orders,
+                today_revenue=today_revenue
+            )
+
 @app.context_processor
 def inject_stats():
     """Inject basic stats into all templates"""
     try:
         if current_user.is_authenticated:
-            with get_db_connection() as conn:
-                with conn.cursor() as cur:
-                    # Get today's order count
-                    cur.execute("""
-                        SELECT COUNT(*) as count 
-                        FROM orders 
-                        WHERE DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') = CURRENT_DATE
-                    """)
-                    today_orders = cur.fetchone()['count']
-                    
-                    # Get pending orders
-                    cur.execute("""
-                        SELECT COUNT(*) as count 
-                        FROM orders 
-                        WHERE status = 'pending'
-                    """)
-                    pending_orders = cur.fetchone()['count']
-                    
-                    # Get today's revenue
-                    cur.execute("""
-                        SELECT COALESCE(SUM(total_amount), 0) as revenue 
-                        FROM orders 
-                        WHERE DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') = CURRENT_DATE
-                        AND status != 'cancelled'
-                    """)
-                    today_revenue = float(cur.fetchone()['revenue'])
-                    
-                    return dict(
-                        today_orders=today_orders,
-                        pending_orders=pending_orders,
-                        today_revenue=today_revenue
-                    )
+            # Shared by all admins for HEADER_CACHE_SECONDS, so the cached
+            # layout fragments keyed by these counters stay valid as long.
+            # Keyed by the IST date too: today's counters restart at midnight
+            return header_cache.get_or_set(
+                (db_router.current_target(), datetime.now(IST).date()), load_header_stats)
     except Exception as e:
         logger.error(f"Error injecting stats: {e}")
     
     return dict(today_orders=0, pending_orders=0, today_revenue=0)
 
+# ============================================
+# PARTITION MAINTENANCE
+# ============================================
+
+partition_manager = PartitionManager(
+    lambda: get_db_connection(PRIMARY),
+    months_ahead=app.config['PARTITION_MONTHS_AHEAD'],
+    batch_size=app.config['PARTITION_BATCH_SIZE'],
+    check_interval=app.config['PARTITION_CHECK_SECONDS']
+)
+init_partitioning(app, partition_manager)
+
+# ============================================
+# ORDER ARCHIVE
+# ============================================
+
+order_archive = OrderArchive(
+    app.config['ARCHIVE_DIR'],
+    lambda: get_db_connection(PRIMARY),
+    older_than_days=app.config['ARCHIVE_AFTER_DAYS'],
+    batch_size=app.config['ARCHIVE_BATCH_SIZE']
+)
+init_archive(app, order_archive)
+
+# ============================================
+# ITEM POPULARITY
+# ============================================
+
+item_popularity = ItemPopularity(
+    lambda: get_db_connection(PRIMARY),
+    enabled=app.config['ITEM_POPULARITY'],
+    hourly_retention_hours=app.config['ITEM_POPULARITY_HOURLY_RETENTION'],
+    fold_interval=app.config['ITEM_POPULARITY_FOLD_SECONDS']
+)
+init_popularity(app, item_popularity)
+# Its trigger moves to the partitioned order_items in the swap transaction
+partition_manager.on_swap(item_popularity.install_trigger)
+
+# ============================================
+# ORDER STATUS COUNTERS
+# ============================================
+
+status_counters = StatusCounters(
+    lambda: get_db_connection(PRIMARY),
+    enabled=app.config['STATUS_COUNTERS'],
+    compact_interval=app.config['STATUS_COUNTERS_COMPACT_SECONDS']
+)
+init_status_counters(app, status_counters)
+partition_manager.on_swap(status_counters.install_trigger)
+
+# ============================================
+# CHANGE FEED
+# ============================================
+
+statistics_cache.ttl = app.config['STATISTICS_CACHE_SECONDS']
+catalog_cache.ttl = app.config['CATALOG_CACHE_SECONDS']
+count_cache.ttl = app.config['COUNT_CACHE_SECONDS']
+header_cache.ttl = app.config['HEADER_CACHE_SECONDS']
+
+change_feed = ChangeFeed(
+    lambda: get_db_connection(PRIMARY),
+    poll_interval=app.config['CHANGE_FEED_POLL_SECONDS'],
+    retention_hours=app.config['CHANGE_FEED_RETENTION_HOURS']
+)
+
+# The analytics snapshot re-reads the orders the log recorded as changed
+analytics.changes = change_feed
+partition_manager.on_swap(change_feed.install_trigger)
+
+@change_feed.subscribe
+def invalidate_on_change(records):
+    """Drop cached data the committed changes affect (records is None: drop everything)"""
+    tables = None if records is None else {record['table_name'] for record in records}
+    
+    def touched(*names):
+        return tables is None or not tables.isdisjoint(names)
+    
+    def row_ids(table):
+        return [record['row_id'] for record in records if record['table_name'] == table]
+    
+    # In-process structures first, so a cache entry reloaded from them
+    # right after its invalidation already sees the change
+    if records is None:
+        geo_index.mark_stale()
+    elif touched('orders', 'addresses'):
+        geo_index.mark_changed(order_ids=row_ids('orders'), address_ids=row_ids('addresses'))
+    if touched('orders'):
+        # Its refresh re-reads the orders the change log recorded since the last one
+        analytics.last_refresh = 0.0
+    
+    if touched('orders', 'order_items', 'payments'):
+        statistics_cache.invalidate()
+        header_cache.invalidate()
+    if touched('orders', 'order_items', 'users'):
+        count_cache.invalidate()
+    if touched('services', 'menu'):
+        catalog_cache.invalidate()
+    if touched('admin_users'):
+        if records is None:
+            principal_cache.invalidate()
+        else:
+            for record in records:
+                if record['table_name'] == 'admin_users':
+                    principal_cache.invalidate(record['row_id'])
+
+if app.config['CHANGE_FEED'] and not db_router.enabled:
+    # Writes reach the caches within a poll, so entries can live much longer.
+    # Not with a replica: an entry could be reloaded before the replica has the write
+    for cache in (statistics_cache, catalog_cache, count_cache, principal_cache, header_cache):
+        cache.ttl = max(cache.ttl, app.config['CHANGE_FEED_CACHE_SECONDS'])
+
+init_change_feed(app, change_feed)
+
+# ============================================
+# WORKER WARM-UP
+# ============================================
+
+warmup = Warmup(retry_seconds=app.config['WARMUP_RETRY_SECONDS'])
+
+@warmup.step('templates')
+def warm_templates():
+    return {'compiled': precompile_templates(app)}
+
+@warmup.step('connections')
+def warm_connections():
+    targets = (PRIMARY, REPLICA) if db_router.enabled else (PRIMARY,)
+    return {target: db_pools.warm(target, get_database_url(target)) for target in targets}
+
+@warmup.step('partitions')
+def warm_partitions():
+    # Before statements are prepared, so they are the partition-pruning ones
+    with get_db_connection(PRIMARY) as conn:
+        with conn.cursor() as cur:
+            return {'partitioned': partition_manager.detect(cur)}
+
+@warmup.step('prepared_statements')
+def warm_prepared_statements():
+    statements = dashboard_statements(datetime.now(IST).date(), 'today')
+    statements = [statement[:2] for statement in statements]
+    targets = (PRIMARY, REPLICA) if db_router.enabled else (PRIMARY,)
+    return {target: db_pools.prepare(target, get_database_url(target), statements)
+            for target in targets}
+
+@warmup.step('analytics')
+def warm_analytics():
+    if not analytics.enabled:
+        return {'enabled': False}
+    analytics.ensure_fresh(lambda: get_db_connection(PRIMARY))
+    return analytics.status()
+
+@warmup.step('caches')
+def warm_caches():
+    target = REPLICA if db_router.enabled and db_router.monitor.can_serve() else PRIMARY
+    statistics_cache.set((target, datetime.now(IST).date(), 'week', '', ''),
+                         load_statistics_data('week'))
+    with get_db_connection(target) as conn:
+        catalog_cache.set(('categories', target), load_item_categories(conn))
+    return {'statistics': len(statistics_cache), 'catalog': len(catalog_cache)}
+
+init_warmup(app, warmup)
+
 # ============================================
 # APPLICATION STARTUP
 # ============================================
@@ -0,0 +1,621 @@
+# admin_orders_management/archive.py
+import os
+import gzip
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+
+import click
+
+from queries import (
+    ARCHIVE_CANDIDATES,
+    ARCHIVE_ORDERS,
+    ARCHIVE_ORDER_ITEMS,
+    ARCHIVE_PAYMENTS,
+    ARCHIVE_STATUS_HISTORY,
+    ARCHIVE_HAS_STATUS_HISTORY,
+    ARCHIVE_DELETE_STATUS_HISTORY,
+    ARCHIVE_DELETE_PAYMENTS,
+    ARCHIVE_DELETE_ORDER_ITEMS,
+    ARCHIVE_DELETE_ORDERS,
+    ARCHIVE_LIVE_ORDERS,
+    ARCHIVE_CUSTOMERS_ONLY_ARCHIVED
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Orders in these states never change again and may be archived
+CLOSED_STATUSES = ('completed', 'delivered', 'cancelled')
+
+DATA_SUFFIX = '.col.gz'
+PENDING_SUFFIX = '.col.gz.pending'
+META_SUFFIX = '.meta.json'
+
+# payments columns ORDER_DETAIL joins onto an order
+PAYMENT_FIELDS = ('payment_status', 'payment_mode', 'transaction_id', 'payment_date',
+                  'razorpay_order_id', 'razorpay_payment_id', 'razorpay_signature')
+
+# pg_advisory lock so only one archive run at a time writes files
+ADVISORY_LOCK_ID = 7043001
+
+# Text columns with at most this share of distinct values are dictionary-encoded
+DICTIONARY_RATIO = 0.5
+
+
+# ============================================
+# COLUMN ENCODING
+# ============================================
+
+def _kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, Decimal):
+        return 'decimal'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, (dict, list)):
+        return 'json'
+    return 'text'
+
+
+_ENCODERS = {
+    'decimal': str,
+    'datetime': datetime.isoformat,
+    'date': date.isoformat,
+    'text': str
+}
+
+_DECODERS = {
+    'decimal': Decimal,
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat
+}
+
+
+def encode_column(values):
+    """One column as {'type', 'values'} or, for repetitive text, {'type', 'dictionary', 'codes'}"""
+    kind = next((_kind(value) for value in values if value is not None), 'null')
+    encode = _ENCODERS.get(kind)
+    if encode is not None:
+        values = [None if value is None else encode(value) for value in values]
+
+    if kind == 'text' and values:
+        codes = {}
+        encoded = [codes.setdefault(value, len(codes)) for value in values]
+        if len(codes) <= len(values) * DICTIONARY_RATIO:
+            return {'type': kind, 'dictionary': list(codes), 'codes': encoded}
+    return {'type': kind, 'values': values}
+
+
+def decode_column(column):
+    if 'codes' in column:
+        dictionary = column['dictionary']
+        return [dictionary[code] for code in column['codes']]
+    decode = _DECODERS.get(column['type'])
+    if decode is None:
+        return column['values']
+    return [None if value is None else decode(value) for value in column['values']]
+
+
+def encode_table(rows):
+    names = list(rows[0]) if rows else []
+    return {
+        'rows': len(rows),
+        'columns': {name: encode_column([row[name] for row in rows]) for name in names}
+    }
+
+
+def decode_table(table):
+    names = list(table['columns'])
+    if not names:
+        return []
+    columns = [decode_column(table['columns'][name]) for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+# ============================================
+# AGGREGATES
+# ============================================
+
+class ArchiveSummary:
+    """
+    Totals of archived rows in the shapes of the all-time statistics
+    queries, so they can be added to the live results without reading
+    the archive files
+    """
+
+    def __init__(self):
+        self.orders = 0
+        self.revenue = Decimal(0)
+        self.revenue_orders = 0
+        self.status_counts = {}
+        self.user_ids = set()
+        self.items = {}
+        self.categories = {}
+        self.payment_methods = {}
+
+    @classmethod
+    def from_rows(cls, orders, items, payments):
+        summary = cls()
+        summary.orders = len(orders)
+        for order in orders:
+            status = order.get('status')
+            summary.status_counts[status] = summary.status_counts.get(status, 0) + 1
+            if status is not None and status != 'cancelled' and order.get('total_amount') is not None:
+                summary.revenue += order['total_amount']
+                summary.revenue_orders += 1
+            if order.get('user_id') is not None:
+                summary.user_ids.add(order['user_id'])
+        for item in items:
+            _add(summary.items, (item.get('item_name'), item.get('item_type')),
+                 item.get('quantity'), item.get('total'))
+            _add(summary.categories, item.get('item_type'), 1, item.get('total'))
+        for payment in payments:
+            if payment.get('payment_status') == 'completed':
+                _add(summary.payment_methods, payment.get('payment_mode') or 'Unknown', 1, payment.get('amount'))
+        return summary
+
+    def merge(self, other):
+        self.orders += other.orders
+        self.revenue += other.revenue
+        self.revenue_orders += other.revenue_orders
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        self.user_ids |= other.user_ids
+        for target, source in ((self.items, other.items), (self.categories, other.categories),
+                               (self.payment_methods, other.payment_methods)):
+            for key, (count, amount) in source.items():
+                _add(target, key, count, amount)
+        return self
+
+    def to_json(self):
+        return {
+            'orders': self.orders,
+            'revenue': str(self.revenue),
+            'revenue_orders': self.revenue_orders,
+            'status_counts': [[status, count] for status, count in self.status_counts.items()],
+            'user_ids': sorted(self.user_ids),
+            'items': [[name, kind, count, str(amount)] for (name, kind), (count, amount) in self.items.items()],
+            'categories': [[key, count, str(amount)] for key, (count, amount) in self.categories.items()],
+            'payment_methods': [[key, count, str(amount)] for key, (count, amount) in self.payment_methods.items()]
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        summary = cls()
+        summary.orders = data['orders']
+        summary.revenue = Decimal(data['revenue'])
+        summary.revenue_orders = data['revenue_orders']
+        summary.status_counts = {status: count for status, count in data['status_counts']}
+        summary.user_ids = set(data['user_ids'])
+        summary.items = {(name, kind): (count, Decimal(amount)) for name, kind, count, amount in data['items']}
+        summary.categories = {key: (count, Decimal(amount)) for key, count, amount in data['categories']}
+        summary.payment_methods = {key: (count, Decimal(amount))
+                                   for key, count, amount in data['payment_methods']}
+        return summary
+
+
+def _add(totals, key, count, amount):
+    previous_count, previous_amount = totals.get(key, (0, Decimal(0)))
+    totals[key] = (previous_count + (count or 0), previous_amount + (amount or 0))
+
+
+def _percentage(count, total):
+    return (Decimal(count * 100) / total).quantize(Decimal('0.1'), ROUND_HALF_UP) if total else Decimal(0)
+
+
+# ============================================
+# ARCHIVE
+# ============================================
+
+class OrderArchive:
+    """
+    Closed orders older than older_than_days, with their items, payments
+    and status history, moved out of the live tables into gzip-compressed
+    columnar files under directory (one file per batch of batch_size
+    orders). Each file has a small .meta.json sidecar with the order ID
+    range and the batch's ArchiveSummary, so all-time statistics add the
+    archive to the live results without opening the files; get_order()
+    decodes only the files whose ID range could hold the order.
+
+    run() writes a batch to a .pending file, deletes the rows and commits,
+    then publishes the file. A run interrupted between the commit and the
+    rename is finished by the next run (recover()).
+    """
+
+    def __init__(self, directory, connect, older_than_days=365, batch_size=1000,
+                 statuses=CLOSED_STATUSES, refresh_seconds=10, decoded_files=4):
+        self.directory = directory
+        self.connect = connect
+        self.older_than_days = older_than_days
+        self.batch_size = batch_size
+        self.statuses = tuple(statuses)
+        self.refresh_seconds = refresh_seconds
+        self.decoded_files = decoded_files
+        self._lock = threading.Lock()
+        self._files = {}
+        self._summary = None
+        self._refreshed = 0.0
+        self._decoded = OrderedDict()
+
+    # Reading
+
+    def _path(self, name, suffix=''):
+        return os.path.join(self.directory, name + suffix)
+
+    def _refresh(self, force=False):
+        """Reload sidecars when files were added or removed (by any process)"""
+        now = time.monotonic()
+        if not force and now - self._refreshed < self.refresh_seconds:
+            return
+        self._refreshed = now
+        try:
+            names = sorted(entry.name[:-len(DATA_SUFFIX)] for entry in os.scandir(self.directory)
+                           if entry.name.endswith(DATA_SUFFIX))
+        except FileNotFoundError:
+            names = []
+        if names == list(self._files):
+            return
+
+        files = {}
+        for name in names:
+            meta = self._files.get(name) or self._read_meta(name)
+            if meta is not None:
+                files[name] = meta
+        summary = ArchiveSummary()
+        for meta in files.values():
+            summary.merge(meta['summary'])
+        self._files = files
+        self._summary = summary if files else None
+
+    def _read_meta(self, name):
+        try:
+            with open(self._path(name, META_SUFFIX), 'rb') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            # Sidecar lost; rebuild it from the data file
+            try:
+                meta = self._read_data(self._path(name, DATA_SUFFIX))['meta']
+                meta['bytes'] = os.path.getsize(self._path(name, DATA_SUFFIX))
+                self._write_meta(name, meta)
+            except Exception as e:
+                logger.error(f"Unreadable archive file {name}: {e}")
+                return None
+        except Exception as e:
+            logger.error(f"Unreadable archive sidecar {name}: {e}")
+            return None
+        meta = dict(meta)
+        meta['summary'] = ArchiveSummary.from_json(meta['summary'])
+        return meta
+
+    @staticmethod
+    def _read_data(path):
+        with gzip.open(path, 'rb') as f:
+            return json.load(f)
+
+    def summary(self):
+        """ArchiveSummary of every archived order, or None while the archive is empty"""
+        with self._lock:
+            self._refresh()
+            return self._summary
+
+    def _tables(self, name):
+        tables = self._decoded.get(name)
+        if tables is not None:
+            self._decoded.move_to_end(name)
+            return tables
+        data = self._read_data(self._path(name, DATA_SUFFIX))
+        tables = {table: decode_table(columns) for table, columns in data['tables'].items()}
+        self._decoded[name] = tables
+        while len(self._decoded) > self.decoded_files:
+            self._decoded.popitem(last=False)
+        return tables
+
+    def get_order(self, order_id):
+        """
+        Archived order and its items as dicts shaped like the ORDER_DETAIL
+        and ORDER_ITEMS rows, or None if the order was never archived
+        """
+        with self._lock:
+            self._refresh()
+            for name, meta in self._files.items():
+                if not meta['min_order_id'] <= order_id <= meta['max_order_id']:
+                    continue
+                tables = self._tables(name)
+                order = next((row for row in tables['orders'] if row['order_id'] == order_id), None)
+                if order is None:
+                    continue
+                items = [row for row in tables['order_items'] if row['order_id'] == order_id]
+                payment = next((row for row in tables['payments'] if row['order_id'] == order_id), {})
+                order = dict(order, archived=True)
+                order.update({field: payment.get(field) for field in PAYMENT_FIELDS})
+                return order, [dict(item) for item in items]
+        return None
+
+    # Read-through for the all-time statistics
+
+    def customers_statement(self):
+        """Statement counting archived customers without live orders, or None"""
+        summary = self.summary()
+        if summary is None:
+            return None
+        return ARCHIVE_CUSTOMERS_ONLY_ARCHIVED.bind(user_ids=sorted(summary.user_ids))
+
+    def merge_statistics(self, stats, archived_only_customers=0):
+        """STATISTICS_SUMMARY['all'] row plus the archived orders"""
+        summary = self.summary()
+        if summary is None:
+            return stats
+        stats = dict(stats)
+        live_orders = stats['total_orders'] or 0
+        live_revenue = stats['total_revenue'] or Decimal(0)
+        live_revenue_orders = stats['revenue_orders'] or 0
+
+        stats['total_orders'] = live_orders + summary.orders
+        stats['total_revenue'] = live_revenue + summary.revenue
+        stats['total_customers'] = (stats['total_customers'] or 0) + archived_only_customers
+        revenue_orders = live_revenue_orders + summary.revenue_orders
+        stats['avg_order_value'] = stats['total_revenue'] / revenue_orders if revenue_orders else None
+        stats['completed_orders'] = (stats['completed_orders'] or 0) + \
+            summary.status_counts.get('completed', 0) + summary.status_counts.get('delivered', 0)
+        stats['cancelled_orders'] = (stats['cancelled_orders'] or 0) + summary.status_counts.get('cancelled', 0)
+        stats['pending_orders'] = (stats['pending_orders'] or 0) + summary.status_counts.get('pending', 0)
+        return stats
+
+    def merge_status_distribution(self, rows, percentages=False):
+        """Status counts (DASHBOARD_/CHART_STATUS_DISTRIBUTION) including archived orders"""
+        summary = self.summary()
+        if summary is None:
+            return rows
+        counts = {row['status']: row['count'] for row in rows}
+        for status, count in summary.status_counts.items():
+            counts[status] = counts.get(status, 0) + count
+        merged = [{'status': status, 'count': count}
+                  for status, count in sorted(counts.items(), key=lambda entry: -entry[1])]
+        if percentages:
+            total = sum(counts.values())
+            for row in merged:
+                row['percentage'] = _percentage(row['count'], total)
+        return merged
+
+    def top_items_limit(self, limit=10):
+        """LIMIT for the live top-items query: every item while archived totals must be added"""
+        return limit if self.summary() is None else None
+
+    def merge_top_items(self, rows, limit=10, by_type=True):
+        """Top items (DASHBOARD_/CHART_TOP_ITEMS, fetched without a limit) including archived sales"""
+        summary = self.summary()
+        if summary is None:
+            return rows[:limit]
+        totals = {}
+        for row in rows:
+            key = (row['item_name'], row['item_type']) if by_type else row['item_name']
+            _add(totals, key, row['total_quantity'], row.get('total_revenue'))
+        for (name, kind), (count, amount) in summary.items.items():
+            _add(totals, (name, kind) if by_type else name, count, amount)
+        ranked = sorted(totals.items(), key=lambda entry: -entry[1][0])[:limit]
+        if by_type:
+            return [{'item_name': name, 'item_type': kind, 'total_quantity': count, 'total_revenue': amount}
+                    for (name, kind), (count, amount) in ranked]
+        return [{'item_name': name, 'total_quantity': count} for name, (count, _) in ranked]
+
+    def merge_categories(self, rows):
+        """STATISTICS_CATEGORIES rows including archived items"""
+        summary = self.summary()
+        if summary is None:
+            return rows
+        totals = {}
+        for row in rows:
+            _add(totals, row['category'], row['order_count'], row['total_revenue'])
+        for key, (count, amount) in summary.categories.items():
+            _add(totals, key, count, amount)
+        return [{'category': key, 'order_count': count, 'total_revenue': amount}
+                for key, (count, amount) in sorted(totals.items(), key=lambda entry: -entry[1][1])]
+
+    def merge_payment_methods(self, rows):
+        """STATISTICS_PAYMENT_METHODS rows including archived payments"""
+        summary = self.summary()
+        if summary is None:
+            return rows
+        totals = {}
+        for row in rows:
+            _add(totals, row['method'], row['order_count'], row['total_amount'])
+        for key, (count, amount) in summary.payment_methods.items():
+            _add(totals, key, count, amount)
+        return [{'method': key, 'order_count': count, 'total_amount': amount}
+                for key, (count, amount) in sorted(totals.items(), key=lambda entry: -entry[1][1])]
+
+    # Writing
+
+    def _write_meta(self, name, meta):
+        tmp = self._path(name, META_SUFFIX + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(name, META_SUFFIX))
+
+    def _fsync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _publish(self, name):
+        """Make a committed .pending file visible to readers"""
+        pending = self._path(name, PENDING_SUFFIX)
+        meta = self._read_data(pending)['meta']
+        meta['bytes'] = os.path.getsize(pending)
+        os.replace(pending, self._path(name, DATA_SUFFIX))
+        self._write_meta(name, meta)
+        self._fsync_directory()
+        return meta
+
+    def recover(self, cur):
+        """Publish or discard .pending files left by an interrupted run"""
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(PENDING_SUFFIX):
+                continue
+            name = entry.name[:-len(PENDING_SUFFIX)]
+            order_ids = self._read_data(entry.path)['tables']['orders']['columns']['order_id']['values']
+            cur.execute(*ARCHIVE_LIVE_ORDERS.bind(order_ids=order_ids))
+            live = cur.fetchone()['count']
+            if live == 0:
+                self._publish(name)
+                logger.info(f"Archive file {name} published after an interrupted run")
+            elif live == len(order_ids):
+                os.remove(entry.path)
+                logger.info(f"Archive file {name} discarded; its orders were never deleted")
+            else:
+                logger.error(f"Archive file {name} is only partly deleted from the database; left as pending")
+
+    def _archive_batch(self, conn, cur, with_history):
+        cur.execute(*ARCHIVE_CANDIDATES.bind(statuses=list(self.statuses),
+                                             older_than_days=self.older_than_days,
+                                             limit=self.batch_size))
+        candidates = cur.fetchall()
+        order_ids = [row['order_id'] for row in candidates]
+        if not order_ids:
+            conn.rollback()
+            return None
+        # Their months, so only those partitions of order_items are read
+        order_dates = sorted({row['order_date'] for row in candidates})
+
+        tables = {}
+        for table, statement, dates in (('orders', ARCHIVE_ORDERS, {}),
+                                        ('order_items', ARCHIVE_ORDER_ITEMS, {'order_dates': order_dates}),
+                                        ('payments', ARCHIVE_PAYMENTS, {})):
+            cur.execute(*statement.bind(order_ids=order_ids, **dates))
+            tables[table] = cur.fetchall()
+        if with_history:
+            cur.execute(*ARCHIVE_STATUS_HISTORY.bind(order_ids=order_ids))
+            tables['orders_status_history'] = cur.fetchall()
+
+        orders = tables['orders']
+        dates = [order['order_date'] for order in orders if order.get('order_date')]
+        meta = {
+            'version': FORMAT_VERSION,
+            'orders': len(orders),
+            'rows': {table: len(rows) for table, rows in tables.items()},
+            'min_order_id': min(order_ids),
+            'max_order_id': max(order_ids),
+            'first_order_date': min(dates).isoformat() if dates else None,
+            'last_order_date': max(dates).isoformat() if dates else None,
+            'archived_at': datetime.now(timezone.utc).isoformat(),
+            'summary': ArchiveSummary.from_rows(orders, tables['order_items'], tables['payments']).to_json()
+        }
+        name = f"orders-{meta['min_order_id']:010d}-{meta['max_order_id']:010d}"
+        pending = self._path(name, PENDING_SUFFIX)
+        with open(pending, 'wb') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+                gz.write(json.dumps({
+                    'meta': meta,
+                    'tables': {table: encode_table(rows) for table, rows in tables.items()}
+                }, separators=(',', ':')).encode())
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            if with_history:
+                cur.execute(*ARCHIVE_DELETE_STATUS_HISTORY.bind(order_ids=order_ids))
+            cur.execute(*ARCHIVE_DELETE_PAYMENTS.bind(order_ids=order_ids))
+            cur.execute(*ARCHIVE_DELETE_ORDER_ITEMS.bind(order_ids=order_ids, order_dates=order_dates))
+            cur.execute(*ARCHIVE_DELETE_ORDERS.bind(order_ids=order_ids))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            os.remove(pending)
+            raise
+        return self._publish(name)
+
+    def run(self, max_batches=None, progress=None):
+        """Archive every eligible order; returns the metadata of the files written"""
+        os.makedirs(self.directory, exist_ok=True)
+        written = []
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    raise RuntimeError("Another archive run is in progress")
+                try:
+                    self.recover(cur)
+                    cur.execute(*ARCHIVE_HAS_STATUS_HISTORY.bind())
+                    with_history = cur.fetchone()['present']
+                    conn.commit()
+                    while max_batches is None or len(written) < max_batches:
+                        meta = self._archive_batch(conn, cur, with_history)
+                        if meta is None:
+                            break
+                        written.append(meta)
+                        if progress:
+                            progress(meta)
+                finally:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_ID,))
+                    conn.commit()
+        if written:
+            logger.info(f"Archived {sum(meta['orders'] for meta in written)} orders "
+                        f"into {len(written)} files")
+        with self._lock:
+            self._refresh(force=True)
+        return written
+
+    def status(self):
+        with self._lock:
+            self._refresh(force=True)
+            files = [dict(meta, name=name) for name, meta in self._files.items()]
+        return {
+            'directory': self.directory,
+            'files': files,
+            'orders': sum(meta['orders'] for meta in files),
+            'bytes': sum(meta.get('bytes', 0) for meta in files)
+        }
+
+
+def init_archive(app, archive):
+    """Register `flask archive run|status`"""
+
+    @app.cli.group('archive')
+    def archive_group():
+        """Cold storage for old, closed orders"""
+
+    @archive_group.command('run')
+    @click.option('--older-than-days', type=int, default=None, help='Archive orders older than this')
+    @click.option('--batch-size', type=int, default=None, help='Orders per archive file')
+    @click.option('--max-batches', type=int, default=None)
+    def run_command(older_than_days, batch_size, max_batches):
+        """Move closed orders past the cutoff into the archive"""
+        if older_than_days is not None:
+            archive.older_than_days = older_than_days
+        if batch_size:
+            archive.batch_size = batch_size
+
+        def progress(meta):
+            click.echo(f"{meta['orders']} orders ({meta['first_order_date']} .. {meta['last_order_date']})")
+
+        written = archive.run(max_batches=max_batches, progress=progress)
+        click.echo(f"Archived {sum(meta['orders'] for meta in written)} orders into {len(written)} files")
+
+    @archive_group.command('status')
+    def status_command():
+        """Show the archive files"""
+        info = archive.status()
+        click.echo(f"{info['directory']}: {info['orders']} orders in {len(info['files'])} files, "
+                   f"{info['bytes'] / 1024:.1f} KiB")
+        for meta in info['files']:
+            click.echo(f"  {meta['name']}  {meta['orders']:>6} orders  "
+                       f"{meta['first_order_date']} .. {meta['last_order_date']}")
+
+    app.extensions['order_archive'] = archive
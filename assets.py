@@ -0,0 +1,144 @@
+# admin_orders_management/assets.py
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+
+import click
+from flask import abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # optional dependency, only gzip variants are built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Source folders under static/ that are fingerprinted
+ASSET_DIRS = ('css', 'js')
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _hashed_name(relative_path, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest}{ext}"
+
+
+def build_assets(static_dir, dist_dir):
+    """
+    Copy every CSS/JS asset to dist_dir under a content-hashed name, write
+    gzip and Brotli variants next to it and record the mapping in
+    manifest.json. Returns the manifest.
+    """
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for folder in ASSET_DIRS:
+        source_root = os.path.join(static_dir, folder)
+        for dirpath, _, filenames in os.walk(source_root):
+            for filename in sorted(filenames):
+                if not filename.endswith(ASSET_EXTENSIONS):
+                    continue
+
+                source = os.path.join(dirpath, filename)
+                relative = os.path.relpath(source, static_dir).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    content = f.read()
+
+                hashed = _hashed_name(relative, content)
+                target = os.path.join(dist_dir, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+
+                with open(target, 'wb') as f:
+                    f.write(content)
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+
+                manifest[relative] = hashed
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+
+def load_manifest(dist_dir):
+    path = os.path.join(dist_dir, 'manifest.json')
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.error(f"Invalid asset manifest {path}: {e}")
+        return {}
+
+
+def init_assets(app):
+    """
+    Serve fingerprinted assets from /assets/ with content negotiation and
+    immutable caching, and expose asset_url() to templates. Without a built
+    manifest asset_url() falls back to the regular static URL.
+    """
+    dist_dir = os.path.join(app.static_folder, app.config.get('ASSET_DIST_DIR', 'dist'))
+    max_age = app.config.get('ASSET_MAX_AGE', 31536000)
+    manifest = load_manifest(dist_dir)
+    app.extensions['asset_manifest'] = manifest
+
+    def asset_url(filename, **values):
+        """url_for('static', filename=...) replacement that resolves hashed names"""
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename, **values)
+        return url_for('serve_asset', filename=hashed, **values)
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        """Serve a fingerprinted asset, precompressed when the client allows it"""
+        path = os.path.realpath(os.path.join(dist_dir, filename))
+        if not path.startswith(os.path.realpath(dist_dir) + os.sep) or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] > 0 and os.path.isfile(path + suffix):
+                encoding, path = name, path + suffix
+                break
+
+        response = send_file(path, mimetype=mimetype, max_age=max_age, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+        return response
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress static CSS/JS into static/dist"""
+        built = build_assets(app.static_folder, dist_dir)
+        manifest.clear()
+        manifest.update(built)
+        click.echo(f"Built {len(built)} assets into {dist_dir}"
+                   f"{'' if brotli else ' (brotli not installed, gzip only)'}")
+
+
+if __name__ == '__main__':
+    static = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    result = build_assets(static, os.path.join(static, 'dist'))
+    print(f"Built {len(result)} assets", file=sys.stderr)
@@ -0,0 +1,72 @@
+# admin_orders_management/async_db.py
+import logging
+import contextvars
+
+try:
+    import gevent
+    from gevent import monkey
+except ImportError:  # optional dependency, statements are pipelined instead
+    gevent = None
+
+logger = logging.getLogger(__name__)
+
+
+def cooperative():
+    """
+    Whether this process runs on gevent with the standard library patched,
+    as gunicorn's gevent worker does before it loads the app
+    """
+    return gevent is not None and monkey.is_module_patched('select')
+
+
+class AsyncDB:
+    """
+    Backend for the async serving mode, where gunicorn runs gevent workers
+    (`gunicorn -k gevent`). psycopg then waits for the server by yielding to
+    other greenlets, so a worker serves other requests while any of them
+    waits on the database instead of tying up a thread. On top of that the
+    independent statements of a page run concurrently, one greenlet and
+    pooled connection each.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._warned = False
+
+    def available(self):
+        """Whether the worker is cooperative; logs once when the mode is on without it"""
+        if cooperative():
+            return True
+        if not self._warned:
+            self._warned = True
+            logger.warning("ASYNC_DB_MODE needs gevent workers (gunicorn -k gevent, without --preload); "
+                           "running statements as pipelined batches")
+        return False
+
+    @staticmethod
+    def _fetch(connect, statement):
+        query, params = statement[0], statement[1]
+        row_factory = statement[2] if len(statement) > 2 else None
+        with connect() as conn:
+            cursor = conn.cursor(row_factory=row_factory) if row_factory else conn.cursor()
+            with cursor as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+
+    def fetch_concurrent(self, statements, connect):
+        """
+        fetch_pipelined() counterpart: runs (query, params[, row_factory])
+        statements concurrently, each on a connection from connect(), and
+        returns their fetchall() results in order
+        """
+        # Each greenlet gets a copy of the request's context, so the
+        # statements are timed into its DB stats
+        greenlets = [gevent.spawn(contextvars.copy_context().run, self._fetch, connect, statement)
+                     for statement in statements]
+        try:
+            done = gevent.joinall(greenlets, timeout=self.timeout, raise_error=True)
+            if len(done) < len(greenlets):
+                raise TimeoutError(f"Statements did not finish within {self.timeout}s")
+            return [greenlet.value for greenlet in greenlets]
+        finally:
+            gevent.killall(greenlets, block=False)
@@ -0,0 +1,190 @@
+# admin_orders_management/auth.py
+import logging
+import threading
+
+import click
+from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from queries import (
+    ADMIN_BY_ID,
+    ADMIN_BY_USERNAME,
+    ADMIN_RECORD_LOGIN,
+    ADMIN_CREATE,
+    ADMIN_REVOKE_SESSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+
+# User class for Flask-Login
+class AdminUser(UserMixin):
+    def __init__(self, id, username, email, role, full_name=None, active=True, session_version=1):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.full_name = full_name
+        self.active = active
+        self.session_version = session_version
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['id'], row['username'], row['email'], row['role'],
+                   full_name=row['full_name'], active=row['is_active'],
+                   session_version=row['session_version'])
+
+    @property
+    def is_active(self):
+        return self.active
+
+    def get_id(self):
+        # The session remembers which version of the account it was issued for
+        return f"{self.id}:{self.session_version}"
+
+
+class AdminDirectory:
+    """
+    Admin identities from the admin_users table. Principals are cached per
+    user ID, so authenticated requests resolve their user without touching
+    the database. Each session carries the account's session_version; bumping
+    it in the table (revoke_sessions, password reset) ends older sessions.
+
+    Passwords are hashed with werkzeug's scrypt (cost set by hash_method) and
+    only verified at login, at most max_concurrent_hashes at a time so a burst
+    of logins cannot starve the worker of CPU.
+    """
+
+    def __init__(self, connect, cache, hash_method='scrypt:32768:8:1', max_concurrent_hashes=2):
+        self.connect = connect
+        self.cache = cache
+        self.hash_method = hash_method
+        self._hash_slots = threading.BoundedSemaphore(max_concurrent_hashes)
+        self._dummy_hash = None
+
+    def hash_password(self, password):
+        with self._hash_slots:
+            return generate_password_hash(password, method=self.hash_method)
+
+    def _fetch(self, user_id):
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*ADMIN_BY_ID.bind(user_id=user_id))
+                row = cur.fetchone()
+        if row is None:
+            self.cache.invalidate(user_id)
+            return None
+        principal = AdminUser.from_row(row)
+        self.cache.set(user_id, principal)
+        return principal
+
+    def load(self, session_id):
+        """Principal for a Flask-Login session id ("<user id>:<session version>")"""
+        user_id, _, version = str(session_id).partition(':')
+        try:
+            user_id, version = int(user_id), int(version or 0)
+        except ValueError:
+            return None
+
+        principal = self.cache.get(user_id)
+        if principal is None or principal.session_version < version:
+            # Unknown here, or revoked/re-issued by another worker since cached
+            principal = self._fetch(user_id)
+
+        if principal is None or not principal.is_active or principal.session_version != version:
+            return None
+        return principal
+
+    def authenticate(self, username, password):
+        """
+        Principal for valid credentials, otherwise None. No connection is
+        held while the hash is checked; the login is recorded afterwards in
+        a second short transaction.
+        """
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*ADMIN_BY_USERNAME.bind(username=username))
+                row = cur.fetchone()
+            conn.commit()
+
+        with self._hash_slots:
+            if row is None:
+                # Same cost as a real check, so unknown names are not revealed by timing
+                if self._dummy_hash is None:
+                    self._dummy_hash = generate_password_hash('', method=self.hash_method)
+                check_password_hash(self._dummy_hash, password)
+                return None
+            valid = check_password_hash(row['password_hash'], password)
+
+        if not valid or not row['is_active']:
+            return None
+
+        # Upgrade hashes made with an older method or cost
+        new_hash = None
+        if not row['password_hash'].startswith(self.hash_method + '$'):
+            new_hash = self.hash_password(password)
+
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*ADMIN_RECORD_LOGIN.bind(user_id=row['id'], verified_hash=row['password_hash'],
+                                                     password_hash=new_hash))
+                row = cur.fetchone()
+            conn.commit()
+        if row is None:
+            # Password changed or account disabled while the hash was checked
+            return None
+
+        principal = AdminUser.from_row(row)
+        self.cache.set(principal.id, principal)
+        return principal
+
+    def create(self, username, email, password, role='admin', full_name=None):
+        """Create an admin, or reset an existing one (ending their sessions)"""
+        password_hash = self.hash_password(password)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*ADMIN_CREATE.bind(username=username, email=email,
+                                               password_hash=password_hash,
+                                               full_name=full_name, role=role))
+                principal = AdminUser.from_row(cur.fetchone())
+                conn.commit()
+        self.cache.set(principal.id, principal)
+        return principal
+
+    def revoke_sessions(self, username):
+        """End every session of an admin; returns False for unknown usernames"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*ADMIN_REVOKE_SESSIONS.bind(username=username))
+                row = cur.fetchone()
+                conn.commit()
+        if row is None:
+            return False
+        self.cache.set(row['id'], AdminUser.from_row(row))
+        return True
+
+
+def init_auth(app, directory):
+    """Register the admin account CLI commands"""
+
+    @app.cli.command('create-admin')
+    @click.argument('username')
+    @click.argument('email')
+    @click.option('--role', default='admin', type=click.Choice(['admin', 'manager', 'superadmin']))
+    @click.option('--full-name', default=None)
+    @click.password_option()
+    def create_admin_command(username, email, role, full_name, password):
+        """Create an admin account, or reset its password and role"""
+        principal = directory.create(username, email, password, role, full_name)
+        click.echo(f"Admin '{principal.username}' ({principal.role}) saved")
+
+    @app.cli.command('revoke-sessions')
+    @click.argument('username')
+    def revoke_sessions_command(username):
+        """Sign an admin out everywhere"""
+        if directory.revoke_sessions(username):
+            click.echo(f"Sessions of '{username}' revoked")
+        else:
+            click.echo(f"No admin named '{username}'", err=True)
+
+    app.extensions['admin_directory'] = directory
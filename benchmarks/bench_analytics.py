@@ -0,0 +1,163 @@
+# admin_orders_management/benchmarks/bench_analytics.py
+"""
+Statistics page and chart aggregates computed by Postgres (the GROUP BY
+queries) versus the in-process numpy snapshot (analytics.AnalyticsSnapshot),
+at 1M and 10M orders by default.
+
+With DATABASE_URL set, a scratch schema gets the synthetic orders, the
+snapshot is loaded from it exactly as a worker would, and both paths are
+timed on the same data. Without it only the snapshot is timed, on random
+arrays of the same shape:
+
+    DATABASE_URL=postgresql://localhost/postgres \\
+        python benchmarks/bench_analytics.py [orders ...]
+
+Needs numpy. The scratch schema is dropped afterwards.
+"""
+import os
+import sys
+import time
+import statistics
+from datetime import datetime, timedelta
+
+import psycopg
+from psycopg.rows import dict_row
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+from analytics import AnalyticsSnapshot, Columns, STATUSES, epoch_day  # noqa: E402
+from queries import (  # noqa: E402
+    STATISTICS_SUMMARY,
+    CHART_DAILY_ORDERS,
+    CHART_STATUS_DISTRIBUTION,
+    CHART_HOURLY_ORDERS
+)
+from utils import IST  # noqa: E402
+
+SCHEMA = 'bench_analytics'
+HISTORY_DAYS = 730
+REPEATS = 5
+
+SCHEMA_SQL = """
+    CREATE TABLE orders (
+        order_id SERIAL PRIMARY KEY,
+        user_id INTEGER,
+        total_amount DECIMAL(10, 2),
+        status VARCHAR(20),
+        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+DATA_SQL = """
+    INSERT INTO orders (user_id, total_amount, status, order_date)
+    SELECT
+        (random() * 50000)::int,
+        (50 + random() * 950)::numeric(10, 2),
+        (ARRAY['pending', 'processing', 'completed', 'cancelled', 'delivered'])[1 + (random() * 4)::int],
+        now() AT TIME ZONE 'UTC' - random() * %(days)s * INTERVAL '1 day'
+    FROM generate_series(1, %(orders)s)
+"""
+
+
+def connect():
+    return psycopg.connect(os.environ['DATABASE_URL'], row_factory=dict_row,
+                           options=f'-c search_path={SCHEMA}')
+
+
+def median_ms(func):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def synthetic_snapshot(orders):
+    np = analytics.np
+    rng = np.random.default_rng(42)
+    today = epoch_day(datetime.now(IST).date())
+    columns = Columns(orders)
+    columns.append({
+        'order_id': np.arange(1, orders + 1, dtype=np.int64),
+        'day': np.sort(rng.integers(today - HISTORY_DAYS, today + 1, orders)).astype(np.int32),
+        'hour': rng.integers(0, 24, orders).astype(np.int8),
+        'amount': rng.integers(5000, 100000, orders),
+        'status': rng.integers(0, len(STATUSES), orders).astype(np.int8),
+        'user_id': rng.integers(0, 50000, orders)
+    })
+    snapshot = AnalyticsSnapshot()
+    snapshot.columns = columns
+    return snapshot
+
+
+def workloads(snapshot, today):
+    """name -> (SQL statement, snapshot call) for the same figure"""
+    return {
+        'summary, 7 days': (STATISTICS_SUMMARY['week'].bind(),
+                            lambda: snapshot.statistics('week', today=today)),
+        'summary, all time': (STATISTICS_SUMMARY['all'].bind(),
+                              lambda: snapshot.statistics('all', today=today)),
+        'daily, 30 days': (CHART_DAILY_ORDERS.bind(),
+                           lambda: snapshot.daily(today - timedelta(days=30))),
+        'status distribution': (CHART_STATUS_DISTRIBUTION.bind(),
+                                lambda: snapshot.status_distribution()),
+        'hourly, 30 days': (CHART_HOURLY_ORDERS.bind(),
+                            lambda: snapshot.hourly(today - timedelta(days=30)))
+    }
+
+
+def run(orders, with_database):
+    today = datetime.now(IST).date()
+    if with_database:
+        with connect() as conn:
+            conn.execute("DROP TABLE IF EXISTS orders")
+            conn.execute(SCHEMA_SQL)
+            conn.execute(DATA_SQL, {'orders': orders, 'days': HISTORY_DAYS})
+            conn.commit()
+            conn.execute("ANALYZE orders")
+            conn.commit()
+        snapshot = AnalyticsSnapshot()
+        start = time.perf_counter()
+        snapshot.ensure_fresh(connect)
+        load = time.perf_counter() - start
+        print(f"{orders} orders: snapshot loaded in {load:.1f}s, "
+              f"{snapshot.status()['bytes'] / 1e6:.0f} MB")
+    else:
+        snapshot = synthetic_snapshot(orders)
+        print(f"{orders} orders (synthetic): {snapshot.status()['bytes'] / 1e6:.0f} MB")
+
+    print(f"  {'figure':<22} {'sql ms':>10} {'numpy ms':>10}")
+    for name, (statement, compute) in workloads(snapshot, today).items():
+        sql_ms = None
+        if with_database:
+            with connect() as conn:
+                sql_ms = median_ms(lambda: conn.execute(*statement).fetchall())
+        numpy_ms = median_ms(compute)
+        sql_text = f"{sql_ms:>10.2f}" if sql_ms is not None else f"{'-':>10}"
+        print(f"  {name:<22} {sql_text} {numpy_ms:>10.2f}")
+    print()
+
+
+def main():
+    if analytics.np is None:
+        sys.exit("numpy is not installed")
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    with_database = bool(os.environ.get('DATABASE_URL'))
+
+    if with_database:
+        with psycopg.connect(os.environ['DATABASE_URL'], autocommit=True) as admin:
+            admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        for orders in sizes:
+            run(orders, with_database)
+    finally:
+        if with_database:
+            with psycopg.connect(os.environ['DATABASE_URL'], autocommit=True) as admin:
+                admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == '__main__':
+    main()
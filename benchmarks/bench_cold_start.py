@@ -0,0 +1,114 @@
+# admin_orders_management/benchmarks/bench_cold_start.py
+"""
+Cold-start latency of a freshly started gunicorn worker versus steady state,
+with and without the warm-up stage.
+
+For each mode a single-worker gunicorn is started. The first requests are
+timed as soon as the worker is reachable (cold), or once /ready answers 200
+(warm), and then again after the worker has served a few hundred requests
+(steady). Needs DATABASE_URL pointing at a database with the app schema:
+
+    DATABASE_URL=postgresql://localhost/admin_orders \\
+        python benchmarks/bench_cold_start.py [first_requests] [steady_requests]
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import subprocess
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['/dashboard', '/orders', '/statistics', '/customers', '/dashboard?filter=week']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def start_server(port, warmup):
+    env = dict(os.environ,
+               WARMUP_ENABLED='true' if warmup else 'false',
+               JINJA_CACHE_DIR=tempfile.mkdtemp(prefix='jinja-bench-'),
+               LOG_FILE=os.devnull)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ), env['JINJA_CACHE_DIR']
+
+
+def wait_until(check, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if check():
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("server did not come up")
+
+
+def timed_requests(session, base, count):
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        session.get(base + PAGES[i % len(PAGES)]).raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(mode, first, steady):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    process, cache_dir = start_server(port, warmup=(mode == 'warm'))
+    try:
+        started = time.perf_counter()
+        if mode == 'warm':
+            wait_until(lambda: requests.get(base + '/ready', timeout=1).status_code == 200)
+        else:
+            wait_until(lambda: requests.get(base + '/health', timeout=1).status_code < 600)
+        ready_after = time.perf_counter() - started
+
+        session = requests.Session()
+        session.post(base + '/login', data={'username': 'admin', 'password': 'admin123'})
+
+        cold = timed_requests(session, base, first)
+        timed_requests(session, base, 200)  # settle
+        warm = timed_requests(session, base, steady)
+        return ready_after, cold, warm
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    if not os.environ.get('DATABASE_URL'):
+        sys.exit("Set DATABASE_URL to a database with the app schema")
+
+    first = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    steady = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    for mode in ('cold', 'warm'):
+        ready_after, cold, warm = run(mode, first, steady)
+        print(f"{mode}: serving after {ready_after * 1000:.0f} ms")
+        print(f"  first {first:>4} requests: p50 {percentile(cold, 50) * 1000:7.1f} ms"
+              f"  p99 {percentile(cold, 99) * 1000:7.1f} ms  max {max(cold) * 1000:7.1f} ms")
+        print(f"  steady {steady:>3} requests: p50 {percentile(warm, 50) * 1000:7.1f} ms"
+              f"  p99 {percentile(warm, 99) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
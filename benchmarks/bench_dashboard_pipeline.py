@@ -0,0 +1,130 @@
+# admin_orders_management/benchmarks/bench_dashboard_pipeline.py
+"""
+Dashboard data loading over a slow database link: the dashboard statements
+run one by one versus as a single pipelined batch (utils.fetch_pipelined).
+
+A local TCP proxy in front of Postgres delays every packet in both
+directions to simulate network latency. Needs a reachable database with
+the app schema:
+
+    BENCH_DATABASE_URL=postgresql://localhost/admin_orders \\
+        python benchmarks/bench_dashboard_pipeline.py [one_way_latency_ms] [runs]
+"""
+import os
+import sys
+import time
+import queue
+import socket
+import threading
+import statistics
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_FILE', os.devnull)
+os.environ.setdefault('WARMUP_ENABLED', 'false')
+
+import psycopg  # noqa: E402
+from psycopg.rows import dict_row  # noqa: E402
+
+from app import dashboard_statements  # noqa: E402
+from utils import IST, fetch_pipelined  # noqa: E402
+
+
+class LatencyProxy:
+    """TCP proxy that forwards each chunk after a fixed one-way delay"""
+
+    def __init__(self, target_host, target_port, delay):
+        self.target = (target_host, target_port)
+        self.delay = delay
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.server.accept()
+            upstream = socket.create_connection(self.target)
+            for src, dst in ((client, upstream), (upstream, client)):
+                threading.Thread(target=self._pump, args=(src, dst), daemon=True).start()
+
+    def _pump(self, src, dst):
+        # Chunks queue with their due time and one sender releases them in
+        # order, so the link behaves like latency rather than low bandwidth
+        pending = queue.Queue()
+        threading.Thread(target=self._send, args=(dst, pending), daemon=True).start()
+        while True:
+            try:
+                data = src.recv(65536)
+            except OSError:
+                data = b''
+            pending.put((time.perf_counter() + self.delay, data))
+            if not data:
+                return
+
+    @staticmethod
+    def _send(dst, pending):
+        while True:
+            due, data = pending.get()
+            time.sleep(max(0.0, due - time.perf_counter()))
+            try:
+                if not data:
+                    dst.shutdown(socket.SHUT_WR)
+                    return
+                dst.sendall(data)
+            except OSError:
+                return
+
+
+def proxied_url(url, port):
+    parts = urlsplit(url)
+    netloc = parts.netloc.rsplit('@', 1)
+    host = f"127.0.0.1:{port}"
+    netloc = f"{netloc[0]}@{host}" if len(netloc) == 2 else host
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def run_sequential(conn, statements):
+    results = []
+    for statement in statements:
+        row_factory = statement[2] if len(statement) > 2 else None
+        with (conn.cursor(row_factory=row_factory) if row_factory else conn.cursor()) as cur:
+            cur.execute(statement[0], statement[1])
+            results.append(cur.fetchall())
+    return results
+
+
+def measure(url, func, statements, runs):
+    timings = []
+    with psycopg.connect(url, row_factory=dict_row, autocommit=True) as conn:
+        func(conn, statements)  # warm-up
+        for _ in range(runs):
+            start = time.perf_counter()
+            func(conn, statements)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    url = os.environ.get('BENCH_DATABASE_URL') or os.environ.get('DATABASE_URL')
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a database with the app schema")
+
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    parts = urlsplit(url)
+    proxy = LatencyProxy(parts.hostname or 'localhost', parts.port or 5432, latency_ms / 1000)
+    slow_url = proxied_url(url, proxy.port)
+
+    statements = dashboard_statements(datetime.now(IST).date(), 'today')
+    print(f"{len(statements)} statements, {latency_ms:g} ms one-way latency, {runs} runs")
+
+    for label, func in (('sequential', run_sequential), ('pipelined', fetch_pipelined)):
+        timings = measure(slow_url, func, statements, runs)
+        print(f"{label:>10}: median {statistics.median(timings) * 1000:8.1f} ms"
+              f"   p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# admin_orders_management/benchmarks/bench_formatting.py
+"""
+Compare the per-row formatting loops previously used by the listing routes
+with the column-wise RowFormatter stage on a 10k-row page.
+
+    python benchmarks/bench_formatting.py [rows]
+"""
+import os
+import sys
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting import ORDER_LIST, CUSTOMER_LIST  # noqa: E402
+
+IST = pytz.timezone('Asia/Kolkata')
+STATUSES = ['pending', 'processing', 'completed', 'cancelled', 'delivered']
+
+
+def legacy_format_ist_datetime(datetime_obj, format_str="%d %b %Y, %I:%M %p"):
+    if not datetime_obj:
+        return ""
+    if datetime_obj.tzinfo is not None:
+        ist_time = datetime_obj.astimezone(IST)
+    else:
+        ist_time = pytz.utc.localize(datetime_obj).astimezone(IST)
+    return ist_time.strftime(format_str)
+
+
+def legacy_orders(rows):
+    for order in rows:
+        order['order_date_formatted'] = legacy_format_ist_datetime(order['order_date'])
+        order['total_amount_formatted'] = f"₹{order['total_amount']:,.2f}"
+        status_class = {
+            'pending': 'warning',
+            'processing': 'info',
+            'completed': 'success',
+            'cancelled': 'danger',
+            'delivered': 'success'
+        }.get(order['status'], 'secondary')
+        order['status_class'] = status_class
+
+
+def legacy_customers(rows):
+    for customer in rows:
+        if customer.get('created_at'):
+            customer['created_at_formatted'] = legacy_format_ist_datetime(customer['created_at'])
+        if customer.get('last_login'):
+            customer['last_login_formatted'] = legacy_format_ist_datetime(customer['last_login'])
+        customer['total_spent_formatted'] = f"₹{customer['total_spent']:,.2f}"
+
+
+def make_rows(n):
+    start = datetime(2024, 1, 1)
+    orders, customers = [], []
+    for i in range(n):
+        ts = start + timedelta(seconds=random.randint(0, 86400 * 365))
+        orders.append({
+            'order_id': i,
+            'order_date': ts,
+            'total_amount': Decimal(random.randint(100, 500000)) / 100,
+            'status': random.choice(STATUSES),
+        })
+        customers.append({
+            'id': i,
+            'created_at': ts,
+            'last_login': ts + timedelta(days=3) if i % 3 else None,
+            'total_spent': Decimal(random.randint(0, 5000000)) / 100,
+        })
+    return orders, customers
+
+
+def bench(label, func, rows, repeat=5):
+    timings = timeit.repeat(lambda: func(rows), number=1, repeat=repeat)
+    best = min(timings)
+    print(f"{label:<28} {best * 1000:8.1f} ms  ({len(rows) / best:,.0f} rows/s)")
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    random.seed(42)
+    orders, customers = make_rows(n)
+
+    # Both implementations must produce identical output
+    a, b = [dict(r) for r in orders], [dict(r) for r in orders]
+    legacy_orders(a)
+    ORDER_LIST.apply(b)
+    assert a == b, "order formatting differs"
+
+    print(f"{n} rows")
+    old = bench('orders: per-row loop', lambda r: legacy_orders([dict(x) for x in r]), orders)
+    new = bench('orders: RowFormatter', lambda r: ORDER_LIST.apply([dict(x) for x in r]), orders)
+    print(f"{'':<28} {old / new:8.1f}x faster")
+
+    old = bench('customers: per-row loop', lambda r: legacy_customers([dict(x) for x in r]), customers)
+    new = bench('customers: RowFormatter', lambda r: CUSTOMER_LIST.apply([dict(x) for x in r]), customers)
+    print(f"{'':<28} {old / new:8.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# admin_orders_management/benchmarks/bench_json.py
+"""
+Serialization throughput of Flask's default JSON provider versus
+FastJSONProvider on payloads shaped like /api/orders/<id> and
+/api/customers/<id>, scaled up to large row counts.
+
+    python benchmarks/bench_json.py [rows]
+"""
+import os
+import sys
+import random
+import timeit
+from datetime import datetime, timedelta, date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from json_provider import FastJSONProvider, orjson  # noqa: E402
+
+
+def money():
+    return Decimal(random.randint(100, 500000)) / 100
+
+
+def order_payload(n):
+    start = datetime(2024, 1, 1)
+    items = [{
+        'order_item_id': i,
+        'order_id': 1,
+        'item_type': random.choice(['menu', 'service']),
+        'item_id': random.randint(1, 500),
+        'item_name': f'Item {i}',
+        'item_photo': 'https://res.cloudinary.com/demo/image/upload/sample.jpg',
+        'quantity': random.randint(1, 5),
+        'price': money(),
+        'total': money(),
+        'price_formatted': '₹1,234.00',
+        'total_formatted': '₹2,468.00',
+    } for i in range(n)]
+    order = {
+        'order_id': 1, 'user_id': 7, 'user_name': 'Test User',
+        'total_amount': money(), 'status': 'pending',
+        'order_date': start, 'delivery_date': start + timedelta(hours=2),
+        'payment_date': start, 'payment_mode': 'COD',
+    }
+    return {'success': True, 'order': order, 'order_items': items, 'customer': None}
+
+
+def customer_payload(n):
+    start = datetime(2023, 1, 1)
+    return {
+        'success': True,
+        'customer': {'id': 7, 'full_name': 'Test User', 'created_at': start, 'last_login': start},
+        'addresses': [],
+        'orders_summary': [{'status': 'completed', 'count': n, 'total_amount': money()}],
+        'recent_orders': [{
+            'order_id': i,
+            'total_amount': money(),
+            'status': 'completed',
+            'order_date': start + timedelta(minutes=i),
+            'delivery_day': date(2024, 1, 1) + timedelta(days=i % 365),
+        } for i in range(n)]
+    }
+
+
+def bench(label, provider, payload, repeat=5):
+    best = min(timeit.repeat(lambda: provider.dumps(payload), number=1, repeat=repeat))
+    size = len(provider.dumps(payload).encode('utf-8'))
+    print(f"{label:<34} {best * 1000:8.1f} ms  {size / best / 1e6:8.1f} MB/s")
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    random.seed(42)
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    print(f"{n} rows, orjson {'available' if orjson else 'not installed (stdlib fallback)'}")
+    for name, payload in (('order', order_payload(n)), ('customer', customer_payload(n))):
+        old = bench(f'{name}: flask default', default, payload)
+        new = bench(f'{name}: FastJSONProvider', fast, payload)
+        print(f"{'':<34} {old / new:8.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# admin_orders_management/benchmarks/bench_models.py
+"""
+Memory and CPU of a large orders listing page built from dict_row rows
+formatted column-wise up front, versus slotted Order models produced by the
+model_row() row factory and rendered as the /orders route does, with the
+formatted values computed lazily by the template.
+
+    python benchmarks/bench_models.py [rows]
+"""
+import os
+import sys
+import random
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Environment  # noqa: E402
+
+from formatting import RowFormatter  # noqa: E402
+from models import Order  # noqa: E402
+
+COLUMNS = ['order_id', 'user_id', 'user_name', 'user_phone', 'user_email',
+           'total_amount', 'status', 'order_date', 'delivery_location',
+           'item_count', 'payment_status', 'payment_mode']
+STATUSES = ['pending', 'processing', 'completed', 'cancelled', 'delivered']
+
+# What dict rows need before rendering; Order models compute these on access
+DICT_FORMATTER = RowFormatter(
+    datetimes={'order_date': 'order_date_formatted'},
+    currency={'total_amount': 'total_amount_formatted'},
+    badges={'status': 'status_class'}
+)
+
+# The per-row part of templates/orders.html
+ROW_TEMPLATE = Environment().from_string("""
+{%- for order in orders -%}
+<tr data-order-id="{{ order.order_id }}"><td>#{{ order.order_id }} {{ order.item_count }} items</td>
+<td>{{ order.user_name }} {{ order.user_phone }} {{ order.user_email|truncate(20) }}</td>
+<td>{{ order.total_amount_formatted }} {{ order.payment_mode|default('COD') }}</td>
+<td class="{{ order.status }}">{{ order.status|title }} {{ order.payment_status }}</td>
+<td>{{ order.order_date_formatted.split(',')[0] }}</td></tr>
+{%- endfor -%}
+""")
+
+
+def make_tuples(n):
+    start = datetime(2024, 1, 1)
+    return [(
+        i, random.randint(1, 5000), f'Customer {i}', f'98{i:08d}', f'user{i}@example.com',
+        Decimal(random.randint(100, 500000)) / 100, random.choice(STATUSES),
+        start + timedelta(seconds=random.randint(0, 86400 * 365)),
+        f'Street {i} | 12.9{i % 1000:03d} | 77.5{i % 1000:03d} | https://maps.google.com',
+        random.randint(1, 6), 'completed', 'COD'
+    ) for i in range(n)]
+
+
+def build_dicts(tuples):
+    # Equivalent of psycopg.rows.dict_row plus the column-wise formatting pass
+    return DICT_FORMATTER.apply([dict(zip(COLUMNS, values)) for values in tuples])
+
+
+def build_models(tuples):
+    make = Order.row_maker(COLUMNS)
+    return [make(values) for values in tuples]
+
+
+def measure_memory(build, tuples):
+    # Rows held after rendering, including any formatted values cached on them
+    tracemalloc.start()
+    rows = build(tuples)
+    ROW_TEMPLATE.render(orders=rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, rows
+
+
+def page(build, tuples):
+    return ROW_TEMPLATE.render(orders=build(tuples))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    random.seed(42)
+    tuples = make_tuples(n)
+
+    assert page(build_dicts, tuples) == page(build_models, tuples), "rendered output differs"
+
+    print(f"{n} rows")
+    results = {}
+    for label, build in (('dict_row', build_dicts), ('Order model', build_models)):
+        memory, _ = measure_memory(build, tuples)
+        build_time = min(timeit.repeat(lambda: build(tuples), number=1, repeat=5))
+        page_time = min(timeit.repeat(lambda: page(build, tuples), number=1, repeat=5))
+        results[label] = (memory, build_time, page_time)
+        print(f"{label:<12} rows after render: {memory / 1024 / 1024:6.2f} MiB  "
+              f"build+format: {build_time * 1000:6.1f} ms  build+format+render: {page_time * 1000:6.1f} ms")
+
+    old, new = results['dict_row'], results['Order model']
+    print(f"memory saved: {(1 - new[0] / old[0]) * 100:.0f}%  "
+          f"page time: {old[2] / new[2]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# admin_orders_management/benchmarks/bench_partitions.py
+"""
+Rows and buffers scanned by the statistics and chart queries for 7- and
+30-day windows, on a plain orders table versus monthly partitions.
+
+Two scratch schemas get the same synthetic history. bench_part is then
+converted with PartitionManager.convert(), the same path used on a live
+database. Each query runs under EXPLAIN (ANALYZE, BUFFERS):
+
+    DATABASE_URL=postgresql://localhost/postgres \\
+        python benchmarks/bench_partitions.py [days_of_history] [orders_per_day]
+
+The scratch schemas are dropped afterwards.
+"""
+import os
+import sys
+import statistics
+from datetime import date, timedelta
+
+import psycopg
+from psycopg.rows import dict_row
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from partitioning import PartitionManager  # noqa: E402
+from queries import (  # noqa: E402
+    STATISTICS_SUMMARY,
+    STATISTICS_DAILY_LAST_7_DAYS,
+    STATISTICS_DAILY_RANGE,
+    CHART_DAILY_ORDERS
+)
+
+SCHEMAS = ('bench_plain', 'bench_part')
+
+SCHEMA_SQL = """
+    CREATE TABLE orders (
+        order_id SERIAL PRIMARY KEY,
+        user_id INTEGER,
+        user_name VARCHAR(100),
+        total_amount DECIMAL(10, 2),
+        status VARCHAR(20),
+        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE order_items (
+        order_item_id SERIAL PRIMARY KEY,
+        order_id INTEGER REFERENCES orders(order_id),
+        item_type VARCHAR(20),
+        item_id INTEGER,
+        item_name VARCHAR(100),
+        quantity INTEGER,
+        total DECIMAL(10, 2)
+    );
+"""
+
+ORDERS_SQL = """
+    INSERT INTO orders (user_id, user_name, total_amount, status, order_date)
+    SELECT
+        (random() * 5000)::int,
+        'Customer',
+        (50 + random() * 950)::numeric(10, 2),
+        (ARRAY['pending', 'processing', 'completed', 'cancelled', 'delivered'])[1 + (random() * 4)::int],
+        now() AT TIME ZONE 'UTC' - (n::float / %(per_day)s) * INTERVAL '1 day'
+    FROM generate_series(1, %(days)s * %(per_day)s) AS n
+"""
+
+ITEMS_SQL = """
+    INSERT INTO order_items (order_id, item_type, item_id, item_name, quantity, total)
+    SELECT order_id, 'menu', (random() * 200)::int, 'Item', 1 + (random() * 3)::int, total_amount
+    FROM orders
+"""
+
+
+def connect(schema):
+    return psycopg.connect(os.environ['DATABASE_URL'], row_factory=dict_row,
+                           options=f'-c search_path={schema}')
+
+
+def statements():
+    return {
+        'summary, 7 days': STATISTICS_SUMMARY['week'].bind(),
+        'summary, 30 days': STATISTICS_SUMMARY['month'].bind(),
+        'daily chart, 7 days': STATISTICS_DAILY_LAST_7_DAYS.bind(),
+        'daily chart, 30 days': CHART_DAILY_ORDERS.bind(),
+        'custom range, 7 days': STATISTICS_DAILY_RANGE.bind(
+            start_date=_days_ago(6), end_date=_days_ago(0))
+    }
+
+
+def _days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def scan_nodes(plan):
+    if 'Relation Name' in plan:
+        yield plan
+    for child in plan.get('Plans', ()):
+        yield from scan_nodes(child)
+
+
+def measure(conn, query, params, repeats):
+    timings = []
+    for _ in range(repeats):
+        row = conn.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params).fetchone()
+        result = row['QUERY PLAN'][0]
+        timings.append(result['Execution Time'])
+    plan = result['Plan']
+    scans = list(scan_nodes(plan))
+    return {
+        'relations': len({node['Relation Name'] for node in scans}),
+        'rows': sum(node['Actual Rows'] + node.get('Rows Removed by Filter', 0) for node in scans),
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'ms': statistics.median(timings)
+    }
+
+
+def main():
+    if not os.environ.get('DATABASE_URL'):
+        sys.exit("Set DATABASE_URL to a scratch database")
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    repeats = 5
+
+    with psycopg.connect(os.environ['DATABASE_URL'], autocommit=True) as admin:
+        for schema in SCHEMAS:
+            admin.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            admin.execute(f"CREATE SCHEMA {schema}")
+
+    try:
+        for schema in SCHEMAS:
+            with connect(schema) as conn:
+                conn.execute(SCHEMA_SQL)
+                conn.execute(ORDERS_SQL, {'days': days, 'per_day': per_day})
+                conn.execute(ITEMS_SQL)
+                conn.commit()
+                conn.execute("ANALYZE")
+            print(f"{schema}: {days} days x {per_day} orders/day loaded")
+
+        manager = PartitionManager(lambda: connect('bench_part'), months_ahead=1, batch_size=50000)
+        manager.convert()
+        with connect('bench_part') as conn:
+            partitions = len(manager.partitions(conn.cursor(), 'orders'))
+        print(f"bench_part: converted to {partitions} partitions\n")
+
+        print(f"{'query':<22} {'schema':<12} {'relations':>9} {'rows scanned':>13} "
+              f"{'buffers':>9} {'median ms':>10}")
+        for name, (query, params) in statements().items():
+            for schema in SCHEMAS:
+                with connect(schema) as conn:
+                    result = measure(conn, query, params, repeats)
+                print(f"{name:<22} {schema:<12} {result['relations']:>9} {result['rows']:>13} "
+                      f"{result['buffers']:>9} {result['ms']:>10.2f}")
+    finally:
+        with psycopg.connect(os.environ['DATABASE_URL'], autocommit=True) as admin:
+            for schema in SCHEMAS:
+                admin.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+
+if __name__ == '__main__':
+    main()
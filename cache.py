@@ -0,0 +1,114 @@
+# admin_orders_management/cache.py
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache whose entries expire after ttl
+    seconds. get_or_set() lets a single thread compute a missing value per
+    key; concurrent callers for the same key wait for that result instead of
+    all hitting the database.
+    """
+
+    def __init__(self, name, ttl, max_entries=256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+        return default
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_entries:
+                self._evict()
+            self._data[key] = (expires, value)
+
+    def get_or_set(self, key, loader, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            event = self._loading.get(key)
+            owner = event is None
+            if owner:
+                event = self._loading[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            # The loading thread failed; compute it here instead
+            return loader()
+
+        try:
+            value = loader()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self._data.items() if expires <= now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.max_entries:
+            # Still full: drop the entry closest to expiry
+            del self._data[min(self._data, key=lambda k: self._data[k][0])]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+_MISSING = object()
+
+# Statistics page data per (target, period, start, end)
+statistics_cache = TTLCache('statistics', ttl=60)
+
+# Item categories and other catalog data that rarely changes
+catalog_cache = TTLCache('catalog', ttl=300)
+
+# Exact listing totals per (target, table, filters)
+count_cache = TTLCache('counts', ttl=30, max_entries=1024)
+
+# Admin principals per user ID, so authenticated requests skip the database
+principal_cache = TTLCache('principals', ttl=300)
+
+# Header badge counters per DB target, shared by every page render
+header_cache = TTLCache('header', ttl=10)
+
+# Rendered layout fragments ({% cache %} blocks) per name and key values
+fragment_cache = TTLCache('fragments', ttl=60, max_entries=512)
@@ -0,0 +1,300 @@
+# admin_orders_management/changelog.py
+import os
+import time
+import logging
+import threading
+
+import click
+from psycopg import sql
+
+from queries import CHANGES_SNAPSHOT, CHANGES_BETWEEN, CHANGES_PRUNE, CHANGES_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Captured tables and the column recorded as row_id
+TABLES = {
+    'orders': 'order_id',
+    'order_items': 'order_item_id',
+    'payments': 'payment_id',
+    'users': 'id',
+    'addresses': 'address_id',
+    'services': 'id',
+    'menu': 'id',
+    'admin_users': 'id'
+}
+
+# pg_advisory lock so only one worker at a time prunes the log
+ADVISORY_LOCK_ID = 7045001
+
+# How often a missing change_log table is looked for again
+INSTALL_CHECK_INTERVAL = 300
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq BIGSERIAL PRIMARY KEY,
+        xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+        table_name VARCHAR(32) NOT NULL,
+        op CHAR(1) NOT NULL,
+        row_id BIGINT,
+        order_id BIGINT,
+        user_id BIGINT,
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS change_log_xid_idx ON change_log (xid);
+    CREATE INDEX IF NOT EXISTS change_log_changed_at_idx ON change_log (changed_at);
+
+    -- Arguments: logical table name (partitions report their own), key column
+    CREATE OR REPLACE FUNCTION change_log_capture() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        data jsonb := to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END);
+    BEGIN
+        INSERT INTO change_log (table_name, op, row_id, order_id, user_id)
+        VALUES (TG_ARGV[0], left(TG_OP, 1), (data ->> TG_ARGV[1])::bigint,
+                (data ->> 'order_id')::bigint, (data ->> 'user_id')::bigint);
+        RETURN NULL;
+    END
+    $$;
+"""
+
+
+class ChangeFeed:
+    """
+    Change capture for the tables the admin caches read, which are also
+    written by the customer app. Row triggers append one compact record per
+    insert, real update or delete to change_log, in the writer's
+    transaction; seq orders records, xid tells which transaction wrote them.
+
+    A reader's cursor is a pg_snapshot: read() returns the records committed
+    since that snapshot and the snapshot to continue from, so records of
+    transactions that commit out of seq order are never skipped.
+
+    start() tails the log on a daemon thread every poll_interval seconds
+    and hands new records to subscribers. When more than max_batch records
+    are waiting, or the log cannot be read, subscribers get None instead,
+    meaning anything may have changed. prune() drops records older than
+    retention_hours.
+    """
+
+    def __init__(self, connect, connect_primary=None, poll_interval=1.0, max_batch=5000,
+                 retention_hours=168, prune_interval=3600):
+        self.connect = connect
+        self.connect_primary = connect_primary or connect
+        self.poll_interval = poll_interval
+        self.max_batch = max_batch
+        self.retention_hours = retention_hours
+        self.prune_interval = prune_interval
+        self.cursor = None
+        self.last_seq = 0
+        self.applied = 0
+        self.healthy = False
+        self.last_error = None
+        self._subscribers = []
+        self._last_prune = 0.0
+        self._installed = False
+        self._checked_at = 0.0
+        self._thread = None
+        self._pid = None
+
+    # Schema
+
+    def install(self, cur):
+        """Create change_log and its triggers on every captured table that exists"""
+        cur.execute(SCHEMA_SQL)
+        installed = []
+        for table, key in TABLES.items():
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL as present", (table,))
+            if not cur.fetchone()['present']:
+                continue
+            args = sql.SQL(', ').join((sql.Literal(table), sql.Literal(key)))
+            # Updates that leave the row as it was are not worth a record
+            for name, event in ((f"{table}_change_log", "INSERT OR DELETE"),
+                                (f"{table}_change_log_update", "UPDATE")):
+                condition = "WHEN (OLD.* IS DISTINCT FROM NEW.*)" if event == "UPDATE" else ""
+                cur.execute(sql.SQL("DROP TRIGGER IF EXISTS {} ON {}").format(
+                    sql.Identifier(name), sql.Identifier(table)))
+                cur.execute(sql.SQL("""
+                    CREATE TRIGGER {name} AFTER {event} ON {table}
+                    FOR EACH ROW {condition} EXECUTE FUNCTION change_log_capture({args})
+                """).format(name=sql.Identifier(name), event=sql.SQL(event), table=sql.Identifier(table),
+                            condition=sql.SQL(condition), args=args))
+            installed.append(table)
+        return installed
+
+    def install_trigger(self, cur, tables):
+        """partitions swap callback: capture the new tables too, when installed"""
+        cur.execute("SELECT to_regclass('change_log') IS NOT NULL as present")
+        if cur.fetchone()['present']:
+            self.install(cur)
+
+    # Reading
+
+    def is_installed(self, cur):
+        """Whether change_log exists; rechecked every INSTALL_CHECK_INTERVAL while it does not"""
+        if not self._installed and time.monotonic() - self._checked_at >= INSTALL_CHECK_INTERVAL:
+            self._checked_at = time.monotonic()
+            cur.execute("SELECT to_regclass('change_log') IS NOT NULL as present")
+            self._installed = cur.fetchone()['present']
+        return self._installed
+
+    def snapshot(self, cur):
+        cur.execute(*CHANGES_SNAPSHOT.bind())
+        return cur.fetchone()['snapshot']
+
+    def read(self, cur, since, limit=None):
+        """
+        (records, cursor): records committed after the `since` snapshot, and
+        the cursor to pass next time. More than `limit` waiting records
+        return (None, current snapshot).
+        """
+        limit = limit or self.max_batch
+        until = self.snapshot(cur)
+        cur.execute(*CHANGES_BETWEEN.bind(since=since, until=until, limit=limit + 1))
+        records = cur.fetchall()
+        if len(records) > limit:
+            return None, until
+        return records, until
+
+    def subscribe(self, callback, tables=None):
+        """
+        Call callback(records) with new records (of these tables only, if
+        given), or callback(None) when changes may have been missed. Usable
+        as a decorator.
+        """
+        self._subscribers.append((frozenset(tables) if tables else None, callback))
+        return callback
+
+    def _dispatch(self, records):
+        for tables, callback in self._subscribers:
+            selected = records
+            if records is not None and tables is not None:
+                selected = [record for record in records if record['table_name'] in tables]
+            if selected is not None and not selected:
+                continue
+            try:
+                callback(selected)
+            except Exception as e:
+                logger.error(f"Change feed subscriber {callback.__name__} failed: {e}")
+
+    def poll(self):
+        """Read and dispatch whatever was committed since the last poll"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                if self.cursor is None:
+                    # Caches start empty, so there is no history to replay
+                    self.cursor = self.snapshot(cur)
+                    conn.commit()
+                    return 0
+                records, self.cursor = self.read(cur, self.cursor)
+            conn.commit()
+        self._dispatch(records)
+        if records is None:
+            logger.warning(f"Change feed fell more than {self.max_batch} records behind; caches flushed")
+            return 0
+        if records:
+            self.last_seq = records[-1]['seq']
+            self.applied += len(records)
+        return len(records)
+
+    def prune(self):
+        """Delete records older than retention_hours; returns how many"""
+        with self.connect_primary() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    return 0
+                cur.execute(*CHANGES_PRUNE.bind(retention_hours=self.retention_hours))
+                deleted = cur.rowcount
+            conn.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} change log records")
+        return deleted
+
+    def status(self, cur):
+        cur.execute(*CHANGES_STATUS.bind())
+        row = dict(cur.fetchone())
+        row.update(cursor=self.cursor, healthy=self.healthy, applied=self.applied, last_error=self.last_error)
+        return row
+
+    # Background tailing
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        # A forked worker has its own caches; its feed starts from now
+        self.cursor = None
+        self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+                self.healthy = True
+                self.last_error = None
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception as e:
+                if self.healthy or self.last_error is None:
+                    logger.error(f"Change feed failed: {e}")
+                self.healthy = False
+                self.last_error = str(e)
+                # Nothing tells us what changed meanwhile
+                self._dispatch(None)
+            time.sleep(self.poll_interval)
+
+
+def init_change_feed(app, feed):
+    """Register `flask changes ...` and start tailing the log when enabled"""
+
+    @app.cli.group('changes')
+    def changes_group():
+        """Trigger-based change log"""
+
+    @changes_group.command('install')
+    def install_command():
+        """Create change_log and the capture triggers"""
+        with feed.connect_primary() as conn:
+            with conn.cursor() as cur:
+                installed = feed.install(cur)
+            conn.commit()
+        click.echo(f"Capturing changes of: {', '.join(installed)}")
+
+    @changes_group.command('status')
+    def status_command():
+        """Show the size of the change log"""
+        with feed.connect_primary() as conn:
+            with conn.cursor() as cur:
+                info = feed.status(cur)
+        click.echo(f"{info['rows']} records, last seq {info['last_seq']}, oldest {info['oldest']}")
+
+    @changes_group.command('prune')
+    def prune_command():
+        """Delete records past the retention period"""
+        click.echo(f"Deleted {feed.prune()} records")
+
+    @changes_group.command('tail')
+    def tail_command():
+        """Print changes as they are committed"""
+        with feed.connect() as conn:
+            with conn.cursor() as cur:
+                cursor = feed.snapshot(cur)
+                conn.commit()
+                while True:
+                    records, cursor = feed.read(cur, cursor)
+                    conn.commit()
+                    for record in records or ():
+                        click.echo(f"{record['seq']:>10} {record['op']} {record['table_name']:<12} "
+                                   f"row={record['row_id']} order={record['order_id']} user={record['user_id']}")
+                    if records is None:
+                        click.echo("... too many changes to list; skipped ahead")
+                    time.sleep(feed.poll_interval)
+
+    app.extensions['change_feed'] = feed
+
+    if app.config.get('CHANGE_FEED', False):
+        feed.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=feed.start)
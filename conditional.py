@@ -0,0 +1,156 @@
+# admin_orders_management/conditional.py
+import os
+import time
+import hashlib
+import logging
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request, session, make_response
+from flask.globals import request_ctx
+from flask_login import current_user
+
+from utils import IST
+
+logger = logging.getLogger(__name__)
+
+# How often a missing change_log table is looked for again
+INSTALL_CHECK_INTERVAL = 300
+
+# Validators this close to the end of the change log's retention are not
+# trusted; records they depend on may be pruned while the check runs
+RETENTION_MARGIN_SECONDS = 3600
+
+
+def _tag_parts(tag):
+    """(build digest, issued epoch, snapshot) of one of our tags, or None"""
+    parts = tag.split('.', 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return None
+    return parts[0], int(parts[1]), parts[2]
+
+
+class ConditionalGet:
+    """
+    ETag validators for pages and APIs built from tables the change log
+    (`flask changes install`) captures. A tag carries a digest of what the
+    response depends on besides the data (code version, templates, assets,
+    URL, admin, and the minute for pages showing the clock) and the
+    pg_snapshot taken just before the view ran.
+
+    On revalidation one indexed query asks change_log whether anything in
+    the view's scope committed since that snapshot; if not, the view is
+    skipped and 304 returned. A snapshot rather than MAX(seq) is the
+    watermark because transactions commit out of seq order.
+    """
+
+    def __init__(self, connect, enabled=True, retention_hours=168):
+        self.connect = connect
+        self.enabled = enabled
+        self.retention_hours = retention_hours
+        self.not_modified = 0
+        self.revalidated = 0
+        self._build = None
+        self._installed = False
+        self._checked_at = 0.0
+
+    def build_id(self):
+        """Digest of the code and templates a response was rendered with"""
+        if self._build is None:
+            parts = [current_app.config.get('APP_VERSION', '')]
+            manifest = current_app.extensions.get('asset_manifest') or {}
+            parts.extend(f"{name}={hashed}" for name, hashed in sorted(manifest.items()))
+            template_root = os.path.join(current_app.root_path, current_app.template_folder or 'templates')
+            for dirpath, _, filenames in sorted(os.walk(template_root)):
+                for filename in sorted(filenames):
+                    stat = os.stat(os.path.join(dirpath, filename))
+                    parts.append(f"{filename}:{stat.st_mtime_ns}:{stat.st_size}")
+            self._build = hashlib.sha1("\n".join(parts).encode()).hexdigest()
+        return self._build
+
+    def is_available(self, cur):
+        """Whether change_log exists; rechecked every INSTALL_CHECK_INTERVAL while it does not"""
+        if not self._installed and time.monotonic() - self._checked_at >= INSTALL_CHECK_INTERVAL:
+            self._checked_at = time.monotonic()
+            cur.execute("SELECT to_regclass('change_log') IS NOT NULL as present")
+            self._installed = cur.fetchone()['present']
+        return self._installed
+
+    def _digest(self, clock):
+        user_id = current_user.get_id() if current_user.is_authenticated else ''
+        variant = [self.build_id(), request.full_path, str(user_id)]
+        if clock:
+            variant.append(datetime.now(IST).strftime('%Y-%m-%d %H:%M'))
+        return hashlib.sha1("\n".join(variant).encode()).hexdigest()[:20]
+
+    def _match(self, digest):
+        """(tag, snapshot) of the newest usable tag the client sent, or (None, None)"""
+        oldest = time.time() - self.retention_hours * 3600 + RETENTION_MARGIN_SECONDS
+        best, best_parts = None, None
+        for tag in request.if_none_match.as_set(include_weak=True):
+            parts = _tag_parts(tag)
+            if parts and parts[0] == digest and parts[1] >= oldest and (best is None or parts[1] > best_parts[1]):
+                best, best_parts = tag, parts
+        return (best, best_parts[2]) if best else (None, None)
+
+    def _cacheable(self, response):
+        if response.status_code != 200 or session.get('_flashes') or request_ctx.flashes:
+            return False
+        # Streamed bodies are only ever successes, and reading one here would buffer it
+        if response.is_json and not response.is_streamed:
+            body = response.get_json(silent=True)
+            return not (isinstance(body, dict) and body.get('success') is False)
+        return True
+
+    def __call__(self, statement, clock=False):
+        """
+        Decorator for GET views. statement(**view_args) returns the
+        CHANGED_SINCE_* statement, bound to since=, for the view's scope.
+        clock: the response shows the current time (the layout's sidebar).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pending flash messages are shown once, by a full render
+                if not self.enabled or request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                    return view(*args, **kwargs)
+                digest = self._digest(clock)
+                tag, since = self._match(digest)
+                row = None
+                try:
+                    with self.connect() as conn:
+                        with conn.cursor() as cur:
+                            if self.is_available(cur):
+                                cur.execute(*statement(since=since, **kwargs))
+                                row = cur.fetchone()
+                        conn.commit()
+                except Exception as e:
+                    logger.error(f"Conditional GET check failed for {request.path}: {e}")
+                if row is None:
+                    return view(*args, **kwargs)
+
+                if since is not None:
+                    self.revalidated += 1
+                    if not row['changed']:
+                        self.not_modified += 1
+                        response = make_response('', 304)
+                        # Keep the client's tag, whose snapshot is still the watermark
+                        response.set_etag(tag, weak=True)
+                        response.headers['Cache-Control'] = 'private, no-cache'
+                        return response
+
+                response = make_response(view(*args, **kwargs))
+                if self._cacheable(response):
+                    response.set_etag(f"{digest}.{int(time.time())}.{row['snapshot']}", weak=True)
+                    response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'installed': self._installed,
+            'revalidated': self.revalidated,
+            'not_modified': self.not_modified
+        }
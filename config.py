@@ -1,5 +1,6 @@
 # admin_orders_management/config.py
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +22,104 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
+    # Static asset pipeline (static/dist is produced by `flask build-assets`)
+    ASSET_DIST_DIR = 'dist'
+    ASSET_MAX_AGE = 31536000  # 1 year, assets are content-hashed
+    
+    # Delivery map clustering
+    GEO_REFRESH_SECONDS = int(os.environ.get('GEO_REFRESH_SECONDS', '60'))
+    # Full reload that drops edited, deleted and archived points
+    GEO_REBUILD_SECONDS = int(os.environ.get('GEO_REBUILD_SECONDS', '900'))
+    
+    # Delivery zones for the orders filter: name -> [[lat, lon], ...] polygon
+    DELIVERY_ZONES = json.loads(os.environ.get('DELIVERY_ZONES', '{}'))
+    
+    # Read replica for GET pages; unset keeps everything on DATABASE_URL
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_CHECK_SECONDS = float(os.environ.get('REPLICA_CHECK_SECONDS', '5'))
+    
+    # Connection pool per worker (requires psycopg_pool)
+    DB_POOL_ENABLED = os.environ.get('DB_POOL_ENABLED', 'true').lower() == 'true'
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+    
+    # Monthly partitions of orders/order_items (`flask partitions convert`);
+    # once converted, turn maintenance on so workers keep
+    # PARTITION_MONTHS_AHEAD future months created
+    PARTITION_MAINTENANCE = os.environ.get('PARTITION_MAINTENANCE', 'false').lower() == 'true'
+    PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', '3'))
+    PARTITION_CHECK_SECONDS = int(os.environ.get('PARTITION_CHECK_SECONDS', '21600'))
+    PARTITION_BATCH_SIZE = int(os.environ.get('PARTITION_BATCH_SIZE', '5000'))
+    
+    # Closed orders older than ARCHIVE_AFTER_DAYS move to compressed files in
+    # ARCHIVE_DIR (`flask archive run`); use shared storage with several hosts
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '365'))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+    
+    # Trigger-based change log (`flask changes install`); each worker tails it
+    # and invalidates its caches, which can then keep entries much longer
+    CHANGE_FEED = os.environ.get('CHANGE_FEED', 'false').lower() == 'true'
+    CHANGE_FEED_POLL_SECONDS = float(os.environ.get('CHANGE_FEED_POLL_SECONDS', '1'))
+    CHANGE_FEED_RETENTION_HOURS = int(os.environ.get('CHANGE_FEED_RETENTION_HOURS', '168'))
+    CHANGE_FEED_CACHE_SECONDS = int(os.environ.get('CHANGE_FEED_CACHE_SECONDS', '600'))
+    
+    # ETag/304 on the orders and customers pages and detail APIs, checked
+    # against the change log (needs `flask changes install`, not CHANGE_FEED)
+    CONDITIONAL_GET = os.environ.get('CONDITIONAL_GET', 'false').lower() == 'true'
+    
+    # Per-item sales counters for top items (`flask popularity install`);
+    # hourly counters, used for the last-24-hours window, are pruned after
+    # the retention hours; new sales are folded into them every FOLD_SECONDS
+    ITEM_POPULARITY = os.environ.get('ITEM_POPULARITY', 'false').lower() == 'true'
+    ITEM_POPULARITY_HOURLY_RETENTION = int(os.environ.get('ITEM_POPULARITY_HOURLY_RETENTION', '48'))
+    ITEM_POPULARITY_FOLD_SECONDS = int(os.environ.get('ITEM_POPULARITY_FOLD_SECONDS', '30'))
+    
+    # Live order counts per status kept by triggers (`flask status-counters
+    # install`); workers fold the trigger's delta rows every COMPACT seconds
+    STATUS_COUNTERS = os.environ.get('STATUS_COUNTERS', 'false').lower() == 'true'
+    STATUS_COUNTERS_COMPACT_SECONDS = int(os.environ.get('STATUS_COUNTERS_COMPACT_SECONDS', '30'))
+    
+    # In-process numpy snapshot of orders for the statistics page and charts
+    # (requires numpy); refreshed incrementally, fully reloaded every REBUILD
+    ANALYTICS_SNAPSHOT = os.environ.get('ANALYTICS_SNAPSHOT', 'false').lower() == 'true'
+    ANALYTICS_REFRESH_SECONDS = int(os.environ.get('ANALYTICS_REFRESH_SECONDS', '30'))
+    ANALYTICS_REBUILD_SECONDS = int(os.environ.get('ANALYTICS_REBUILD_SECONDS', '3600'))
+    
+    # Worker warm-up: /ready reports 503 until it has finished
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+    WARMUP_RETRY_SECONDS = float(os.environ.get('WARMUP_RETRY_SECONDS', '5'))
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'jinja'))
+    # Layout fragments ({% cache %} in base.html) and the header counters they show
+    FRAGMENT_CACHE_SECONDS = int(os.environ.get('FRAGMENT_CACHE_SECONDS', '60'))
+    HEADER_CACHE_SECONDS = int(os.environ.get('HEADER_CACHE_SECONDS', '10'))
+    
+    # Admin accounts: werkzeug password hash method (cost is tunable, existing
+    # hashes are upgraded at next login) and how long principals stay cached
+    AUTH_PASSWORD_METHOD = os.environ.get('AUTH_PASSWORD_METHOD', 'scrypt:32768:8:1')
+    AUTH_MAX_CONCURRENT_HASHES = int(os.environ.get('AUTH_MAX_CONCURRENT_HASHES', '2'))
+    PRINCIPAL_CACHE_SECONDS = int(os.environ.get('PRINCIPAL_CACHE_SECONDS', '300'))
+    # First superadmin, created by init_database while admin_users is empty
+    ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME')
+    ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
+    ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@bitemebuddy.com')
+    
+    # In-process caches
+    STATISTICS_CACHE_SECONDS = int(os.environ.get('STATISTICS_CACHE_SECONDS', '60'))
+    CATALOG_CACHE_SECONDS = int(os.environ.get('CATALOG_CACHE_SECONDS', '300'))
+    
+    # Listing totals: unfiltered pages show planner estimates, filtered pages
+    # count up to COUNT_CAP rows; the exact total is fetched by the page later
+    COUNT_CAP = int(os.environ.get('COUNT_CAP', '1000'))
+    COUNT_CACHE_SECONDS = int(os.environ.get('COUNT_CACHE_SECONDS', '30'))
+    
+    # Async serving mode for gevent workers (gunicorn -k gevent): database
+    # waits yield to other requests, independent page queries run concurrently
+    ASYNC_DB_MODE = os.environ.get('ASYNC_DB_MODE', 'false').lower() == 'true'
+    ASYNC_DB_TIMEOUT = float(os.environ.get('ASYNC_DB_TIMEOUT', '30'))
+    
     # Pagination
     ITEMS_PER_PAGE = 20
     
@@ -35,6 +134,37 @@ class Config:
     APP_VERSION = '1.0.0'
     TIMEZONE = 'Asia/Kolkata'
     
+    # Instrumentation
+    # Fraction of requests that record DB timings (0 disables, 1 samples all)
+    DB_METRICS_SAMPLE_RATE = float(os.environ.get('DB_METRICS_SAMPLE_RATE', '1.0'))
+    # Bearer token required to scrape /metrics; without one /metrics is closed
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Put the slowest statement's SQL in Server-Timing for everyone (it is
+    # otherwise only sent to superadmins)
+    SERVER_TIMING_DETAIL = os.environ.get('SERVER_TIMING_DETAIL', 'false').lower() == 'true'
+    
+    # Logging
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FILE = os.environ.get('LOG_FILE', 'logs/app.log')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # 10MB
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', '10'))
+    LOG_ROTATE_SECONDS = int(os.environ.get('LOG_ROTATE_SECONDS', '86400'))  # daily
+    LOG_QUEUE_SIZE = 10000
+    # Fraction of sub-WARNING records kept per logger (high-volume loggers)
+    LOG_SAMPLING = {
+        'werkzeug': float(os.environ.get('LOG_SAMPLE_WERKZEUG', '0.1'))
+    }
+    
+    # Request profiling (superadmins can force it with an "X-Profile: 1" header)
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', '0'))
+    PROFILER_INTERVAL_MS = 5
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '1000'))
+    # Coarse sampling of all other requests; the tree is saved only for slow ones (0 = off)
+    SLOW_PROFILE_INTERVAL_MS = int(os.environ.get('SLOW_PROFILE_INTERVAL_MS', '50'))
+    SLOW_REQUEST_LOG = 'logs/slow_requests.log'
+    PROFILE_DIR = 'logs/profiles'
+    PROFILE_RETENTION = int(os.environ.get('PROFILE_RETENTION', '200'))
+    
     # Feature flags
     ENABLE_EMAIL_NOTIFICATIONS = False
     ENABLE_SMS_NOTIFICATIONS = False
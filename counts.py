@@ -0,0 +1,99 @@
+# admin_orders_management/counts.py
+import logging
+
+from queries import TABLE_ROW_ESTIMATE
+
+logger = logging.getLogger(__name__)
+
+ESTIMATED = 'estimate'
+CAPPED = 'capped'
+EXACT = 'exact'
+
+
+class ListingCount:
+    """Total rows of a listing and how it was obtained"""
+
+    def __init__(self, value, mode):
+        self.value = value
+        self.mode = mode
+
+    @property
+    def exact(self):
+        return self.mode == EXACT
+
+    @property
+    def display(self):
+        if self.mode == ESTIMATED:
+            return f"~{self.value}"
+        if self.mode == CAPPED:
+            return f"{self.value}+"
+        return str(self.value)
+
+    def total_pages(self, per_page, page, rows_on_page):
+        pages = (self.value + per_page - 1) // per_page
+        if not self.exact:
+            # Only a lower bound: keep "Next" while the current page is full
+            pages = max(pages, page + 1 if rows_on_page == per_page else page)
+        return pages
+
+
+class CountStrategy:
+    """
+    Counts a listing without scanning every matching row on page load.
+    Unfiltered listings use the planner's row estimate for the table;
+    filtered ones count at most `cap` rows. Exact totals come from exact(),
+    which the page requests separately once it is displayed, and are cached
+    so later page loads with the same filters can show them straight away.
+    """
+
+    def __init__(self, table, exact_statement, capped_statement, cap=1000, cache=None):
+        self.table = table
+        self.exact_statement = exact_statement
+        self.capped_statement = capped_statement
+        self.cap = cap
+        self.cache = cache
+
+    def _key(self, target, filters):
+        return (target, self.table, tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in sorted(filters.items())
+        ))
+
+    def fast(self, cur, filters, target, min_cap=0):
+        """
+        Count for rendering the page; min_cap raises the cap so deep pages
+        still count past their own offset
+        """
+        key = self._key(target, filters)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return ListingCount(cached, EXACT)
+
+        cap = max(self.cap, min_cap)
+        if all(value is None for value in filters.values()):
+            cur.execute(*TABLE_ROW_ESTIMATE.bind(table=self.table))
+            row = cur.fetchone()
+            estimate = row['estimate'] if row else -1
+            # Small or never analyzed tables are cheap to count for real
+            if estimate >= cap:
+                return ListingCount(estimate, ESTIMATED)
+
+        cur.execute(*self.capped_statement.bind(**filters, cap=cap + 1))
+        count = cur.fetchone()['count']
+        if count > cap:
+            return ListingCount(cap, CAPPED)
+
+        if self.cache is not None:
+            self.cache.set(key, count)
+        return ListingCount(count, EXACT)
+
+    def exact(self, cur, filters, target):
+        """Exact total, shared through the cache between concurrent requests"""
+        def load():
+            cur.execute(*self.exact_statement.bind(**filters))
+            return cur.fetchone()['count']
+
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_set(self._key(target, filters), load)
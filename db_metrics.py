@@ -0,0 +1,268 @@
+# admin_orders_management/db_metrics.py
+import re
+import hmac
+import time
+import random
+import logging
+import threading
+from collections import defaultdict
+
+import psycopg
+from flask import g, request, Response, abort, has_request_context
+from flask_login import current_user
+
+from queries import catalog as query_catalog
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus convention)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RequestDBStats:
+    """Database timings collected for a single request"""
+
+    __slots__ = ('query_count', 'total_time', 'slowest_time', 'slowest_query', 'started_at')
+
+    def __init__(self):
+        self.query_count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_query = None
+        self.started_at = time.perf_counter()
+
+    def record(self, query, elapsed):
+        self.query_count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            # Keep the raw query; it is only normalized when reported
+            self.slowest_query = query
+
+    def record_wait(self, label, elapsed):
+        """
+        Time spent waiting for statements already counted by record(), e.g.
+        the sync and fetch of a pipeline whose execute() calls only queued
+        """
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_query = label
+
+    def slowest_statement(self, max_length=120):
+        """Single-line, truncated text of the slowest statement"""
+        if self.slowest_query is None:
+            return ''
+        query = self.slowest_query
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        elif not isinstance(query, str):
+            query = repr(query)
+        text = _WHITESPACE.sub(' ', query).strip()
+        if len(text) > max_length:
+            text = text[:max_length - 3] + '...'
+        return text
+
+
+def current_db_stats():
+    """Return the stats collector for the active request, or None if not sampled"""
+    if not has_request_context():
+        return None
+    return g.get('db_stats')
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """
+    psycopg cursor that times every statement for sampled requests. Statements
+    from the query catalog are executed as prepared statements and counted in
+    the catalog's per-statement registry.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        statement = query_catalog.lookup(query) if isinstance(query, str) else None
+        if statement is not None:
+            kwargs.setdefault('prepare', True)
+        stats = current_db_stats()
+        if stats is None and statement is None:
+            return super().execute(query, params, **kwargs)
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            return super().execute(query, params, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if stats is not None:
+                stats.record(query, elapsed)
+            if statement is not None:
+                # In pipeline mode execute() only queues the statement
+                pipelined = self.connection.pgconn.pipeline_status != psycopg.pq.PipelineStatus.OFF
+                query_catalog.record(statement, None if pipelined else elapsed, failed)
+
+    def executemany(self, query, params_seq, **kwargs):
+        stats = current_db_stats()
+        if stats is None:
+            return super().executemany(query, params_seq, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            stats.record(query, time.perf_counter() - start)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus exposition format"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def samples(self):
+        """Yield (le, cumulative_count) pairs including +Inf"""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield _format_bound(bound), cumulative
+        yield '+Inf', self.total
+
+
+class MetricsRegistry:
+    """Per-route request metrics for this worker process"""
+
+    METRICS = (
+        ('admin_request_duration_seconds', 'Request wall-clock time by route', DURATION_BUCKETS),
+        ('admin_request_db_seconds', 'Total database time per request by route', DURATION_BUCKETS),
+        ('admin_request_db_queries', 'Database statements per request by route', QUERY_COUNT_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {
+            name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+            for name, _, buckets in self.METRICS
+        }
+
+    def observe_request(self, route, duration, stats):
+        with self._lock:
+            self._histograms['admin_request_duration_seconds'][route].observe(duration)
+            self._histograms['admin_request_db_seconds'][route].observe(stats.total_time)
+            self._histograms['admin_request_db_queries'][route].observe(stats.query_count)
+
+    def render(self):
+        """Render all histograms as Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, help_text, _ in self.METRICS:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for route, histogram in sorted(self._histograms[name].items()):
+                    label = escape_label(route)
+                    for le, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{route="{label}",le="{le}"}} {count}')
+                    lines.append(f'{name}_sum{{route="{label}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{route="{label}"}} {histogram.total}')
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+# Other modules' render() functions, appended to /metrics
+_metric_sources = []
+
+
+def register_metrics(render):
+    """Add render() (Prometheus text) to the /metrics output"""
+    _metric_sources.append(render)
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_header_desc(value):
+    # Header values must stay latin-1 safe; SQL may contain e.g. the rupee sign
+    value = value.encode('ascii', 'replace').decode('ascii')
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def server_timing_header(stats, total_time, detail=False):
+    """
+    Build the Server-Timing header value for a finished request; the
+    slowest statement's text is only included with detail
+    """
+    parts = [
+        f'db;dur={stats.total_time * 1000:.1f};desc="{stats.query_count} queries"',
+    ]
+    if stats.slowest_query is not None:
+        slowest = f'db-slowest;dur={stats.slowest_time * 1000:.1f}'
+        if detail:
+            slowest += f';desc="{_escape_header_desc(stats.slowest_statement())}"'
+        parts.append(slowest)
+    parts.append(f'app;dur={(total_time - stats.total_time) * 1000:.1f}')
+    parts.append(f'total;dur={total_time * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def init_db_metrics(app):
+    """Register request hooks and the /metrics endpoint on the app"""
+
+    sample_rate = app.config.get('DB_METRICS_SAMPLE_RATE', 1.0)
+
+    def show_statement_text():
+        # SQL text is for developers: with the debug flag, or to superadmins
+        if app.config.get('SERVER_TIMING_DETAIL'):
+            return True
+        return current_user.is_authenticated and getattr(current_user, 'role', None) == 'superadmin'
+
+    @app.before_request
+    def start_db_metrics():
+        if sample_rate <= 0 or request.endpoint == 'metrics':
+            return
+        if sample_rate >= 1 or random.random() < sample_rate:
+            g.db_stats = RequestDBStats()
+
+    @app.after_request
+    def emit_db_metrics(response):
+        stats = g.pop('db_stats', None)
+        if stats is None:
+            return response
+
+        total_time = time.perf_counter() - stats.started_at
+        response.headers['Server-Timing'] = server_timing_header(stats, total_time, show_statement_text())
+
+        route = request.endpoint or 'unmatched'
+        metrics_registry.observe_request(route, total_time, stats)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint"""
+        # Fails closed: without a configured token nobody can scrape
+        token = app.config.get('METRICS_TOKEN')
+        if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+
+        extra = ''.join(render() for render in _metric_sources)
+        return Response(metrics_registry.render() + query_catalog.render_metrics() + extra,
+                        mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,87 @@
+# admin_orders_management/db_pool.py
+import os
+import logging
+import threading
+from contextlib import ExitStack
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # optional dependency, connections are opened per request instead
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+
+class PoolRegistry:
+    """
+    One psycopg_pool.ConnectionPool per database target (primary/replica),
+    created lazily in the process that uses it. Pools inherited through a
+    fork belong to the parent and are discarded, so every gunicorn worker
+    owns its own connections.
+    """
+
+    def __init__(self, min_size=2, max_size=10, timeout=30, enabled=True, **connect_kwargs):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.enabled = enabled and ConnectionPool is not None
+        self.connect_kwargs = connect_kwargs
+        self._pools = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get(self, target, conninfo):
+        """Pool for target, or None when pooling is unavailable"""
+        if not self.enabled:
+            return None
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pools = {}
+                    self._pid = os.getpid()
+        pool = self._pools.get(target)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(target)
+                if pool is None:
+                    pool = ConnectionPool(conninfo, min_size=self.min_size, max_size=self.max_size,
+                                          timeout=self.timeout, kwargs=self.connect_kwargs,
+                                          name=f'admin-{target}', open=True)
+                    self._pools[target] = pool
+        return pool
+
+    def warm(self, target, conninfo):
+        """Block until the pool for target holds its minimum number of connections"""
+        pool = self.get(target, conninfo)
+        if pool is None:
+            return 0
+        pool.wait(timeout=self.timeout)
+        return pool.get_stats().get('pool_size', self.min_size)
+
+    def prepare(self, target, conninfo, statements):
+        """
+        Execute (query, params[, row_factory]) statements with prepare=True on
+        every idle connection of the pool, so first real requests skip
+        parsing and planning. Returns the number of connections prepared.
+        """
+        pool = self.get(target, conninfo)
+        if pool is None:
+            return 0
+        with ExitStack() as stack:
+            connections = [stack.enter_context(pool.connection()) for _ in range(self.min_size)]
+            for conn in connections:
+                with conn.cursor() as cur:
+                    for statement in statements:
+                        cur.execute(statement[0], statement[1], prepare=True)
+                        cur.fetchall()
+        return len(connections)
+
+    def stats(self):
+        return {target: pool.get_stats() for target, pool in self._pools.items()}
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
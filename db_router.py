@@ -0,0 +1,177 @@
+# admin_orders_management/db_router.py
+import time
+import logging
+import threading
+
+import psycopg
+from psycopg.rows import dict_row
+from flask import g, has_request_context, request, session
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Shortest gap between forced re-checks made for read-your-writes
+FORCED_CHECK_INTERVAL = 0.5
+
+# Session key holding the primary WAL position of the admin's last write
+WRITE_LSN_KEY = 'db_write_lsn'
+
+REPLICA_STATUS_QUERY = """
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag_seconds,
+        CASE
+            WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+            ELSE pg_current_wal_lsn()
+        END::text AS replay_lsn
+"""
+
+
+def parse_lsn(text):
+    """'16/B374D848' -> comparable integer"""
+    if not text:
+        return None
+    high, low = text.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+class ReplicaMonitor:
+    """Replica lag and replay position, re-checked at most every check_interval seconds"""
+
+    def __init__(self, replica_url, max_lag, check_interval=5, connect_timeout=2):
+        self.replica_url = replica_url
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.connect_timeout = connect_timeout
+        self.healthy = False
+        self.lag_seconds = None
+        self.replay_lsn = None
+        self.checked_at = 0.0
+        self.error = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self.checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self.checked_at < self.check_interval:
+                return
+            try:
+                with psycopg.connect(self.replica_url, row_factory=dict_row, autocommit=True,
+                                     connect_timeout=self.connect_timeout) as conn:
+                    row = conn.execute(REPLICA_STATUS_QUERY).fetchone()
+                self.lag_seconds = float(row['lag_seconds'])
+                self.replay_lsn = parse_lsn(row['replay_lsn'])
+                self.healthy = self.lag_seconds <= self.max_lag
+                if not row['in_recovery']:
+                    logger.warning("Replica DSN points at a server that is not in recovery")
+                self.error = None
+            except Exception as e:
+                if self.healthy or self.error is None:
+                    logger.error(f"Replica status check failed: {e}")
+                self.healthy = False
+                self.error = str(e)
+            self.checked_at = time.monotonic()
+
+    def can_serve(self, min_lsn=None):
+        """True when the replica is within the lag budget and has replayed min_lsn"""
+        self.refresh()
+        if not self.healthy:
+            return False
+        if min_lsn is None:
+            return True
+        if self.replay_lsn is not None and self.replay_lsn >= min_lsn:
+            return True
+        # The cached position may simply be old; look once more before giving up
+        if time.monotonic() - self.checked_at >= FORCED_CHECK_INTERVAL:
+            self.refresh(force=True)
+        return self.healthy and self.replay_lsn is not None and self.replay_lsn >= min_lsn
+
+    def status(self):
+        return {
+            'healthy': self.healthy,
+            'lag_seconds': self.lag_seconds,
+            'max_lag_seconds': self.max_lag,
+            'error': self.error
+        }
+
+
+class DBRouter:
+    """
+    Chooses the database for each request. Reads (GET/HEAD) go to the
+    replica while it is within REPLICA_MAX_LAG_SECONDS; everything else,
+    and any endpoint in primary_endpoints, uses the primary. After an admin
+    writes, their reads stay on the primary until the replica has replayed
+    that write (read-your-writes).
+    """
+
+    def __init__(self, replica_url=None, max_lag=5.0, check_interval=5.0,
+                 primary_endpoints=()):
+        self.monitor = ReplicaMonitor(replica_url, max_lag, check_interval) if replica_url else None
+        self.primary_endpoints = set(primary_endpoints)
+
+    @property
+    def enabled(self):
+        return self.monitor is not None
+
+    def choose(self):
+        """Target for the current request"""
+        if not self.enabled:
+            return PRIMARY
+        if request.method not in SAFE_METHODS or request.endpoint in self.primary_endpoints:
+            return PRIMARY
+
+        write_lsn = session.get(WRITE_LSN_KEY)
+        if not self.monitor.can_serve(write_lsn):
+            return PRIMARY
+        if write_lsn is not None:
+            # Replica has caught up with this admin's writes
+            session.pop(WRITE_LSN_KEY, None)
+        return REPLICA
+
+    def current_target(self):
+        if not has_request_context():
+            return PRIMARY
+        return g.get('db_target', PRIMARY)
+
+    def record_write(self, conn):
+        """Call after committing on the primary so this admin's next reads see the write"""
+        if not self.enabled:
+            return
+        try:
+            row = conn.execute("SELECT pg_current_wal_insert_lsn()::text AS lsn").fetchone()
+            conn.commit()
+            lsn = parse_lsn(row['lsn'])
+            previous = session.get(WRITE_LSN_KEY)
+            session[WRITE_LSN_KEY] = max(lsn, previous or 0)
+        except Exception as e:
+            logger.error(f"Could not record write position: {e}")
+
+    def status(self):
+        if not self.enabled:
+            return {'enabled': False}
+        return {'enabled': True, **self.monitor.status()}
+
+
+def init_db_router(app, router):
+    """Pick the request's database target before any view opens a connection"""
+
+    @app.before_request
+    def choose_database():
+        g.db_target = router.choose()
+
+    @app.after_request
+    def expose_database(response):
+        if router.enabled:
+            response.headers['X-DB-Target'] = g.get('db_target', PRIMARY)
+        return response
+
+    app.extensions['db_router'] = router
@@ -0,0 +1,168 @@
+# admin_orders_management/formatting.py
+from datetime import datetime
+
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# IST has no DST, so the UTC offset is resolved once instead of per value
+IST_OFFSET = IST.utcoffset(datetime(2000, 1, 1))
+
+DEFAULT_DATETIME_FORMAT = "%d %b %Y, %I:%M %p"
+
+_MONTHS = (None, 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+STATUS_BADGE_CLASSES = {
+    'pending': 'warning',
+    'processing': 'info',
+    'completed': 'success',
+    'cancelled': 'danger',
+    'delivered': 'success'
+}
+
+PAYMENT_STATUS_BADGE_CLASSES = {
+    'pending': 'warning',
+    'completed': 'success',
+    'failed': 'danger',
+    'refunded': 'secondary',
+    'cancelled': 'danger'
+}
+
+
+def to_ist_naive(dt):
+    """Shift a datetime to IST wall-clock time (naive values are treated as UTC)"""
+    offset = dt.utcoffset()
+    if offset is not None:
+        dt = dt.replace(tzinfo=None) - offset
+    return dt + IST_OFFSET
+
+
+def _format_default(local):
+    hour = local.hour % 12 or 12
+    return "{:02d} {} {}, {:02d}:{:02d} {}".format(
+        local.day, _MONTHS[local.month], local.year,
+        hour, local.minute, 'PM' if local.hour >= 12 else 'AM'
+    )
+
+
+def format_ist(dt, format_str=DEFAULT_DATETIME_FORMAT):
+    """Format one datetime in IST; empty string for missing values"""
+    if not dt:
+        return ""
+    local = to_ist_naive(dt)
+    if format_str == DEFAULT_DATETIME_FORMAT:
+        return _format_default(local)
+    return local.strftime(format_str)
+
+
+def format_ist_column(values, format_str=DEFAULT_DATETIME_FORMAT):
+    """
+    Format a whole column of datetimes. The default format has minute
+    resolution, so values that fall into the same minute share one
+    formatted string; other formats are memoized per exact value.
+    """
+    out = []
+    seen = {}
+    by_minute = format_str == DEFAULT_DATETIME_FORMAT
+    for dt in values:
+        if not dt:
+            out.append("")
+            continue
+        local = to_ist_naive(dt)
+        key = local.replace(second=0, microsecond=0) if by_minute else local
+        text = seen.get(key)
+        if text is None:
+            text = _format_default(local) if by_minute else local.strftime(format_str)
+            seen[key] = text
+        out.append(text)
+    return out
+
+
+def format_currency_column(values, optional=False):
+    """Format a column of amounts as Indian Rupees"""
+    out = []
+    for amount in values:
+        if amount is None or (optional and not amount):
+            out.append(None if optional else "₹0.00")
+        else:
+            out.append(f"₹{amount:,.2f}")
+    return out
+
+
+def badge_class_column(values, classes=STATUS_BADGE_CLASSES, default='secondary'):
+    """Map a column of statuses to Bootstrap badge classes"""
+    get = classes.get
+    return [get(value, default) for value in values]
+
+
+class RowFormatter:
+    """
+    Formatting stage declared once per result shape. Each spec maps a source
+    column to an output column; apply() formats every column of the result
+    set in one pass per column and writes the outputs back onto the rows.
+
+        ORDER_LIST = RowFormatter(
+            datetimes={'order_date': 'order_date_formatted'},
+            currency={'total_amount': 'total_amount_formatted'},
+            badges={'status': 'status_class'},
+        )
+    """
+
+    def __init__(self, datetimes=None, currency=None, optional_currency=None,
+                 badges=None, payment_badges=None):
+        self.columns = []
+        for src, dst in (datetimes or {}).items():
+            self.columns.append((src, dst, format_ist_column))
+        for src, dst in (currency or {}).items():
+            self.columns.append((src, dst, format_currency_column))
+        for src, dst in (optional_currency or {}).items():
+            self.columns.append((src, dst, lambda v: format_currency_column(v, optional=True)))
+        for src, dst in (badges or {}).items():
+            self.columns.append((src, dst, badge_class_column))
+        for src, dst in (payment_badges or {}).items():
+            self.columns.append((src, dst, lambda v: badge_class_column(v, PAYMENT_STATUS_BADGE_CLASSES)))
+
+    def columns_for(self, rows):
+        """Return {output_column: [formatted values]} without touching the rows"""
+        result = {}
+        for src, dst, formatter in self.columns:
+            result[dst] = formatter([row.get(src) for row in rows])
+        return result
+
+    def apply(self, rows):
+        """Add the formatted columns to every row; returns rows for chaining"""
+        if not rows:
+            return rows
+        for dst, values in self.columns_for(rows).items():
+            for row, value in zip(rows, values):
+                row[dst] = value
+        return rows
+
+
+# Result shapes used by the routes
+DASHBOARD_ORDERS = RowFormatter(
+    datetimes={'order_date': 'order_date_formatted'}
+)
+
+ORDER_DETAIL = RowFormatter(
+    datetimes={
+        'order_date': 'order_date_formatted',
+        'delivery_date': 'delivery_date_formatted',
+        'payment_date': 'payment_date_formatted'
+    },
+    currency={'total_amount': 'total_amount_formatted'}
+)
+
+ORDER_ITEMS = RowFormatter(
+    currency={'price': 'price_formatted', 'total': 'total_formatted'}
+)
+
+CUSTOMER_DETAIL = RowFormatter(
+    datetimes={'created_at': 'created_at_formatted', 'last_login': 'last_login_formatted'}
+)
+
+CATALOG_ITEMS = RowFormatter(
+    currency={'price': 'price_formatted', 'final_price': 'final_price_formatted'},
+    optional_currency={'discount': 'discount_formatted'}
+)
@@ -0,0 +1,484 @@
+# admin_orders_management/geo.py
+import math
+import time
+import logging
+import threading
+
+from psycopg.rows import tuple_row
+
+from utils import generate_map_link
+
+logger = logging.getLogger(__name__)
+
+MIN_ZOOM = 1
+MAX_ZOOM = 18
+
+# Grid cells per map-tile edge; 4 gives roughly 64px clusters at 256px tiles
+CELLS_PER_TILE = 4
+
+# Rows fetched per round trip while catching up with new points
+REFRESH_BATCH_SIZE = 50000
+
+# Resolution of the spatial lookup grid (~1.1 km of latitude per cell)
+INDEX_CELL_DEG = 0.01
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def parse_location_column(values):
+    """
+    Bulk version of utils.parse_location_data for coordinates only. Takes the
+    "Address | LAT | LON | MapLink" strings of a whole result set and returns
+    a (lat, lon) tuple or None for each of them.
+    """
+    out = []
+    append = out.append
+    for value in values:
+        if not value or ' | ' not in value:
+            append(None)
+            continue
+        parts = value.split(' | ', 3)
+        if len(parts) < 4:
+            append(None)
+            continue
+        try:
+            lat = float(parts[1])
+            lon = float(parts[2])
+        except ValueError:
+            append(None)
+            continue
+        if -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0:
+            append((lat, lon))
+        else:
+            append(None)
+    return out
+
+
+def cell_size(zoom):
+    """Edge length of one grid cell in degrees at this zoom level"""
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def cell_key(lat, lon, size):
+    return (int((lon + 180.0) // size), int((lat + 90.0) // size))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Ray casting test; polygon is a list of (lat, lon) vertices"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = (lon_j - lon_i) * (lat - lat_i) / (lat_j - lat_i) + lon_i
+            if lon < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def parse_point(value):
+    """'lat,lon' -> (lat, lon), or None"""
+    if not value:
+        return None
+    try:
+        lat, lon = (float(part) for part in value.split(','))
+    except ValueError:
+        return None
+    if -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0:
+        return (lat, lon)
+    return None
+
+
+def parse_polygon(value, zones=None):
+    """
+    A configured zone name, or inline vertices as 'lat lon;lat lon;...'.
+    Returns a list of (lat, lon) with at least three vertices, or None.
+    """
+    if not value:
+        return None
+    if zones and value in zones:
+        polygon = [tuple(vertex) for vertex in zones[value]]
+    else:
+        try:
+            polygon = [
+                tuple(float(part) for part in vertex.split())
+                for vertex in value.split(';') if vertex.strip()
+            ]
+        except ValueError:
+            return None
+    if len(polygon) < 3 or any(len(vertex) != 2 for vertex in polygon):
+        return None
+    return polygon
+
+
+def parse_bbox(value):
+    """'min_lon,min_lat,max_lon,max_lat' -> tuple of floats, or None"""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        return None
+    return (min_lon, min_lat, max_lon, max_lat)
+
+
+def _address_coords(rows):
+    """(lat, lon) or None for (address_id, latitude, longitude, ...) rows"""
+    return [
+        (float(row[1]), float(row[2])) if row[1] is not None and row[2] is not None else None
+        for row in rows
+    ]
+
+
+class GeoPointSource:
+    """
+    Points of one kind (order deliveries or customer addresses) plus cached
+    per-zoom cell counts. New points are folded into every cached zoom level
+    as they arrive, so a refresh never recounts history. A replaced or
+    removed point is taken out of the grid and the cached levels; its slot
+    in the parallel lists stays unused until the next full rebuild.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.ids = []
+        self.refs = []
+        self.lats = []
+        self.lons = []
+        self.high_water = 0
+        # zoom -> {(x, y): [count, sum_lat, sum_lon]}
+        self.layers = {}
+        # Fixed-resolution lookup grid: (x, y) -> [point positions]
+        self.grid = {}
+        # id -> position of each live point
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add_points(self, ids, coords, refs=None):
+        """
+        Append points, replacing any already indexed under the same id; refs
+        are what spatial queries return for each point (e.g. the owning
+        user_id of an address) and default to the ids.
+        """
+        refs = ids if refs is None else refs
+        for point_id, coord, ref in zip(ids, coords, refs):
+            if point_id > self.high_water:
+                self.high_water = point_id
+            self.remove_point(point_id)
+            if coord is None:
+                continue
+            lat, lon = coord
+            position = len(self.ids)
+            self.positions[point_id] = position
+            self.ids.append(point_id)
+            self.refs.append(ref)
+            self.lats.append(lat)
+            self.lons.append(lon)
+            self.grid.setdefault(cell_key(lat, lon, INDEX_CELL_DEG), []).append(position)
+            for zoom, cells in self.layers.items():
+                self._add_to_layer(cells, cell_size(zoom), lat, lon)
+
+    def remove_point(self, point_id):
+        """Drop a point from the lookup grid and every cached zoom level"""
+        position = self.positions.pop(point_id, None)
+        if position is None:
+            return
+        lat, lon = self.lats[position], self.lons[position]
+        key = cell_key(lat, lon, INDEX_CELL_DEG)
+        positions = self.grid[key]
+        positions.remove(position)
+        if not positions:
+            del self.grid[key]
+        for zoom, cells in self.layers.items():
+            key = cell_key(lat, lon, cell_size(zoom))
+            cell = cells[key]
+            if cell[0] == 1:
+                del cells[key]
+            else:
+                cell[0] -= 1
+                cell[1] -= lat
+                cell[2] -= lon
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """Positions of points in grid cells overlapping the bounding box"""
+        x0, y0 = cell_key(min_lat, min_lon, INDEX_CELL_DEG)
+        x1, y1 = cell_key(max_lat, max_lon, INDEX_CELL_DEG)
+        grid = self.grid
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(grid):
+            # Box covers more cells than exist; walk the occupied ones instead
+            for (x, y), positions in grid.items():
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    yield from positions
+            return
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                positions = grid.get((x, y))
+                if positions:
+                    yield from positions
+
+    def within_radius(self, lat, lon, radius_km):
+        """refs of points within radius_km of (lat, lon)"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        lats, lons, refs = self.lats, self.lons, self.refs
+        found = set()
+        for position in self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            if haversine_km(lat, lon, lats[position], lons[position]) <= radius_km:
+                found.add(refs[position])
+        return found
+
+    def within_polygon(self, polygon):
+        """refs of points inside the (lat, lon) polygon"""
+        min_lat = min(vertex[0] for vertex in polygon)
+        max_lat = max(vertex[0] for vertex in polygon)
+        min_lon = min(vertex[1] for vertex in polygon)
+        max_lon = max(vertex[1] for vertex in polygon)
+        lats, lons, refs = self.lats, self.lons, self.refs
+        found = set()
+        for position in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            if point_in_polygon(lats[position], lons[position], polygon):
+                found.add(refs[position])
+        return found
+
+    @staticmethod
+    def _add_to_layer(cells, size, lat, lon):
+        key = cell_key(lat, lon, size)
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [1, lat, lon]
+        else:
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lon
+
+    def layer(self, zoom):
+        cells = self.layers.get(zoom)
+        if cells is None:
+            cells = {}
+            size = cell_size(zoom)
+            lats, lons = self.lats, self.lons
+            for position in self.positions.values():
+                self._add_to_layer(cells, size, lats[position], lons[position])
+            self.layers[zoom] = cells
+        return cells
+
+
+class GeoIndex:
+    """
+    In-process store of delivery and address coordinates. Refreshes append
+    rows above the id high-water mark and re-read the rows reported through
+    mark_changed() (the change feed), replacing or dropping their points.
+    Every rebuild_interval the sources are reloaded from scratch, which
+    also catches changes nobody reported.
+    """
+
+    def __init__(self, refresh_interval=60, rebuild_interval=900):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.sources = {
+            'orders': GeoPointSource('orders'),
+            'addresses': GeoPointSource('addresses')
+        }
+        self.last_refresh = 0.0
+        self.last_rebuild = 0.0
+        # Ids of rows changed since the last refresh, per source
+        self.changed = {name: set() for name in self.sources}
+        # _lock guards the sources; _refresh_lock keeps one loader at a time
+        # so a rebuild can read the tables without blocking queries
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+    def needs_refresh(self):
+        return time.monotonic() - self.last_refresh >= self.refresh_interval
+
+    def needs_rebuild(self):
+        return time.monotonic() - self.last_rebuild >= self.rebuild_interval
+
+    def mark_changed(self, order_ids=(), address_ids=()):
+        """Have the next refresh re-read these orders and addresses"""
+        with self._lock:
+            self.changed['orders'].update(order_ids)
+            self.changed['addresses'].update(address_ids)
+        self.last_refresh = 0.0
+
+    def mark_stale(self):
+        """Rebuild on the next refresh, for when changes may have been missed"""
+        self.last_rebuild = float('-inf')
+        self.last_refresh = 0.0
+
+    def refresh(self, conn):
+        """Load points added since the last refresh, or everything when a rebuild is due"""
+        with self._refresh_lock:
+            if not self.needs_refresh():
+                return
+            with self._lock:
+                changed, self.changed = self.changed, {name: set() for name in self.sources}
+            try:
+                with conn.cursor(row_factory=tuple_row) as cur:
+                    if self.needs_rebuild():
+                        sources = {name: GeoPointSource(name) for name in self.sources}
+                        self._refresh_orders(cur, sources['orders'])
+                        self._refresh_addresses(cur, sources['addresses'])
+                        with self._lock:
+                            self.sources = sources
+                        self.last_rebuild = time.monotonic()
+                    else:
+                        self._reread_orders(cur, self.sources['orders'], changed['orders'])
+                        self._reread_addresses(cur, self.sources['addresses'], changed['addresses'])
+                        self._refresh_orders(cur, self.sources['orders'])
+                        self._refresh_addresses(cur, self.sources['addresses'])
+            except Exception:
+                # Keep the reported ids for the next attempt
+                with self._lock:
+                    for name, ids in changed.items():
+                        self.changed[name] |= ids
+                raise
+            self.last_refresh = time.monotonic()
+
+    def _replace(self, source, ids, found_ids, coords, refs=None):
+        """Drop the points of ids, then add back the ones still in the table"""
+        with self._lock:
+            for point_id in ids:
+                source.remove_point(point_id)
+            source.add_points(found_ids, coords, refs)
+
+    def _reread_orders(self, cur, source, order_ids):
+        # Newer ids are loaded by _refresh_orders
+        order_ids = [order_id for order_id in order_ids if order_id <= source.high_water]
+        if not order_ids:
+            return
+        cur.execute("""
+            SELECT order_id, delivery_location
+            FROM orders
+            WHERE order_id = ANY(%s)
+        """, (order_ids,))
+        rows = cur.fetchall()
+        self._replace(source, order_ids, [row[0] for row in rows],
+                      parse_location_column([row[1] for row in rows]))
+
+    def _reread_addresses(self, cur, source, address_ids):
+        address_ids = [address_id for address_id in address_ids if address_id <= source.high_water]
+        if not address_ids:
+            return
+        cur.execute("""
+            SELECT address_id, latitude, longitude, user_id
+            FROM addresses
+            WHERE address_id = ANY(%s)
+        """, (address_ids,))
+        rows = cur.fetchall()
+        self._replace(source, address_ids, [row[0] for row in rows], _address_coords(rows),
+                      refs=[row[3] for row in rows])
+
+    def _refresh_orders(self, cur, source):
+        while True:
+            cur.execute("""
+                SELECT order_id, delivery_location
+                FROM orders
+                WHERE order_id > %s
+                ORDER BY order_id
+                LIMIT %s
+            """, (source.high_water, REFRESH_BATCH_SIZE))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            coords = parse_location_column([row[1] for row in rows])
+            with self._lock:
+                source.add_points(ids, coords)
+            if len(rows) < REFRESH_BATCH_SIZE:
+                break
+
+    def _refresh_addresses(self, cur, source):
+        while True:
+            cur.execute("""
+                SELECT address_id, latitude, longitude, user_id
+                FROM addresses
+                WHERE address_id > %s
+                ORDER BY address_id
+                LIMIT %s
+            """, (source.high_water, REFRESH_BATCH_SIZE))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            coords = _address_coords(rows)
+            with self._lock:
+                source.add_points(ids, coords, refs=[row[3] for row in rows])
+            if len(rows) < REFRESH_BATCH_SIZE:
+                break
+
+    def ensure_fresh(self, connect):
+        """Refresh through connect() (a get_db_connection-style factory) when due"""
+        if self.needs_refresh():
+            with connect() as conn:
+                self.refresh(conn)
+
+    def within_radius(self, source_name, lat, lon, radius_km):
+        with self._lock:
+            return self.sources[source_name].within_radius(lat, lon, radius_km)
+
+    def within_polygon(self, source_name, polygon):
+        with self._lock:
+            return self.sources[source_name].within_polygon(polygon)
+
+    def filter_refs(self, source_name, point=None, radius_km=None, polygon=None):
+        """
+        refs matching every spatial filter given, as a sorted list ready for
+        `= ANY(%s)`; None when no spatial filter applies.
+        """
+        result = None
+        if point is not None and radius_km:
+            result = self.within_radius(source_name, point[0], point[1], radius_km)
+        if polygon is not None:
+            inside = self.within_polygon(source_name, polygon)
+            result = inside if result is None else result & inside
+        return None if result is None else sorted(result)
+
+    def clusters(self, source_name, zoom, bbox=None, limit=1000):
+        """Cluster centroids and counts for one source at a zoom level, largest first"""
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        with self._lock:
+            source = self.sources[source_name]
+            cells = list(source.layer(zoom).items())
+
+        size = cell_size(zoom)
+        clusters = []
+        for (x, y), (count, sum_lat, sum_lon) in cells:
+            lat = sum_lat / count
+            lon = sum_lon / count
+            if bbox is not None:
+                min_lon, min_lat, max_lon, max_lat = bbox
+                if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                    continue
+            clusters.append({
+                'lat': round(lat, 6),
+                'lon': round(lon, 6),
+                'count': count,
+                'cell': f"{zoom}/{x}/{y}",
+                'bounds': [x * size - 180.0, y * size - 90.0,
+                           (x + 1) * size - 180.0, (y + 1) * size - 90.0]
+            })
+
+        clusters.sort(key=lambda c: c['count'], reverse=True)
+        clusters = clusters[:limit]
+        for cluster in clusters:
+            cluster['map_link'] = generate_map_link(cluster['lat'], cluster['lon'], min(zoom + 2, 20))
+        return clusters
+
+
+geo_index = GeoIndex()
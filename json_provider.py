@@ -0,0 +1,131 @@
+# admin_orders_management/json_provider.py
+import json
+import uuid
+import dataclasses
+from datetime import datetime, date, time
+from decimal import Decimal
+
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from formatting import to_ist_naive, IST_OFFSET
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used instead
+    orjson = None
+
+# Responses whose lists hold this many entries in all are streamed
+STREAM_THRESHOLD = 1000
+# Entries encoded per chunk of a streamed response
+STREAM_BATCH_SIZE = 500
+
+_IST_SUFFIX = '+{:02d}:{:02d}'.format(*divmod(int(IST_OFFSET.total_seconds()) // 60, 60))
+
+
+def _ist_isoformat(value):
+    """ISO 8601 in IST; naive database timestamps are treated as UTC"""
+    return to_ist_naive(value).isoformat() + _IST_SUFFIX
+
+
+def _default(obj):
+    """Serialize the types psycopg hands back for admin queries"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        return _ist_isoformat(obj)
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # Datetimes are passed to _default so they are always rendered in IST
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj):
+        return json.dumps(obj, default=_default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def loads(data):
+        return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider with native Decimal/datetime/date handling. Decimals become
+    numbers and datetimes are ISO 8601 strings in IST. Uses orjson when it is
+    installed and falls back to the standard library otherwise.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def stream_json_response(envelope, lists, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream {**envelope, **lists} without building the whole document in
+    memory. lists maps keys to any iterables, e.g. server-side cursors.
+    """
+    head = dumps_bytes(envelope)[:-1]
+
+    def generate():
+        yield head
+        separator = b'' if head == b'{' else b','
+        for key, rows in lists.items():
+            yield separator + dumps_bytes(key) + b':['
+            separator = b','
+            batch = []
+            first = True
+            for row in rows:
+                batch.append(dumps_bytes(row))
+                if len(batch) >= batch_size:
+                    yield (b'' if first else b',') + b','.join(batch)
+                    first = False
+                    batch = []
+            if batch:
+                yield (b'' if first else b',') + b','.join(batch)
+            yield b']'
+        yield b'}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def json_response(envelope, lists, threshold=STREAM_THRESHOLD):
+    """
+    {**envelope, **lists} as a JSON response, streamed by
+    stream_json_response() when the lists hold threshold entries or more
+    (or are iterables of unknown length)
+    """
+    sizes = [len(rows) if hasattr(rows, '__len__') else None for rows in lists.values()]
+    if None not in sizes and sum(sizes) < threshold:
+        return current_app.json.response({**envelope, **lists})
+    return stream_json_response(envelope, lists)
@@ -0,0 +1,265 @@
+# admin_orders_management/log_setup.py
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+from flask import g, request, has_request_context
+
+try:
+    import fcntl
+except ImportError:  # not POSIX; rotation is then only safe with one writer process
+    fcntl = None
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'route'
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'route': getattr(record, 'route', None),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        elif record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request ID and route of the thread that logged them"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.endpoint
+        else:
+            record.request_id = None
+            record.route = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of sub-WARNING records for configured loggers,
+    e.g. {'werkzeug': 0.1} keeps one access log line in ten.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+
+        name = record.name
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return rate >= 1 or random.random() < rate
+            name = name.rpartition('.')[0]
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback in the calling thread, but keep
+        # msg as the bare message so the listener can emit structured output
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotate when the file exceeds max_bytes or is older than interval seconds.
+
+    Every gunicorn worker appends to the same file. Rotation happens under
+    an flock on <file>.lock, whose mtime marks the last rotation, and only
+    if the file is still due once the lock is held; writers whose file was
+    renamed by another process reopen the new one instead of rotating again.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count, interval):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        self.interval = interval
+        self.lock_path = self.baseFilename + '.lock'
+        self._inode = None
+
+    def _open(self):
+        stream = super()._open()
+        self._inode = os.fstat(stream.fileno()).st_ino
+        return stream
+
+    def _replaced(self):
+        """Whether the path no longer names the file this process has open"""
+        try:
+            return os.stat(self.baseFilename).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def _rotated_at(self):
+        try:
+            return os.stat(self.lock_path).st_mtime
+        except FileNotFoundError:
+            open(self.lock_path, 'a').close()
+            return time.time()
+
+    def _due(self, pending=0):
+        if self.interval and time.time() >= self._rotated_at() + self.interval:
+            return True
+        return self.maxBytes > 0 and os.fstat(self.stream.fileno()).st_size + pending >= self.maxBytes
+
+    def shouldRollover(self, record):
+        if self.stream is not None and self._replaced():
+            self.stream.close()
+            self.stream = None
+        if self.stream is None:
+            self.stream = self._open()
+        return self._due(len(self.format(record)) + 1)
+
+    def doRollover(self):
+        with open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self._replaced():
+                    # Another worker rotated while this one waited for the lock
+                    self.stream.close()
+                    self.stream = None
+                elif self._due():
+                    super().doRollover()
+                    os.utime(self.lock_path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+_listener = None
+_listener_handlers = []
+_queue_handler = None
+
+
+def _start_listener():
+    global _listener
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, *_listener_handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The parent's queue may have been locked mid-put by another thread
+    _queue_handler.queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _start_listener()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def setup_logging(config):
+    """
+    Route all logging through a bounded in-memory queue. Request threads only
+    enqueue; a single listener thread formats and writes to disk, so a slow
+    or stalled disk never adds latency to a request.
+    """
+    global _listener_handlers, _queue_handler
+
+    log_file = config.LOG_FILE
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_file,
+        max_bytes=config.LOG_MAX_BYTES,
+        backup_count=config.LOG_BACKUP_COUNT,
+        interval=config.LOG_ROTATE_SECONDS
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    _listener_handlers = [file_handler, console_handler]
+
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLING))
+    _queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    _start_listener()
+    atexit.register(_stop_listener)
+
+    # Listener threads do not survive fork (gunicorn --preload); restart in the child
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+    return _queue_handler
+
+
+def init_request_logging(app):
+    """Assign every request an ID that is attached to its log records and echoed back"""
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER, '')[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
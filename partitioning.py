@@ -0,0 +1,585 @@
+# admin_orders_management/partitioning.py
+import os
+import time
+import logging
+import threading
+from datetime import date, datetime, timezone
+
+import click
+from psycopg import sql
+
+from queries import catalog
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = 'order_date'
+
+# Partitioned tables (parents before children) and their primary key column
+TABLES = {
+    'orders': 'order_id',
+    'order_items': 'order_item_id'
+}
+
+# Indexes the app's queries rely on, created on each partitioned parent
+INDEXES = {
+    'orders': [('order_date',), ('user_id',), ('status',)],
+    'order_items': [('order_id',), ('item_type', 'item_id')]
+}
+
+# order_date given to order_items rows whose writer did not set it; the
+# default partition moves them to their order's month (see swap())
+PENDING_ORDER_DATE = '-infinity'
+
+# pg_advisory lock so only one worker at a time creates partitions
+ADVISORY_LOCK_ID = 7042001
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def staging_name(table):
+    return f"{table}_partitioned"
+
+
+def retired_name(table):
+    return f"{table}_unpartitioned"
+
+
+class PartitionManager:
+    """
+    Monthly range partitioning of orders and order_items on order_date
+    (UTC, like the column). order_items gets its own order_date column,
+    copied from its order, so both tables prune to the same months.
+
+    convert() migrates live tables in three resumable steps: prepare()
+    builds partitioned copies and mirrors every write into them with
+    triggers, backfill() copies existing rows in short batches, and swap()
+    renames the copies into place under a brief exclusive lock. The old
+    tables are kept as <table>_unpartitioned until drop_retired().
+
+    Triggers other modules keep on these tables are recreated by the
+    on_swap() callbacks, in the swap transaction, so no write goes uncaptured.
+
+    ensure_future_partitions() keeps months_ahead empty partitions ready;
+    start() runs it periodically on a daemon thread.
+    """
+
+    def __init__(self, connect, months_ahead=3, batch_size=5000, check_interval=21600):
+        self.connect = connect
+        self.months_ahead = months_ahead
+        self.batch_size = batch_size
+        self.check_interval = check_interval
+        self.last_check = None
+        self.last_error = None
+        self._thread = None
+        self._pid = None
+        self._swap_callbacks = []
+
+    def on_swap(self, callback):
+        """
+        Call callback(cur, tables) in the swap transaction, once the
+        partitioned tables are in place. Usable as a decorator.
+        """
+        self._swap_callbacks.append(callback)
+        return callback
+
+    def _relkind(self, cur, table):
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+        row = cur.fetchone()
+        return row['relkind'] if row else None
+
+    def is_partitioned(self, cur, table):
+        return self._relkind(cur, table) == 'p'
+
+    def detect(self, cur):
+        """Have the query catalog match order_items by month too once it is partitioned"""
+        catalog.partitioned = self.is_partitioned(cur, 'order_items')
+        return catalog.partitioned
+
+    def _columns(self, cur, table):
+        cur.execute("""
+            SELECT attname, format_type(atttypid, atttypmod) as type, attidentity
+            FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+            ORDER BY attnum
+        """, (table,))
+        return cur.fetchall()
+
+    def partitions(self, cur, table):
+        cur.execute("""
+            SELECT
+                c.relname as name,
+                pg_get_expr(c.relpartbound, c.oid) as bounds,
+                GREATEST(c.reltuples, 0)::bigint as estimated_rows
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+        """, (table,))
+        return cur.fetchall()
+
+    def _create_month(self, cur, parent, table, month):
+        """Create one monthly partition of parent; returns its name if it is new"""
+        name = partition_name(table, month)
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL as present", (name,))
+        if cur.fetchone()['present']:
+            return None
+        cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+            sql.Identifier(name), sql.Identifier(parent),
+            sql.Literal(month.isoformat()), sql.Literal(add_months(month, 1).isoformat())
+        ))
+        return name
+
+    def ensure_future_partitions(self, today=None):
+        """Create this month's and the next months_ahead partitions; returns new names"""
+        first = month_start(today or datetime.now(timezone.utc).date())
+        created = []
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                self.detect(cur)
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    return created
+                for table in TABLES:
+                    # Tables mid-conversion need their months too
+                    for parent in (table, staging_name(table)):
+                        if not self.is_partitioned(cur, parent):
+                            continue
+                        for offset in range(self.months_ahead + 1):
+                            name = self._create_month(cur, parent, table, add_months(first, offset))
+                            if name:
+                                created.append(name)
+            conn.commit()
+        if created:
+            logger.info(f"Created partitions: {', '.join(created)}")
+        return created
+
+    def start(self):
+        """Re-run ensure_future_partitions() every check_interval seconds"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='partition-maintenance', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.ensure_future_partitions()
+                self.last_error = None
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+                self.last_error = str(e)
+            self.last_check = time.time()
+            time.sleep(self.check_interval)
+
+    def _pending(self, cur):
+        return [table for table in TABLES if self._relkind(cur, table) == 'r']
+
+    def referencing_keys(self, cur, tables=None):
+        """
+        Foreign keys of other tables pointing at these tables (default: the
+        ones still to convert), which swap() would have to drop
+        """
+        tables = self._pending(cur) if tables is None else tables
+        cur.execute("""
+            SELECT conrelid::regclass::text as owner, conname, confrelid::regclass::text as target
+            FROM pg_constraint
+            WHERE contype = 'f'
+              AND confrelid IN (SELECT to_regclass(name) FROM unnest(%s::text[]) AS name)
+              AND conrelid NOT IN (SELECT to_regclass(name) FROM unnest(%s::text[]) AS name)
+            ORDER BY 1, 2
+        """, (tables, tables))
+        return cur.fetchall()
+
+    def prepare(self, cur, today=None):
+        """
+        Create the partitioned copies, their partitions and indexes, and the
+        triggers mirroring writes on the old tables into them
+        """
+        today = today or datetime.now(timezone.utc).date()
+        tables = [table for table in self._pending(cur) if self._relkind(cur, staging_name(table)) is None]
+        if not tables:
+            return
+
+        cur.execute("SELECT MIN(order_date) as first, COUNT(*) FILTER (WHERE order_date IS NULL) as missing "
+                    "FROM orders")
+        row = cur.fetchone()
+        if row['missing']:
+            raise RuntimeError(f"{row['missing']} orders have no order_date; fix them before converting")
+        first_month = month_start(row['first'] or today)
+
+        for table in tables:
+            staging = staging_name(table)
+            key = TABLES[table]
+
+            columns = self._columns(cur, table)
+            if any(column['attidentity'] for column in columns):
+                raise RuntimeError(f"{table} has identity columns; only serial keys are supported")
+
+            # The partition key has to exist when the table is created
+            partition_column = sql.SQL('')
+            if PARTITION_KEY not in {column['attname'] for column in columns}:
+                order_date_type = next(column['type'] for column in self._columns(cur, 'orders')
+                                       if column['attname'] == PARTITION_KEY)
+                partition_column = sql.SQL(", {} {} NOT NULL DEFAULT {}").format(
+                    sql.Identifier(PARTITION_KEY), sql.SQL(order_date_type), sql.Literal(PENDING_ORDER_DATE))
+
+            cur.execute(sql.SQL("""
+                CREATE TABLE {staging} (
+                    LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+                    INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS
+                    {partition_column}
+                ) PARTITION BY RANGE ({key_column})
+            """).format(staging=sql.Identifier(staging), table=sql.Identifier(table),
+                        partition_column=partition_column, key_column=sql.Identifier(PARTITION_KEY)))
+
+            # Unique keys of a partitioned table must include the partition key
+            cur.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({}, {})").format(
+                sql.Identifier(staging), sql.Identifier(key), sql.Identifier(PARTITION_KEY)))
+            for index_columns in INDEXES[table]:
+                cur.execute(sql.SQL("CREATE INDEX ON {} ({})").format(
+                    sql.Identifier(staging), sql.SQL(', ').join(map(sql.Identifier, index_columns))))
+
+            # Foreign keys to other tables (users, ...) carry over
+            cur.execute("""
+                SELECT conname, pg_get_constraintdef(oid) as definition
+                FROM pg_constraint
+                WHERE conrelid = to_regclass(%s) AND contype = 'f'
+                  AND confrelid NOT IN (SELECT to_regclass(name) FROM unnest(%s::text[]) AS name)
+            """, (table, list(TABLES)))
+            for constraint in cur.fetchall():
+                cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                    sql.Identifier(staging), sql.Identifier(constraint['conname']),
+                    sql.SQL(constraint['definition'])))
+
+            month = first_month
+            last_month = add_months(month_start(today), self.months_ahead)
+            while month <= last_month:
+                self._create_month(cur, staging, table, month)
+                month = add_months(month, 1)
+            cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} DEFAULT").format(
+                sql.Identifier(f"{table}_pdefault"), sql.Identifier(staging)))
+
+            self._install_mirror(cur, table, [column['attname'] for column in columns])
+            logger.info(f"Prepared {staging} from {first_month:%Y-%m}")
+
+    def _install_mirror(self, cur, table, columns):
+        staging = staging_name(table)
+        key = TABLES[table]
+        column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+        values = sql.SQL(', ').join(sql.SQL('NEW.{}').format(sql.Identifier(c)) for c in columns)
+        if PARTITION_KEY not in columns:
+            column_list = sql.SQL('{}, {}').format(column_list, sql.Identifier(PARTITION_KEY))
+            values = sql.SQL("{}, COALESCE((SELECT o.order_date FROM orders o "
+                             "WHERE o.order_id = NEW.order_id), {})").format(
+                values, sql.Literal(PENDING_ORDER_DATE))
+
+        function = sql.Identifier(f"{table}_partition_mirror")
+        cur.execute(sql.SQL("""
+            CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    DELETE FROM {staging} WHERE {key} = OLD.{key};
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    INSERT INTO {staging} ({column_list}) VALUES ({values})
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """).format(function=function, staging=sql.Identifier(staging), key=sql.Identifier(key),
+                    column_list=column_list, values=values))
+        cur.execute(sql.SQL("""
+            CREATE TRIGGER {function} AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {function}()
+        """).format(function=function, table=sql.Identifier(table)))
+
+    def backfill(self, conn, pause=0.0, progress=None):
+        """
+        Copy existing rows into the partitioned copies, batch_size keys per
+        transaction. Rows are locked FOR SHARE while copied, so a concurrent
+        write waits and is then mirrored over the copied version. Safe to
+        re-run after an interruption.
+        """
+        copied = {}
+        with conn.cursor() as cur:
+            pending = [table for table in self._pending(cur)
+                       if self._relkind(cur, staging_name(table)) == 'p']
+        for table in pending:
+            key = TABLES[table]
+            with conn.cursor() as cur:
+                columns = [column['attname'] for column in self._columns(cur, table)]
+                cur.execute(sql.SQL("SELECT MIN({key}) as low, MAX({key}) as high FROM {table}").format(
+                    key=sql.Identifier(key), table=sql.Identifier(table)))
+                bounds = cur.fetchone()
+            conn.commit()
+            if bounds['low'] is None:
+                continue
+
+            source = sql.SQL(', ').join(sql.Identifier('t', c) for c in columns)
+            target = sql.SQL(', ').join(map(sql.Identifier, columns))
+            join = sql.SQL('')
+            if PARTITION_KEY not in columns:
+                source = sql.SQL("{}, COALESCE(o.order_date, {})").format(source, sql.Literal(PENDING_ORDER_DATE))
+                target = sql.SQL('{}, {}').format(target, sql.Identifier(PARTITION_KEY))
+                join = sql.SQL('LEFT JOIN orders o ON o.order_id = t.order_id')
+            statement = sql.SQL("""
+                INSERT INTO {staging} ({target})
+                SELECT {source} FROM {table} t {join}
+                WHERE t.{key} >= %s AND t.{key} < %s
+                FOR SHARE OF t
+                ON CONFLICT DO NOTHING
+            """).format(staging=sql.Identifier(staging_name(table)), target=target, source=source,
+                        table=sql.Identifier(table), join=join, key=sql.Identifier(key))
+
+            copied[table] = 0
+            low = bounds['low']
+            while low <= bounds['high']:
+                with conn.cursor() as cur:
+                    cur.execute(statement, (low, low + self.batch_size))
+                    copied[table] += cur.rowcount
+                conn.commit()
+                low += self.batch_size
+                if progress:
+                    progress(table, min(low, bounds['high'] + 1) - bounds['low'],
+                             bounds['high'] - bounds['low'] + 1)
+                if pause:
+                    time.sleep(pause)
+        return copied
+
+    def swap(self, cur, lock_timeout_ms=5000, drop_foreign_keys=False):
+        """
+        Put the partitioned copies in place of the old tables and run the
+        on_swap() callbacks (one transaction). Refuses while other tables'
+        foreign keys reference them, unless drop_foreign_keys.
+        """
+        pending = [table for table in self._pending(cur)
+                   if self._relkind(cur, staging_name(table)) == 'p']
+        if not pending:
+            return []
+
+        cur.execute(sql.SQL("SET LOCAL lock_timeout = {}").format(sql.Literal(f"{int(lock_timeout_ms)}ms")))
+        cur.execute(sql.SQL("LOCK TABLE {} IN ACCESS EXCLUSIVE MODE").format(
+            sql.SQL(', ').join(map(sql.Identifier, pending))))
+        self._check_foreign_keys(cur, pending, drop_foreign_keys)
+
+        for table in pending:
+            key = TABLES[table]
+            function = sql.Identifier(f"{table}_partition_mirror")
+            cur.execute(sql.SQL("DROP TRIGGER {} ON {}").format(function, sql.Identifier(table)))
+            cur.execute(sql.SQL("DROP FUNCTION {}()").format(function))
+
+            # Foreign keys pointing at the old table would follow it when it
+            # is renamed, and a partitioned table cannot be referenced by
+            # order_id alone, so they are dropped (see _check_foreign_keys)
+            cur.execute("""
+                SELECT conrelid::regclass::text as owner, conname
+                FROM pg_constraint
+                WHERE contype = 'f' AND confrelid = to_regclass(%s)
+            """, (table,))
+            for constraint in cur.fetchall():
+                cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                    sql.SQL(constraint['owner']), sql.Identifier(constraint['conname'])))
+                logger.warning(f"Dropped foreign key {constraint['conname']} on {constraint['owner']} "
+                               f"(references {table})")
+
+            cur.execute("SELECT pg_get_serial_sequence(%s, %s) as sequence", (table, key))
+            sequence = cur.fetchone()['sequence']
+
+            cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                sql.Identifier(table), sql.Identifier(retired_name(table))))
+            cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                sql.Identifier(staging_name(table)), sql.Identifier(table)))
+            if sequence:
+                # Keep the id sequence alive when the old table is dropped
+                cur.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY {}.{}").format(
+                    sql.SQL(sequence), sql.Identifier(table), sql.Identifier(key)))
+
+        if 'order_items' in pending:
+            # Writers that do not know about order_items.order_date insert
+            # PENDING_ORDER_DATE, which lands in the default partition; move
+            # those rows to their order's month straight away
+            cur.execute(sql.SQL("""
+                CREATE OR REPLACE FUNCTION order_items_fill_order_date() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    UPDATE order_items oi
+                    SET order_date = o.order_date
+                    FROM orders o
+                    WHERE o.order_id = NEW.order_id
+                      AND oi.order_item_id = NEW.order_item_id
+                      AND oi.order_date = {pending};
+                    RETURN NULL;
+                END
+                $$
+            """).format(pending=sql.Literal(PENDING_ORDER_DATE)))
+            cur.execute(sql.SQL("""
+                CREATE TRIGGER order_items_fill_order_date AFTER INSERT ON order_items_pdefault
+                FOR EACH ROW WHEN (NEW.order_date = {pending})
+                EXECUTE FUNCTION order_items_fill_order_date()
+            """).format(pending=sql.Literal(PENDING_ORDER_DATE)))
+
+            # Queries match order_items to their order by order_date as
+            # well, so the items follow when an order's date changes. BEFORE:
+            # an order moving to another month fires no AFTER UPDATE triggers
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION orders_move_item_dates() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    UPDATE order_items SET order_date = NEW.order_date
+                    WHERE order_id = NEW.order_id AND order_date = OLD.order_date;
+                    RETURN NEW;
+                END
+                $$
+            """)
+            cur.execute("""
+                CREATE TRIGGER orders_move_item_dates BEFORE UPDATE OF order_date ON orders
+                FOR EACH ROW WHEN (OLD.order_date IS DISTINCT FROM NEW.order_date)
+                EXECUTE FUNCTION orders_move_item_dates()
+            """)
+
+        for callback in self._swap_callbacks:
+            callback(cur, pending)
+        return pending
+
+    def _check_foreign_keys(self, cur, tables, drop_foreign_keys):
+        keys = self.referencing_keys(cur, tables)
+        if keys and not drop_foreign_keys:
+            raise RuntimeError(
+                "These foreign keys reference the tables to convert and would be dropped: "
+                + ', '.join(f"{key['owner']}.{key['conname']} -> {key['target']}" for key in keys)
+                + "; pass drop_foreign_keys (--drop-foreign-keys) to convert anyway")
+
+    def convert(self, pause=0.0, lock_timeout_ms=5000, progress=None, drop_foreign_keys=False):
+        """prepare() + backfill() + swap(), then refresh planner statistics"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                # Before the copy, rather than hours later in swap()
+                self._check_foreign_keys(cur, self._pending(cur), drop_foreign_keys)
+                self.prepare(cur)
+            conn.commit()
+
+            copied = self.backfill(conn, pause=pause, progress=progress)
+
+            with conn.cursor() as cur:
+                swapped = self.swap(cur, lock_timeout_ms, drop_foreign_keys)
+            conn.commit()
+
+            with conn.cursor() as cur:
+                for table in swapped:
+                    cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+            conn.commit()
+
+        logger.info(f"Partitioned {', '.join(swapped) or 'nothing'} (copied {copied})")
+        return swapped
+
+    def drop_retired(self):
+        """Drop the <table>_unpartitioned tables left by convert()"""
+        dropped = []
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                for table in reversed(list(TABLES)):
+                    if self._relkind(cur, retired_name(table)) is not None:
+                        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(retired_name(table))))
+                        dropped.append(retired_name(table))
+            conn.commit()
+        return dropped
+
+    def status(self):
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                return {
+                    table: {
+                        'partitioned': self.is_partitioned(cur, table),
+                        'converting': self._relkind(cur, staging_name(table)) is not None,
+                        'partitions': self.partitions(cur, table)
+                    }
+                    for table in TABLES
+                }
+
+
+def init_partitioning(app, manager):
+    """Register `flask partitions ...` and keep future partitions created"""
+
+    @app.cli.group('partitions')
+    def partitions_group():
+        """Monthly partitions of orders and order_items"""
+
+    @partitions_group.command('status')
+    def status_command():
+        """Show partitioned tables and their partitions"""
+        for table, info in manager.status().items():
+            state = 'partitioned' if info['partitioned'] else 'converting' if info['converting'] else 'plain'
+            click.echo(f"{table}: {state}")
+            for partition in info['partitions']:
+                click.echo(f"  {partition['name']:<28} ~{partition['estimated_rows']:>10} rows  "
+                           f"{partition['bounds']}")
+
+    @partitions_group.command('extend')
+    def extend_command():
+        """Create the upcoming monthly partitions now"""
+        created = manager.ensure_future_partitions()
+        click.echo(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ''))
+
+    @partitions_group.command('convert')
+    @click.option('--batch-size', type=int, default=None, help='Rows copied per transaction')
+    @click.option('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+    @click.option('--lock-timeout-ms', type=int, default=5000)
+    @click.option('--drop-foreign-keys', is_flag=True,
+                  help='Drop the foreign keys of other tables that reference orders or order_items')
+    def convert_command(batch_size, pause, lock_timeout_ms, drop_foreign_keys):
+        """Convert orders and order_items to monthly partitions while the app runs"""
+        if batch_size:
+            manager.batch_size = batch_size
+
+        with manager.connect() as conn:
+            with conn.cursor() as cur:
+                keys = manager.referencing_keys(cur)
+        if keys and not drop_foreign_keys:
+            click.echo("These foreign keys reference the tables to convert. A partitioned table cannot be "
+                       "referenced by its id alone, so they would be dropped:")
+            for key in keys:
+                click.echo(f"  {key['owner']}.{key['conname']} -> {key['target']}")
+            raise click.ClickException("Re-run with --drop-foreign-keys to convert anyway")
+
+        def progress(table, done, total):
+            click.echo(f"\r{table}: {done}/{total} keys", nl=False)
+
+        swapped = manager.convert(pause=pause, lock_timeout_ms=lock_timeout_ms, progress=progress,
+                                  drop_foreign_keys=drop_foreign_keys)
+        click.echo(f"\nPartitioned: {', '.join(swapped) or 'nothing to do'}")
+        for table in swapped:
+            click.echo(f"{table}.{TABLES[table]} is now only unique together with {PARTITION_KEY}; "
+                       f"new ids still come from its sequence, but the database no longer rejects "
+                       f"a duplicate id given explicitly")
+        if swapped and not app.config.get('PARTITION_MAINTENANCE', False):
+            click.echo("Set PARTITION_MAINTENANCE=true so the workers keep future months created")
+        if swapped:
+            click.echo("Old tables are kept as *_unpartitioned; remove them with "
+                       "`flask partitions drop-unpartitioned`")
+
+    @partitions_group.command('drop-unpartitioned')
+    @click.confirmation_option(prompt='Drop the pre-partitioning copies of orders and order_items?')
+    def drop_command():
+        """Drop the tables retired by convert"""
+        dropped = manager.drop_retired()
+        click.echo(f"Dropped: {', '.join(dropped) or 'nothing'}")
+
+    app.extensions['partitions'] = manager
+
+    if app.config.get('PARTITION_MAINTENANCE', False):
+        manager.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=manager.start)
@@ -0,0 +1,331 @@
+# admin_orders_management/popularity.py
+import os
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+import click
+
+from queries import (
+    POPULARITY_TOP_HOURS,
+    POPULARITY_TOP_DAYS,
+    POPULARITY_TOP_TOTAL,
+    POPULARITY_PRUNE_HOURS,
+    POPULARITY_STATUS
+)
+from utils import IST
+
+logger = logging.getLogger(__name__)
+
+# Rolling windows offered by the API, in days; 1 is the last 24 hours
+WINDOWS = (1, 7, 30)
+METRICS = ('quantity', 'revenue')
+
+# pg_advisory lock so only one worker at a time prunes the hourly counters
+ADVISORY_LOCK_ID = 7046001
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS item_sales_deltas (
+        sold_at TIMESTAMP NOT NULL,
+        item_type VARCHAR(20) NOT NULL,
+        item_id INTEGER NOT NULL,
+        item_name VARCHAR(100),
+        quantity BIGINT NOT NULL,
+        revenue NUMERIC(14, 2) NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS item_sales_hourly (
+        hour TIMESTAMP NOT NULL,
+        item_type VARCHAR(20) NOT NULL,
+        item_id INTEGER NOT NULL,
+        item_name VARCHAR(100),
+        quantity BIGINT NOT NULL DEFAULT 0,
+        revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (hour, item_type, item_id)
+    );
+    CREATE TABLE IF NOT EXISTS item_sales_daily (
+        day DATE NOT NULL,
+        item_type VARCHAR(20) NOT NULL,
+        item_id INTEGER NOT NULL,
+        item_name VARCHAR(100),
+        quantity BIGINT NOT NULL DEFAULT 0,
+        revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, item_type, item_id)
+    );
+    CREATE TABLE IF NOT EXISTS item_sales_total (
+        item_type VARCHAR(20) NOT NULL,
+        item_id INTEGER NOT NULL,
+        item_name VARCHAR(100),
+        quantity BIGINT NOT NULL DEFAULT 0,
+        revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (item_type, item_id)
+    );
+    CREATE INDEX IF NOT EXISTS item_sales_total_quantity_idx ON item_sales_total (quantity DESC);
+    CREATE INDEX IF NOT EXISTS item_sales_total_revenue_idx ON item_sales_total (revenue DESC);
+"""
+
+# Sales of the order items in {source}, dated by their order
+SOLD_SQL = """
+    SELECT
+        COALESCE(o.order_date, now() AT TIME ZONE 'UTC') as sold_at,
+        COALESCE(a.item_type, '') as item_type,
+        COALESCE(a.item_id, 0) as item_id,
+        a.item_name,
+        COALESCE(a.quantity, 0) as quantity,
+        COALESCE(a.total, 0) as revenue
+    FROM {source} a
+    LEFT JOIN orders o ON o.order_id = a.order_id
+"""
+
+# Adds the sales rows of {sold} to all three counters in one statement.
+# Rows are grouped per bucket first (ON CONFLICT cannot touch a row twice)
+# and written in key order.
+UPSERT_SQL = """
+    WITH sold AS (
+        {sold}
+    ),
+    hourly AS (
+        INSERT INTO item_sales_hourly AS t (hour, item_type, item_id, item_name, quantity, revenue)
+        SELECT date_trunc('hour', sold_at), item_type, item_id, MAX(item_name), SUM(quantity), SUM(revenue)
+        FROM sold
+        WHERE {hourly_condition}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        ON CONFLICT (hour, item_type, item_id) DO UPDATE SET
+            item_name = EXCLUDED.item_name,
+            quantity = t.quantity + EXCLUDED.quantity,
+            revenue = t.revenue + EXCLUDED.revenue
+        RETURNING 1
+    ),
+    daily AS (
+        INSERT INTO item_sales_daily AS t (day, item_type, item_id, item_name, quantity, revenue)
+        SELECT (sold_at AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')::date, item_type, item_id,
+               MAX(item_name), SUM(quantity), SUM(revenue)
+        FROM sold
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        ON CONFLICT (day, item_type, item_id) DO UPDATE SET
+            item_name = EXCLUDED.item_name,
+            quantity = t.quantity + EXCLUDED.quantity,
+            revenue = t.revenue + EXCLUDED.revenue
+        RETURNING 1
+    )
+    INSERT INTO item_sales_total AS t (item_type, item_id, item_name, quantity, revenue)
+    SELECT item_type, item_id, MAX(item_name), SUM(quantity), SUM(revenue)
+    FROM sold
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (item_type, item_id) DO UPDATE SET
+        item_name = EXCLUDED.item_name,
+        quantity = t.quantity + EXCLUDED.quantity,
+        revenue = t.revenue + EXCLUDED.revenue
+"""
+
+# Deltas committed by now move into the counters; uncommitted ones are
+# invisible to the DELETE and stay for the next run
+FOLD_SQL = UPSERT_SQL.format(
+    sold="DELETE FROM item_sales_deltas RETURNING sold_at, item_type, item_id, item_name, quantity, revenue",
+    hourly_condition='TRUE')
+
+# Writers only append, so concurrent checkouts never wait on a shared
+# counter row; statement-level, so a multi-row insert is one INSERT
+TRIGGER_SQL = """
+    CREATE OR REPLACE FUNCTION item_sales_capture() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO item_sales_deltas (sold_at, item_type, item_id, item_name, quantity, revenue)
+        {sold};
+        RETURN NULL;
+    END
+    $$;
+    DROP TRIGGER IF EXISTS order_items_sales ON order_items;
+    CREATE TRIGGER order_items_sales AFTER INSERT ON order_items
+    REFERENCING NEW TABLE AS added
+    FOR EACH STATEMENT EXECUTE FUNCTION item_sales_capture();
+""".format(sold=SOLD_SQL.format(source='added'))
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class ItemPopularity:
+    """
+    Quantity and revenue sold per item (item_type, item_id) in counter
+    tables: per UTC hour for the recent hours, per IST day, and all time.
+    Top items for a window then read a few thousand counter rows instead
+    of aggregating order_items.
+
+    A trigger on order_items appends each sale to item_sales_deltas in the
+    writer's transaction; writers never update a shared counter row, so
+    checkouts of the same items do not queue behind each other. start()
+    folds the deltas into the counters every fold_interval seconds on a
+    daemon thread, and reads add the few deltas not folded yet.
+
+    Counters only grow: items of orders deleted or archived later still
+    count. Hourly counters older than hourly_retention_hours are pruned
+    every prune_interval seconds.
+    """
+
+    def __init__(self, connect, enabled=True, hourly_retention_hours=48, fold_interval=30, prune_interval=3600):
+        self.connect = connect
+        self.enabled = enabled
+        self.hourly_retention_hours = hourly_retention_hours
+        self.fold_interval = fold_interval
+        self.prune_interval = prune_interval
+        self.last_error = None
+        self._last_prune = 0.0
+        self._thread = None
+        self._pid = None
+
+    # Schema
+
+    def is_installed(self, cur):
+        cur.execute("SELECT to_regclass('item_sales_total') IS NOT NULL as present")
+        return cur.fetchone()['present']
+
+    def install(self, cur, rebuild=True):
+        """
+        Create the counters and the trigger and, with rebuild, recount them
+        from order_items. Inserts into order_items wait until the
+        transaction commits, so none is counted twice or missed.
+        """
+        cur.execute("LOCK TABLE order_items IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(SCHEMA_SQL)
+        cur.execute(TRIGGER_SQL)
+        if not rebuild:
+            return self.status(cur)
+        cur.execute("TRUNCATE item_sales_deltas, item_sales_hourly, item_sales_daily, item_sales_total")
+        cur.execute(UPSERT_SQL.format(
+            sold=SOLD_SQL.format(source='order_items'),
+            hourly_condition=f"sold_at >= now() AT TIME ZONE 'UTC' - INTERVAL '{int(self.hourly_retention_hours)} hours'"))
+        return self.status(cur)
+
+    def install_trigger(self, cur, tables):
+        """partitions swap callback: move the trigger to the new order_items"""
+        # The counters already hold every row copied over
+        if 'order_items' in tables and self.is_installed(cur):
+            cur.execute(TRIGGER_SQL)
+
+    # Reading
+
+    def statement(self, days=None, start_date=None, end_date=None, by='quantity', limit=10, today=None):
+        """
+        (query, params) for the top `limit` items by quantity or revenue:
+        between start_date and end_date (IST days), over the last `days`
+        days (1: the last 24 hours), or of all time
+        """
+        if by not in METRICS:
+            raise ValueError(f"Unknown metric {by!r}")
+        if start_date and end_date:
+            return POPULARITY_TOP_DAYS[by].bind(first_day=_as_date(start_date), last_day=_as_date(end_date),
+                                                limit=limit)
+        if days == 1:
+            return POPULARITY_TOP_HOURS[by].bind(hours=24, limit=limit)
+        if days:
+            today = today or datetime.now(IST).date()
+            return POPULARITY_TOP_DAYS[by].bind(first_day=today - timedelta(days=days - 1), last_day=today,
+                                                limit=limit)
+        return POPULARITY_TOP_TOTAL[by].bind(limit=limit)
+
+    def top(self, cur, **window):
+        cur.execute(*self.statement(**window))
+        return cur.fetchall()
+
+    # Maintenance
+
+    def fold(self):
+        """Move the committed deltas into the counters; returns how many were waiting"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    return 0
+                cur.execute("SELECT COUNT(*) as pending FROM item_sales_deltas")
+                pending = cur.fetchone()['pending']
+                if pending:
+                    cur.execute(FOLD_SQL)
+            conn.commit()
+        return pending
+
+    def prune(self):
+        """Delete hourly counters past the retention period; returns how many"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    return 0
+                cur.execute(*POPULARITY_PRUNE_HOURS.bind(retention_hours=self.hourly_retention_hours))
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+    def status(self, cur):
+        cur.execute(*POPULARITY_STATUS.bind())
+        return cur.fetchone()
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='item-popularity', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.fold()
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+                self.last_error = None
+            except Exception as e:
+                logger.error(f"Item popularity maintenance failed: {e}")
+                self.last_error = str(e)
+            time.sleep(self.fold_interval)
+
+
+def init_popularity(app, popularity):
+    """Register `flask popularity ...` and fold and prune the counters when enabled"""
+
+    @app.cli.group('popularity')
+    def popularity_group():
+        """Per-item sales counters for top items"""
+
+    @popularity_group.command('install')
+    def install_command():
+        """Create the counters and their trigger, rebuilding them from order_items"""
+        with popularity.connect() as conn:
+            with conn.cursor() as cur:
+                info = popularity.install(cur)
+            conn.commit()
+        click.echo(f"Counting {info['items']} items over {info['daily_rows']} item-days")
+
+    @popularity_group.command('status')
+    def status_command():
+        """Show the size of the counters"""
+        with popularity.connect() as conn:
+            with conn.cursor() as cur:
+                info = popularity.status(cur)
+        click.echo(f"{info['items']} items, {info['daily_rows']} item-days since {info['first_day']}, "
+                   f"{info['hourly_rows']} item-hours, {info['pending_rows']} sales not folded yet")
+
+    @popularity_group.command('top')
+    @click.option('--days', type=click.Choice([str(days) for days in WINDOWS]), default=None)
+    @click.option('--by', type=click.Choice(METRICS), default='quantity')
+    @click.option('--limit', type=int, default=10)
+    def top_command(days, by, limit):
+        """Print the top items of a window (all time by default)"""
+        with popularity.connect() as conn:
+            with conn.cursor() as cur:
+                rows = popularity.top(cur, days=int(days) if days else None, by=by, limit=limit)
+        for row in rows:
+            click.echo(f"{row['total_quantity']:>8} {row['total_revenue']:>12} "
+                       f"{row['item_type']:<8} {row['item_name']}")
+
+    app.extensions['popularity'] = popularity
+
+    if popularity.enabled:
+        popularity.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=popularity.start)
@@ -0,0 +1,358 @@
+# admin_orders_management/profiler.py
+import os
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import threading
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+
+from db_metrics import current_db_stats
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+
+
+class CallNode:
+    """One frame in the sampled call tree"""
+
+    __slots__ = ('name', 'samples', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = 0
+        self.children = {}
+
+    def child(self, name):
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = CallNode(name)
+        return node
+
+    def to_dict(self, interval_ms):
+        return {
+            'name': self.name,
+            'samples': self.samples,
+            'ms': round(self.samples * interval_ms, 1),
+            'children': [
+                c.to_dict(interval_ms)
+                for c in sorted(self.children.values(), key=lambda c: c.samples, reverse=True)
+            ]
+        }
+
+
+class WallClockSampler:
+    """
+    Samples the stack of one thread at a fixed interval from a helper thread.
+    Because it samples wall-clock time, frames blocked on the database socket
+    show up the same way as frames burning CPU in formatting loops or Jinja.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = CallNode('request')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.root
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                _add_sample(self.root, frame)
+
+
+class SlowRequestSampler:
+    """
+    One low-frequency sampler thread shared by every request of the process.
+    Requests register their thread and get back a call tree that is filled
+    while they run; finish() hands it back so it can be kept if the request
+    turned out slow and dropped otherwise.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self._roots = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def register(self, thread_id):
+        self._ensure_started()
+        root = CallNode('request')
+        with self._lock:
+            self._roots[thread_id] = root
+        return root
+
+    def finish(self, thread_id):
+        with self._lock:
+            return self._roots.pop(thread_id, None)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            # Forked workers do not inherit the parent's thread
+            self._pid = os.getpid()
+            self._roots = {}
+            self._thread = threading.Thread(target=self._run, name='slow-request-sampler',
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                roots = list(self._roots.items())
+            if not roots:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, root in roots:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    _add_sample(root, frame)
+
+
+def _add_sample(root, frame):
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+
+    node = root
+    node.samples += 1
+    for frame in reversed(stack):
+        node = node.child(_frame_label(frame))
+        node.samples += 1
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    # Jinja compiles templates with the template path as filename
+    if filename.endswith('.html'):
+        return f"{code.co_name} [{_short_path(filename)}]"
+    return f"{code.co_name} ({_short_path(filename)}:{frame.f_lineno})"
+
+
+def _short_path(filename):
+    parts = filename.replace('\\', '/').split('/')
+    if 'site-packages' in parts:
+        return '/'.join(parts[parts.index('site-packages') + 1:])
+    return '/'.join(parts[-2:])
+
+
+class ProfileStore:
+    """Profiles saved as JSON under logs/, newest kept up to a retention cap"""
+
+    def __init__(self, directory, retention=200):
+        self.directory = directory
+        self.retention = retention
+        self._lock = threading.Lock()
+
+    def new_name(self, profile):
+        return "{}_{}_{}ms.json".format(
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f'),
+            profile['endpoint'] or 'unmatched',
+            int(profile['duration_ms'])
+        )
+
+    def write(self, name, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), 'w') as f:
+            json.dump(profile, f)
+
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            names = self.list()
+            for old in names[self.retention:]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Profile file names, newest first"""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        return sorted(names, reverse=True)
+
+    def load(self, name):
+        # Only plain names from list() are accepted
+        if name != os.path.basename(name) or name not in self.list():
+            return None
+        with open(os.path.join(self.directory, name)) as f:
+            return json.load(f)
+
+
+def _log_slow_request(path, entry):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        logger.error(f"Error writing slow request log: {e}")
+
+
+class BackgroundWriter:
+    """
+    Runs file writes on a daemon thread so request hooks never wait on the
+    disk. At most max_pending writes wait; further ones are dropped.
+    """
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def submit(self, func, *args):
+        try:
+            self._queue.put_nowait((func, args))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        # The parent's queue may have been locked mid-put by another thread
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._thread = threading.Thread(target=self._run, name='profile-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"Error writing request profile data: {e}")
+
+
+def init_profiler(app):
+    """
+    Register request hooks for sampled/flagged profiling and the slow-request
+    log. Requests that are not fully profiled are still sampled every
+    SLOW_PROFILE_INTERVAL_MS, and that coarser call tree is saved when they
+    exceed SLOW_REQUEST_THRESHOLD_MS.
+    """
+
+    sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0.0)
+    threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 1000) / 1000.0
+    interval = app.config.get('PROFILER_INTERVAL_MS', 5) / 1000.0
+    log_dir = app.config.get('PROFILE_DIR', 'logs/profiles')
+    slow_log = app.config.get('SLOW_REQUEST_LOG', 'logs/slow_requests.log')
+    slow_interval = app.config.get('SLOW_PROFILE_INTERVAL_MS', 50) / 1000.0
+    slow_sampler = SlowRequestSampler(slow_interval) if slow_interval > 0 else None
+
+    store = ProfileStore(log_dir, app.config.get('PROFILE_RETENTION', 200))
+    app.extensions['profile_store'] = store
+
+    writer = BackgroundWriter()
+    writer.start()
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=writer.start)
+
+    @app.before_request
+    def start_profiler():
+        g.request_started = time.perf_counter()
+        g.profile_forced = False
+
+        if request.endpoint == 'static':
+            return
+
+        if request.headers.get(PROFILE_HEADER) == '1':
+            if current_user.is_authenticated and current_user.role == 'superadmin':
+                g.profile_forced = True
+
+        if g.profile_forced or (sample_rate > 0 and random.random() < sample_rate):
+            g.profiler = WallClockSampler(threading.get_ident(), interval).start()
+        elif slow_sampler is not None:
+            g.slow_sample = slow_sampler.register(threading.get_ident())
+
+    @app.after_request
+    def finish_profiler(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        is_slow = duration >= threshold
+        sampler = g.pop('profiler', None)
+        if sampler is not None:
+            root = sampler.stop()
+            root_interval = interval
+        elif g.pop('slow_sample', None) is not None:
+            root = slow_sampler.finish(threading.get_ident())
+            root_interval = slow_interval
+        else:
+            root = None
+
+        if root is None or not (is_slow or g.profile_forced):
+            if is_slow:
+                writer.submit(_log_slow_request, slow_log, _summary(response, duration))
+            return response
+
+        summary = _summary(response, duration)
+        profile = dict(summary,
+                       forced=g.profile_forced,
+                       interval_ms=root_interval * 1000,
+                       tree=root.to_dict(root_interval * 1000))
+        # Named now so the response can point at it; written in the background
+        name = store.new_name(profile)
+        writer.submit(store.write, name, profile)
+        response.headers['X-Profile-Id'] = name
+        summary['profile'] = name
+
+        if is_slow:
+            writer.submit(_log_slow_request, slow_log, summary)
+        return response
+
+    @app.teardown_request
+    def drop_profiler(exc):
+        # after_request is skipped when the view raised
+        sampler = g.pop('profiler', None)
+        if sampler is not None:
+            sampler.stop()
+        if g.pop('slow_sample', None) is not None:
+            slow_sampler.finish(threading.get_ident())
+
+
+def _summary(response, duration):
+    stats = current_db_stats()
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 1),
+        'db_queries': stats.query_count if stats else None,
+        'db_ms': round(stats.total_time * 1000, 1) if stats else None,
+        'user': current_user.username if current_user.is_authenticated else None,
+        'profile': None
+    }
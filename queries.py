@@ -0,0 +1,1047 @@
+# admin_orders_management/queries.py
+"""
+Catalog of the admin app's SQL. Every statement is declared once under a
+name with a fixed set of named parameter slots. InstrumentedCursor (and the
+async backend) recognise catalog statements, execute them as server-side
+prepared statements and record per-statement call counts and timings.
+
+    sql, params = ORDER_DETAIL.bind(order_id=42)
+    cur.execute(sql, params)
+
+Optional filters are declared apart from the SQL, which marks their place
+with {filters}. bind() leaves out the ones given as None, so every filter
+combination in use gets its own text and prepared plan. A single catch-all
+`(%(x)s IS NULL OR col = %(x)s)` text could end up on a generic plan that
+uses none of the filters' indexes.
+
+Statements over order_items mark with {items_month} where, once the tables
+are partitioned by month (`flask partitions convert`), an order_date match
+lets the planner probe only the order's month. bind() returns that variant
+after catalog.partitioned is set.
+"""
+import textwrap
+import threading
+
+
+class Statement:
+    """One named SQL statement and its usage counters"""
+
+    __slots__ = ('name', 'sql', 'partitioned_sql', 'params', 'filters', 'catalog', '_texts',
+                 'calls', 'timed_calls', 'total_time', 'max_time', 'errors')
+
+    def __init__(self, name, sql, params=(), partitioned_sql=None, filters=None, catalog=None):
+        self.name = name
+        self.sql = sql
+        self.partitioned_sql = partitioned_sql
+        self.params = tuple(params)
+        self.filters = dict(filters or {})
+        self.catalog = catalog
+        self._texts = {}
+        self.calls = 0
+        self.timed_calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.errors = 0
+
+    def bind(self, **values):
+        """(sql, params) for cursor.execute(); every slot must be given, and only those"""
+        if set(values) != set(self.params):
+            missing = sorted(set(self.params) - set(values))
+            unexpected = sorted(set(values) - set(self.params))
+            raise TypeError(f"{self.name}: missing {missing}, unexpected {unexpected}")
+        partitioned = bool(self.partitioned_sql and self.catalog is not None and self.catalog.partitioned)
+        sql = self.partitioned_sql if partitioned else self.sql
+        if self.filters:
+            sql = self._filtered(sql, partitioned, tuple(slot for slot in self.filters
+                                                         if values[slot] is not None))
+        return (sql, values or None)
+
+    def _filtered(self, sql, partitioned, active):
+        """sql with the conditions of the active filters in place of {filters}"""
+        text = self._texts.get((partitioned, active))
+        if text is None:
+            conditions = ''.join(f"\n  AND {self.filters[slot]}" for slot in active)
+            text = sql.replace(FILTERS, conditions)
+            self._texts[(partitioned, active)] = text
+            if self.catalog is not None:
+                self.catalog.register(text, self)
+        return text
+
+    def __repr__(self):
+        return f"<Statement {self.name}>"
+
+
+class QueryCatalog:
+    """Registry of named statements, looked up by name or by SQL text"""
+
+    def __init__(self):
+        self._by_name = {}
+        self._by_sql = {}
+        self._lock = threading.Lock()
+        # order_items is partitioned by month; set by PartitionManager.detect()
+        self.partitioned = False
+
+    def define(self, name, sql, params=(), items_month=None, filters=None):
+        """
+        items_month: what {items_month} in sql becomes on partitioned tables
+        (nothing on plain ones, whose order_items has no order_date).
+        filters: {slot: condition} of the optional filters for {filters};
+        their slots are added to params.
+        """
+        if name in self._by_name:
+            raise ValueError(f"Statement {name!r} is already defined")
+        partitioned_sql = None
+        if items_month:
+            partitioned_sql = textwrap.dedent(sql.replace(ITEMS_MONTH, items_month)).strip()
+        params = tuple(filters or ()) + tuple(params)
+        statement = Statement(name, textwrap.dedent(sql.replace(ITEMS_MONTH, '')).strip(), params,
+                              partitioned_sql=partitioned_sql, filters=filters, catalog=self)
+        self._by_name[name] = statement
+        self._by_sql[statement.sql] = statement
+        if partitioned_sql:
+            self._by_sql[partitioned_sql] = statement
+        return statement
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def register(self, sql, statement):
+        """Make another text of statement (a filter combination) known to lookup()"""
+        with self._lock:
+            self._by_sql[sql] = statement
+
+    def lookup(self, sql):
+        """Statement whose SQL text this is, or None for ad-hoc SQL"""
+        return self._by_sql.get(sql)
+
+    def record(self, statement, elapsed=None, error=False):
+        """Count one execution; elapsed is None when it cannot be timed (pipeline mode)"""
+        with self._lock:
+            statement.calls += 1
+            if error:
+                statement.errors += 1
+            if elapsed is not None:
+                statement.timed_calls += 1
+                statement.total_time += elapsed
+                if elapsed > statement.max_time:
+                    statement.max_time = elapsed
+
+    def stats(self):
+        """Per-statement counters, most total time first"""
+        with self._lock:
+            rows = [{
+                'name': s.name,
+                'calls': s.calls,
+                'errors': s.errors,
+                'total_ms': round(s.total_time * 1000, 3),
+                'mean_ms': round(s.total_time * 1000 / s.timed_calls, 3) if s.timed_calls else None,
+                'max_ms': round(s.max_time * 1000, 3)
+            } for s in self._by_name.values()]
+        rows.sort(key=lambda row: (row['total_ms'], row['calls']), reverse=True)
+        return rows
+
+    def render_metrics(self):
+        """Prometheus counters for /metrics"""
+        lines = [
+            "# HELP admin_query_calls_total Executions per catalog statement",
+            "# TYPE admin_query_calls_total counter",
+        ]
+        timings = [
+            "# HELP admin_query_seconds_total Timed execution seconds per catalog statement",
+            "# TYPE admin_query_seconds_total counter",
+        ]
+        with self._lock:
+            for name, s in sorted(self._by_name.items()):
+                lines.append(f'admin_query_calls_total{{statement="{name}"}} {s.calls}')
+                timings.append(f'admin_query_seconds_total{{statement="{name}"}} {s.total_time:.6f}')
+        return "\n".join(lines + timings) + "\n"
+
+
+# See define(); order_items matched to its order o by order_date as well
+ITEMS_MONTH = '{items_month}'
+FILTERS = '{filters}'
+ITEMS_MONTH_JOIN = 'AND oi.order_date = o.order_date'
+
+catalog = QueryCatalog()
+define = catalog.define
+
+
+# Today's IST calendar date, whatever the session's TimeZone (CURRENT_DATE follows it)
+IST_TODAY = "(now() AT TIME ZONE 'Asia/Kolkata')::date"
+
+
+def ist_days(first, last, column='order_date'):
+    """
+    Condition for `column` (a UTC timestamp) falling on the IST calendar days
+    first..last (SQL date expressions). It compares the bare column with a
+    range, so an index on it applies and monthly partitions outside the
+    range are pruned, which DATE(column AT TIME ZONE ...) = ... prevents.
+    """
+    return (f"{ist_since(first, column)} "
+            f"AND {column} < ((({last}) + 1)::timestamp AT TIME ZONE 'Asia/Kolkata' AT TIME ZONE 'UTC')")
+
+
+def ist_since(first, column='order_date'):
+    """Condition for `column` falling on IST day `first` or later, like ist_days() without an end"""
+    return f"{column} >= (({first})::timestamp AT TIME ZONE 'Asia/Kolkata' AT TIME ZONE 'UTC')"
+
+
+# ============================================
+# COUNTS
+# ============================================
+
+# Row count as of the last VACUUM/ANALYZE; -1 if the table was never analyzed.
+# Partitioned tables have no estimate of their own, so their partitions' are summed
+TABLE_ROW_ESTIMATE = define('counts.table_estimate', """
+    SELECT
+        CASE WHEN c.relkind = 'p' THEN (
+            SELECT COALESCE(SUM(GREATEST(p.reltuples, 0)), -1)
+            FROM pg_inherits i
+            JOIN pg_class p ON p.oid = i.inhrelid
+            WHERE i.inhparent = c.oid
+        ) ELSE c.reltuples END::bigint as estimate
+    FROM pg_class c
+    WHERE c.oid = %(table)s::regclass
+""", ('table',))
+
+
+# ============================================
+# ADMIN USERS
+# ============================================
+
+_ADMIN_COLUMNS = "id, username, email, full_name, role, is_active, session_version"
+
+ADMIN_BY_ID = define('admin.by_id', f"""
+    SELECT {_ADMIN_COLUMNS}
+    FROM admin_users
+    WHERE id = %(user_id)s
+""", ('user_id',))
+
+ADMIN_BY_USERNAME = define('admin.by_username', f"""
+    SELECT {_ADMIN_COLUMNS}, password_hash
+    FROM admin_users
+    WHERE username = %(username)s
+""", ('username',))
+
+# Matches only while the hash the password was verified against is current,
+# so a reset committed during verification is not overwritten or bypassed
+ADMIN_RECORD_LOGIN = define('admin.record_login', f"""
+    UPDATE admin_users
+    SET last_login = CURRENT_TIMESTAMP,
+        password_hash = COALESCE(%(password_hash)s, password_hash)
+    WHERE id = %(user_id)s
+      AND password_hash = %(verified_hash)s
+      AND is_active
+    RETURNING {_ADMIN_COLUMNS}
+""", ('user_id', 'verified_hash', 'password_hash'))
+
+ADMIN_CREATE = define('admin.create', f"""
+    INSERT INTO admin_users (username, email, password_hash, full_name, role)
+    VALUES (%(username)s, %(email)s, %(password_hash)s, %(full_name)s, %(role)s)
+    ON CONFLICT (username) DO UPDATE
+    SET email = EXCLUDED.email,
+        password_hash = EXCLUDED.password_hash,
+        full_name = COALESCE(EXCLUDED.full_name, admin_users.full_name),
+        role = EXCLUDED.role,
+        session_version = admin_users.session_version + 1
+    RETURNING {_ADMIN_COLUMNS}
+""", ('username', 'email', 'password_hash', 'full_name', 'role'))
+
+ADMIN_REVOKE_SESSIONS = define('admin.revoke_sessions', f"""
+    UPDATE admin_users
+    SET session_version = session_version + 1
+    WHERE username = %(username)s
+    RETURNING {_ADMIN_COLUMNS}
+""", ('username',))
+
+
+# ============================================
+# DASHBOARD
+# ============================================
+
+DASHBOARD_TODAYS_ORDERS = define('dashboard.todays_orders', """
+    SELECT
+        o.order_id,
+        o.user_name,
+        o.user_phone,
+        o.total_amount,
+        o.status,
+        o.order_date,
+        COUNT(oi.order_item_id) as item_count
+    FROM orders o
+    LEFT JOIN order_items oi ON o.order_id = oi.order_id {items_month}
+    WHERE """ + ist_days('%(day)s::date', '%(day)s::date', 'o.order_date') + """
+    -- (order_id, order_date) is the key once orders is partitioned
+    GROUP BY o.order_id, o.order_date
+    ORDER BY o.order_date DESC
+    LIMIT 50
+""", ('day',), items_month=ITEMS_MONTH_JOIN)
+
+DASHBOARD_RECENT_ACTIVITIES = define('dashboard.recent_activities', """
+    SELECT
+        o.order_id,
+        o.user_name,
+        o.status,
+        o.order_date,
+        CASE
+            WHEN o.status = 'pending' THEN 'warning'
+            WHEN o.status = 'processing' THEN 'info'
+            WHEN o.status = 'completed' THEN 'success'
+            WHEN o.status = 'cancelled' THEN 'danger'
+            ELSE 'secondary'
+        END as status_badge
+    FROM orders o
+    ORDER BY o.order_date DESC
+    LIMIT 10
+""")
+
+DASHBOARD_STATUS_DISTRIBUTION = define('dashboard.status_distribution', """
+    SELECT
+        status,
+        COUNT(*) as count,
+        ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM orders), 1) as percentage
+    FROM orders
+    GROUP BY status
+    ORDER BY count DESC
+""")
+
+DASHBOARD_TOP_ITEMS = define('dashboard.top_items', """
+    SELECT
+        oi.item_name,
+        oi.item_type,
+        SUM(oi.quantity) as total_quantity,
+        SUM(oi.total) as total_revenue
+    FROM order_items oi
+    GROUP BY oi.item_name, oi.item_type
+    ORDER BY total_quantity DESC
+    LIMIT %(limit)s
+""", ('limit',))
+
+# Header badges injected into every page
+HEADER_TODAY_ORDERS = define('header.today_orders', """
+    SELECT COUNT(*) as count
+    FROM orders
+    WHERE """ + ist_days(IST_TODAY, IST_TODAY) + """
+""")
+
+HEADER_PENDING_ORDERS = define('header.pending_orders', """
+    SELECT COUNT(*) as count
+    FROM orders
+    WHERE status = 'pending'
+""")
+
+HEADER_TODAY_REVENUE = define('header.today_revenue', """
+    SELECT COALESCE(SUM(total_amount), 0) as revenue
+    FROM orders
+    WHERE """ + ist_days(IST_TODAY, IST_TODAY) + """
+    AND status != 'cancelled'
+""")
+
+
+# ============================================
+# ORDERS
+# ============================================
+
+# Every filter has a slot; None leaves its condition out (see define())
+ORDERS_FILTERS = {
+    'search': """(o.user_name ILIKE %(search)s
+           OR o.user_phone ILIKE %(search)s
+           OR o.user_email ILIKE %(search)s
+           OR CAST(o.order_id AS TEXT) ILIKE %(search)s)""",
+    'status': "o.status = %(status)s",
+    'start_date': "DATE(o.order_date) >= %(start_date)s::date",
+    'end_date': "DATE(o.order_date) <= %(end_date)s::date",
+    'order_ids': "o.order_id = ANY(%(order_ids)s::int[])"
+}
+
+_ORDERS_FILTERED = """
+    FROM orders o
+    LEFT JOIN order_items oi ON o.order_id = oi.order_id {items_month}
+    LEFT JOIN payments p ON o.order_id = p.order_id
+    WHERE TRUE {filters}
+"""
+
+ORDERS_PAGE = define('orders.page', """
+    SELECT
+        o.order_id,
+        o.user_id,
+        o.user_name,
+        o.user_phone,
+        o.user_email,
+        o.total_amount,
+        o.status,
+        o.order_date,
+        o.delivery_location,
+        COUNT(oi.order_item_id) as item_count,
+        p.payment_status,
+        p.payment_mode
+""" + _ORDERS_FILTERED + """
+    GROUP BY o.order_id, o.user_id, o.user_name, o.user_phone,
+             o.user_email, o.total_amount, o.status, o.order_date,
+             o.delivery_location, p.payment_status, p.payment_mode
+    ORDER BY o.order_date DESC NULLS LAST
+    LIMIT %(limit)s OFFSET %(offset)s
+""", ('limit', 'offset'), items_month=ITEMS_MONTH_JOIN, filters=ORDERS_FILTERS)
+
+# The same rows for the JSON listing, paged by keyset instead of OFFSET:
+# rows after the (order_date, order_id) of the previous page's last row.
+# Orders without a date come last; after_date is NULL once the cursor is
+# among them
+ORDERS_PAGE_AFTER = define('orders.page_after', """
+    SELECT
+        o.order_id,
+        o.user_id,
+        o.user_name,
+        o.user_phone,
+        o.user_email,
+        o.total_amount,
+        o.status,
+        o.order_date,
+        COUNT(oi.order_item_id) as item_count,
+        p.payment_status,
+        p.payment_mode
+""" + _ORDERS_FILTERED + """
+    GROUP BY o.order_id, o.user_id, o.user_name, o.user_phone,
+             o.user_email, o.total_amount, o.status, o.order_date,
+             p.payment_status, p.payment_mode
+    ORDER BY o.order_date DESC NULLS LAST, o.order_id DESC
+    LIMIT %(limit)s
+""", ('after_date', 'limit'), items_month=ITEMS_MONTH_JOIN, filters=dict(ORDERS_FILTERS, after_id="""(
+      (o.order_date, o.order_id) < (%(after_date)s::timestamp, %(after_id)s::int)
+      OR (o.order_date IS NULL
+          AND (%(after_date)s::timestamp IS NOT NULL OR o.order_id < %(after_id)s::int)))"""))
+
+# Listing rows are one per order and payment; order items only add to
+# item_count, so the counts leave them out and stop reading at the cap
+_ORDERS_COUNTED = """
+    FROM orders o
+    LEFT JOIN payments p ON o.order_id = p.order_id
+    WHERE TRUE {filters}
+"""
+
+ORDERS_COUNT = define('orders.count', """
+    SELECT COUNT(*) as count
+""" + _ORDERS_COUNTED, filters=ORDERS_FILTERS)
+
+ORDERS_COUNT_CAPPED = define('orders.count_capped', """
+    SELECT COUNT(*) as count FROM (
+        SELECT 1
+""" + _ORDERS_COUNTED + """
+        LIMIT %(cap)s
+    ) AS subquery
+""", ('cap',), filters=ORDERS_FILTERS)
+
+ORDERS_STATUS_COUNTS = define('orders.status_counts', """
+    SELECT status, COUNT(*) as count
+    FROM orders
+    GROUP BY status
+    ORDER BY count DESC
+""")
+
+ORDER_DETAIL = define('orders.detail', """
+    SELECT
+        o.*,
+        p.payment_status,
+        p.payment_mode,
+        p.transaction_id,
+        p.payment_date,
+        p.razorpay_order_id,
+        p.razorpay_payment_id,
+        p.razorpay_signature
+    FROM orders o
+    LEFT JOIN payments p ON o.order_id = p.order_id
+    WHERE o.order_id = %(order_id)s
+""", ('order_id',))
+
+ORDER_ITEMS = define('orders.items', """
+    SELECT
+        oi.*,
+        CASE
+            WHEN oi.item_type = 'service' THEN s.photo
+            WHEN oi.item_type = 'menu' THEN m.photo
+            ELSE oi.item_photo
+        END as item_photo_cloudinary
+    FROM order_items oi
+    LEFT JOIN services s ON oi.item_type = 'service' AND oi.item_id = s.id
+    LEFT JOIN menu m ON oi.item_type = 'menu' AND oi.item_id = m.id
+    WHERE oi.order_id = %(order_id)s {items_month}
+    ORDER BY oi.order_item_id
+""", ('order_id', 'order_date'), items_month='AND oi.order_date = %(order_date)s')
+
+ORDER_CUSTOMER = define('orders.customer', """
+    SELECT
+        u.*,
+        a.full_name as address_name,
+        a.phone as address_phone,
+        a.address_line1,
+        a.address_line2,
+        a.landmark,
+        a.city,
+        a.state,
+        a.pincode,
+        a.latitude,
+        a.longitude
+    FROM users u
+    LEFT JOIN addresses a ON u.id = a.user_id AND a.is_default = TRUE
+    WHERE u.id = %(user_id)s
+""", ('user_id',))
+
+ORDER_UPDATE_STATUS = define('orders.update_status', """
+    UPDATE orders
+    SET status = %(status)s, notes = COALESCE(%(notes)s, notes)
+    WHERE order_id = %(order_id)s
+    RETURNING order_id, status
+""", ('status', 'notes', 'order_id'))
+
+ORDER_STATUS_HISTORY_INSERT = define('orders.status_history_insert', """
+    INSERT INTO orders_status_history
+    (order_id, old_status, new_status, changed_by, notes)
+    VALUES (%(order_id)s, (SELECT status FROM orders WHERE order_id = %(order_id)s), %(status)s, %(changed_by)s, %(notes)s)
+""", ('order_id', 'status', 'changed_by', 'notes'))
+
+PAYMENT_UPDATE_STATUS = define('payments.update_status', """
+    UPDATE payments
+    SET payment_status = %(payment_status)s,
+        transaction_id = CASE WHEN %(transaction_id)s != '' THEN %(transaction_id)s ELSE transaction_id END,
+        payment_date = CASE WHEN %(payment_status)s = 'completed' THEN CURRENT_TIMESTAMP ELSE payment_date END
+    WHERE order_id = %(order_id)s
+    RETURNING payment_id, payment_status
+""", ('payment_status', 'transaction_id', 'order_id'))
+
+PAYMENT_CREATE_FOR_ORDER = define('payments.create_for_order', """
+    INSERT INTO payments (order_id, user_id, amount, payment_mode, payment_status, transaction_id)
+    SELECT
+        o.order_id,
+        o.user_id,
+        o.total_amount,
+        o.payment_mode,
+        %(payment_status)s,
+        %(transaction_id)s
+    FROM orders o
+    WHERE o.order_id = %(order_id)s
+    RETURNING payment_id, payment_status
+""", ('payment_status', 'transaction_id', 'order_id'))
+
+
+# ============================================
+# STATISTICS
+# ============================================
+
+_STATISTICS_SUMMARY = """
+    SELECT
+        COUNT(*) as total_orders,
+        COALESCE(SUM(CASE WHEN status != 'cancelled' THEN total_amount ELSE 0 END), 0) as total_revenue,
+        COUNT(DISTINCT user_id) as total_customers,
+        AVG(CASE WHEN status != 'cancelled' THEN total_amount ELSE NULL END) as avg_order_value,
+        COUNT(total_amount) FILTER (WHERE status != 'cancelled') as revenue_orders,
+        SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_orders,
+        SUM(CASE WHEN status = 'completed' OR status = 'delivered' THEN 1 ELSE 0 END) as completed_orders,
+        SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_orders
+    FROM orders
+    WHERE {condition}
+"""
+
+# One statement per period, keyed the way calculate_statistics() names them
+STATISTICS_SUMMARY = {
+    'today': define('statistics.summary.today', _STATISTICS_SUMMARY.format(
+        condition=ist_days(IST_TODAY, IST_TODAY))),
+    'week': define('statistics.summary.week', _STATISTICS_SUMMARY.format(
+        condition=ist_since(IST_TODAY + ' - 7'))),
+    'month': define('statistics.summary.month', _STATISTICS_SUMMARY.format(
+        condition=ist_since(IST_TODAY + ' - 30'))),
+    'custom': define('statistics.summary.custom', _STATISTICS_SUMMARY.format(
+        condition=ist_days('%(start_date)s::date', '%(end_date)s::date')), ('start_date', 'end_date')),
+    'all': define('statistics.summary.all', _STATISTICS_SUMMARY.format(condition="1=1")),
+}
+
+STATISTICS_TODAY = define('statistics.today', """
+    SELECT
+        COUNT(*) as today_orders,
+        COALESCE(SUM(CASE WHEN status != 'cancelled' THEN total_amount ELSE 0 END), 0) as today_revenue
+    FROM orders
+    WHERE """ + ist_days(IST_TODAY, IST_TODAY) + """
+""")
+
+STATISTICS_DAILY_RANGE = define('statistics.daily_range', """
+    SELECT
+        DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
+        COUNT(*) as order_count,
+        SUM(total_amount) as total_revenue
+    FROM orders
+    WHERE """ + ist_days('%(start_date)s::date', '%(end_date)s::date') + """
+    GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
+    ORDER BY date
+""", ('start_date', 'end_date'))
+
+STATISTICS_DAILY_LAST_7_DAYS = define('statistics.daily_last_7_days', """
+    SELECT
+        DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
+        COUNT(*) as order_count,
+        SUM(total_amount) as total_revenue
+    FROM orders
+    WHERE """ + ist_since(IST_TODAY + ' - 7') + """
+    GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
+    ORDER BY date
+""")
+
+STATISTICS_CATEGORIES = define('statistics.categories', """
+    SELECT
+        item_type as category,
+        COUNT(*) as order_count,
+        SUM(total) as total_revenue
+    FROM order_items
+    GROUP BY item_type
+    ORDER BY total_revenue DESC
+""")
+
+STATISTICS_PAYMENT_METHODS = define('statistics.payment_methods', """
+    SELECT
+        COALESCE(payment_mode, 'Unknown') as method,
+        COUNT(*) as order_count,
+        SUM(amount) as total_amount
+    FROM payments
+    WHERE payment_status = 'completed'
+    GROUP BY payment_mode
+    ORDER BY total_amount DESC
+""")
+
+CHART_DAILY_ORDERS = define('charts.daily_orders', """
+    SELECT
+        TO_CHAR(DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata'), 'Mon DD') as label,
+        DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') as date,
+        COUNT(*) as orders,
+        COALESCE(SUM(total_amount), 0) as revenue
+    FROM orders
+    WHERE """ + ist_since(IST_TODAY + ' - 30') + """
+    GROUP BY DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')
+    ORDER BY date
+""")
+
+CHART_STATUS_DISTRIBUTION = define('charts.status_distribution', """
+    SELECT
+        status,
+        COUNT(*) as count
+    FROM orders
+    GROUP BY status
+""")
+
+CHART_TOP_ITEMS = define('charts.top_items', """
+    SELECT
+        item_name,
+        SUM(quantity) as total_quantity
+    FROM order_items
+    GROUP BY item_name
+    ORDER BY total_quantity DESC
+    LIMIT %(limit)s
+""", ('limit',))
+
+CHART_HOURLY_ORDERS = define('charts.hourly_orders', """
+    SELECT
+        EXTRACT(HOUR FROM order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')::int as hour,
+        COUNT(*) as orders
+    FROM orders
+    WHERE """ + ist_since(IST_TODAY + ' - 30') + """
+    GROUP BY 1
+""")
+
+# Columns of the in-process analytics snapshot (analytics.py), in order_id order
+_ANALYTICS_COLUMNS = """
+    SELECT
+        order_id,
+        COALESCE(EXTRACT(EPOCH FROM order_date), 0)::bigint as order_epoch,
+        COALESCE(ROUND(total_amount * 100), 0)::bigint as amount_paise,
+        status,
+        user_id
+    FROM orders
+"""
+
+ANALYTICS_ORDERS_AFTER = define('analytics.orders_after', _ANALYTICS_COLUMNS + """
+    WHERE order_id > %(after_id)s
+    ORDER BY order_id
+    LIMIT %(limit)s
+""", ('after_id', 'limit'))
+
+ANALYTICS_ORDERS_BY_ID = define('analytics.orders_by_id', _ANALYTICS_COLUMNS + """
+    WHERE order_id = ANY(%(order_ids)s::bigint[])
+    ORDER BY order_id
+""", ('order_ids',))
+
+
+# ============================================
+# CUSTOMERS
+# ============================================
+
+CUSTOMERS_FILTERS = {
+    'search': """(u.full_name ILIKE %(search)s
+           OR u.phone ILIKE %(search)s
+           OR u.email ILIKE %(search)s)""",
+    'user_ids': "u.id = ANY(%(user_ids)s::int[])"
+}
+
+_CUSTOMERS_FILTERED = """
+    FROM users u
+    LEFT JOIN orders o ON u.id = o.user_id
+    WHERE TRUE {filters}
+"""
+
+CUSTOMERS_PAGE = define('customers.page', """
+    SELECT
+        u.id,
+        u.full_name,
+        u.phone,
+        u.email,
+        u.profile_pic,
+        u.location,
+        u.created_at,
+        u.last_login,
+        u.is_active,
+        COUNT(o.order_id) as total_orders,
+        COALESCE(SUM(o.total_amount), 0) as total_spent
+""" + _CUSTOMERS_FILTERED + """
+    GROUP BY u.id, u.full_name, u.phone, u.email, u.profile_pic,
+             u.location, u.created_at, u.last_login, u.is_active
+    ORDER BY u.created_at DESC
+    LIMIT %(limit)s OFFSET %(offset)s
+""", ('limit', 'offset'), filters=CUSTOMERS_FILTERS)
+
+CUSTOMERS_COUNT = define('customers.count', """
+    SELECT COUNT(*) as count FROM (
+        SELECT 1
+""" + _CUSTOMERS_FILTERED + """
+        GROUP BY u.id
+    ) AS subquery
+""", filters=CUSTOMERS_FILTERS)
+
+CUSTOMERS_COUNT_CAPPED = define('customers.count_capped', """
+    SELECT COUNT(*) as count FROM (
+        SELECT 1
+""" + _CUSTOMERS_FILTERED + """
+        GROUP BY u.id
+        LIMIT %(cap)s
+    ) AS subquery
+""", ('cap',), filters=CUSTOMERS_FILTERS)
+
+CUSTOMER_PROFILE = define('customers.profile', """
+    SELECT
+        u.*,
+        a.address_id,
+        a.full_name as address_name,
+        a.phone as address_phone,
+        a.address_line1,
+        a.address_line2,
+        a.landmark,
+        a.city,
+        a.state,
+        a.pincode,
+        a.latitude,
+        a.longitude,
+        a.is_default
+    FROM users u
+    LEFT JOIN addresses a ON u.id = a.user_id
+    WHERE u.id = %(customer_id)s
+    ORDER BY a.is_default DESC, a.created_at DESC
+""", ('customer_id',))
+
+CUSTOMER_ORDERS_SUMMARY = define('customers.orders_summary', """
+    SELECT
+        status,
+        COUNT(*) as count,
+        SUM(total_amount) as total_amount
+    FROM orders
+    WHERE user_id = %(customer_id)s
+    GROUP BY status
+""", ('customer_id',))
+
+CUSTOMER_RECENT_ORDERS = define('customers.recent_orders', """
+    SELECT
+        order_id,
+        total_amount,
+        status,
+        order_date
+    FROM orders
+    WHERE user_id = %(customer_id)s
+    ORDER BY order_date DESC
+    LIMIT 5
+""", ('customer_id',))
+
+
+# ============================================
+# ITEMS
+# ============================================
+
+CATALOG_SERVICES = define('items.services', """
+    SELECT
+        s.*,
+        'service' as item_type,
+        (SELECT COUNT(*) FROM order_items WHERE item_type = 'service' AND item_id = s.id) as times_ordered
+    FROM services s
+    WHERE TRUE {filters}
+    ORDER BY s.position, s.name
+""", filters={'search': "s.name ILIKE %(search)s", 'category': "s.category = %(category)s"})
+
+CATALOG_MENU = define('items.menu', """
+    SELECT
+        m.*,
+        'menu' as item_type,
+        (SELECT COUNT(*) FROM order_items WHERE item_type = 'menu' AND item_id = m.id) as times_ordered
+    FROM menu m
+    WHERE TRUE {filters}
+    ORDER BY m.position, m.name
+""", filters={'search': "m.name ILIKE %(search)s", 'category': "m.category = %(category)s"})
+
+CATALOG_CATEGORIES = define('items.categories', """
+    SELECT category, 'service' as type FROM services
+    WHERE category IS NOT NULL
+    GROUP BY category
+    UNION
+    SELECT category, 'menu' as type FROM menu
+    WHERE category IS NOT NULL
+    GROUP BY category
+    ORDER BY category
+""")
+
+
+# ============================================
+# ARCHIVE
+# ============================================
+
+# Closed orders past the cutoff, oldest first; locked until the batch is deleted
+ARCHIVE_CANDIDATES = define('archive.candidates', """
+    SELECT order_id, order_date
+    FROM orders
+    WHERE status = ANY(%(statuses)s::text[])
+      AND order_date < (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - make_interval(days => %(older_than_days)s::int)
+    ORDER BY order_date, order_id
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+""", ('statuses', 'older_than_days', 'limit'))
+
+ARCHIVE_ORDERS = define('archive.orders', """
+    SELECT * FROM orders WHERE order_id = ANY(%(order_ids)s::int[]) ORDER BY order_id
+""", ('order_ids',))
+
+ARCHIVE_ORDER_ITEMS = define('archive.order_items', """
+    SELECT * FROM order_items WHERE order_id = ANY(%(order_ids)s::int[]) {items_month}
+    ORDER BY order_id, order_item_id
+""", ('order_ids', 'order_dates'), items_month='AND order_date = ANY(%(order_dates)s::timestamp[])')
+
+ARCHIVE_PAYMENTS = define('archive.payments', """
+    SELECT * FROM payments WHERE order_id = ANY(%(order_ids)s::int[]) ORDER BY order_id
+""", ('order_ids',))
+
+ARCHIVE_STATUS_HISTORY = define('archive.status_history', """
+    SELECT * FROM orders_status_history WHERE order_id = ANY(%(order_ids)s::int[]) ORDER BY order_id
+""", ('order_ids',))
+
+ARCHIVE_HAS_STATUS_HISTORY = define('archive.has_status_history', """
+    SELECT to_regclass('orders_status_history') IS NOT NULL as present
+""")
+
+# Children first, so foreign keys to orders are satisfied at every step
+ARCHIVE_DELETE_STATUS_HISTORY = define('archive.delete_status_history', """
+    DELETE FROM orders_status_history WHERE order_id = ANY(%(order_ids)s::int[])
+""", ('order_ids',))
+
+ARCHIVE_DELETE_PAYMENTS = define('archive.delete_payments', """
+    DELETE FROM payments WHERE order_id = ANY(%(order_ids)s::int[])
+""", ('order_ids',))
+
+ARCHIVE_DELETE_ORDER_ITEMS = define('archive.delete_order_items', """
+    DELETE FROM order_items WHERE order_id = ANY(%(order_ids)s::int[]) {items_month}
+""", ('order_ids', 'order_dates'), items_month='AND order_date = ANY(%(order_dates)s::timestamp[])')
+
+ARCHIVE_DELETE_ORDERS = define('archive.delete_orders', """
+    DELETE FROM orders WHERE order_id = ANY(%(order_ids)s::int[])
+""", ('order_ids',))
+
+ARCHIVE_LIVE_ORDERS = define('archive.live_orders', """
+    SELECT COUNT(*) as count FROM orders WHERE order_id = ANY(%(order_ids)s::int[])
+""", ('order_ids',))
+
+# Archived customers with no live order, for all-time distinct customer counts
+ARCHIVE_CUSTOMERS_ONLY_ARCHIVED = define('archive.customers_only_archived', """
+    SELECT COUNT(*) as count
+    FROM unnest(%(user_ids)s::int[]) AS archived(user_id)
+    WHERE NOT EXISTS (SELECT 1 FROM orders o WHERE o.user_id = archived.user_id)
+""", ('user_ids',))
+
+
+# ============================================
+# CHANGE LOG
+# ============================================
+
+# Current snapshot: the cursor a change-feed reader continues from
+CHANGES_SNAPSHOT = define('changes.snapshot', """
+    SELECT pg_current_snapshot()::text as snapshot
+""")
+
+# Rows committed after `since` and visible in `until`, oldest first. The
+# visibility test (not seq > cursor) keeps rows of transactions that were
+# still running at `since`, whatever their seq, from being skipped.
+CHANGES_BETWEEN = define('changes.between', """
+    SELECT seq, table_name, op, row_id, order_id, user_id, changed_at
+    FROM change_log
+    WHERE xid >= pg_snapshot_xmin(%(since)s::pg_snapshot)
+      AND NOT pg_visible_in_snapshot(xid, %(since)s::pg_snapshot)
+      AND pg_visible_in_snapshot(xid, %(until)s::pg_snapshot)
+    ORDER BY seq
+    LIMIT %(limit)s
+""", ('since', 'until', 'limit'))
+
+CHANGES_PRUNE = define('changes.prune', """
+    DELETE FROM change_log
+    WHERE changed_at < now() - make_interval(hours => %(retention_hours)s::int)
+""", ('retention_hours',))
+
+CHANGES_STATUS = define('changes.status', """
+    SELECT
+        COALESCE(MAX(seq), 0) as last_seq,
+        COUNT(*) as rows,
+        MIN(changed_at) as oldest
+    FROM change_log
+""")
+
+# Conditional GET: whether change_log holds records of the scope committed
+# after the `since` snapshot (always true without one), and the snapshot a
+# new validator starts from
+_CHANGED_SINCE = """
+    SELECT
+        pg_current_snapshot()::text as snapshot,
+        %(since)s::text IS NULL OR EXISTS (
+            SELECT 1 FROM change_log
+            WHERE xid >= pg_snapshot_xmin(%(since)s::pg_snapshot)
+              AND NOT pg_visible_in_snapshot(xid, %(since)s::pg_snapshot)
+              AND ({scope})
+        ) as changed
+"""
+
+CHANGED_SINCE_TABLES = define('changes.since_tables', _CHANGED_SINCE.format(scope="""
+                table_name = ANY(%(tables)s::text[])
+"""), ('since', 'tables'))
+
+# The order's rows, and its customer's (any customer's once it is archived)
+CHANGED_SINCE_ORDER = define('changes.since_order', _CHANGED_SINCE.format(scope="""
+                order_id = %(order_id)s
+                OR (table_name IN ('users', 'addresses') AND COALESCE(
+                    CASE table_name WHEN 'users' THEN row_id ELSE user_id END
+                        = (SELECT user_id FROM orders WHERE order_id = %(order_id)s),
+                    TRUE))
+"""), ('since', 'order_id'))
+
+CHANGED_SINCE_CUSTOMER = define('changes.since_customer', _CHANGED_SINCE.format(scope="""
+                user_id = %(customer_id)s
+                OR (table_name = 'users' AND row_id = %(customer_id)s)
+"""), ('since', 'customer_id'))
+
+
+# ============================================
+# ITEM POPULARITY
+# ============================================
+
+# Counters maintained from popularity.py's trigger on order_items: per item,
+# per UTC hour (recent hours only), per IST day and all time. Each read adds
+# the sales still waiting in item_sales_deltas to the folded counters.
+_POPULARITY_WINDOW = """
+    SELECT
+        item_type,
+        item_id,
+        (array_agg(item_name ORDER BY {bucket} DESC))[1] as item_name,
+        SUM(quantity) as total_quantity,
+        SUM(revenue) as total_revenue
+    FROM (
+        SELECT {bucket}, item_type, item_id, item_name, quantity, revenue
+        FROM {table}
+        UNION ALL
+        SELECT {pending_bucket}, item_type, item_id, item_name, quantity, revenue
+        FROM item_sales_deltas
+    ) counters
+    WHERE {condition}
+    GROUP BY item_type, item_id
+    ORDER BY total_{metric} DESC, item_id
+    LIMIT %(limit)s
+"""
+
+POPULARITY_TOP_HOURS = {
+    metric: define(f'popularity.top_hours.{metric}', _POPULARITY_WINDOW.format(
+        bucket='hour', table='item_sales_hourly', metric=metric,
+        pending_bucket="date_trunc('hour', sold_at)",
+        condition="hour > date_trunc('hour', now() AT TIME ZONE 'UTC') - make_interval(hours => %(hours)s::int)"),
+        ('hours', 'limit'))
+    for metric in ('quantity', 'revenue')
+}
+
+POPULARITY_TOP_DAYS = {
+    metric: define(f'popularity.top_days.{metric}', _POPULARITY_WINDOW.format(
+        bucket='day', table='item_sales_daily', metric=metric,
+        pending_bucket="(sold_at AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata')::date",
+        condition="day BETWEEN %(first_day)s::date AND %(last_day)s::date"),
+        ('first_day', 'last_day', 'limit'))
+    for metric in ('quantity', 'revenue')
+}
+
+POPULARITY_TOP_TOTAL = {
+    metric: define(f'popularity.top_total.{metric}', f"""
+        SELECT
+            item_type,
+            item_id,
+            (array_agg(item_name ORDER BY pending DESC))[1] as item_name,
+            SUM(quantity) as total_quantity,
+            SUM(revenue) as total_revenue
+        FROM (
+            SELECT item_type, item_id, item_name, quantity, revenue, false as pending
+            FROM item_sales_total
+            UNION ALL
+            SELECT item_type, item_id, item_name, quantity, revenue, true
+            FROM item_sales_deltas
+        ) counters
+        GROUP BY item_type, item_id
+        ORDER BY total_{metric} DESC, item_id
+        LIMIT %(limit)s
+    """, ('limit',))
+    for metric in ('quantity', 'revenue')
+}
+
+POPULARITY_PRUNE_HOURS = define('popularity.prune_hours', """
+    DELETE FROM item_sales_hourly
+    WHERE hour < now() AT TIME ZONE 'UTC' - make_interval(hours => %(retention_hours)s::int)
+""", ('retention_hours',))
+
+POPULARITY_STATUS = define('popularity.status', """
+    SELECT
+        (SELECT COUNT(*) FROM item_sales_hourly) as hourly_rows,
+        (SELECT COUNT(*) FROM item_sales_daily) as daily_rows,
+        (SELECT COUNT(*) FROM item_sales_total) as items,
+        (SELECT MIN(day) FROM item_sales_daily) as first_day,
+        (SELECT COUNT(*) FROM item_sales_deltas) as pending_rows
+""")
+
+
+# ============================================
+# ORDER STATUS COUNTERS
+# ============================================
+
+# Per-status deltas appended by status_counters.py's triggers on orders
+STATUS_COUNTS = define('status_counters.counts', """
+    SELECT NULLIF(status, '') as status, SUM(delta)::bigint as count
+    FROM order_status_deltas
+    GROUP BY status
+    HAVING SUM(delta) <> 0
+    ORDER BY count DESC
+""")
+
+STATUS_COUNT = define('status_counters.count', """
+    SELECT COALESCE(SUM(delta), 0)::bigint as count
+    FROM order_status_deltas
+    WHERE status = %(status)s
+""", ('status',))
+
+# Deltas committed by now become one row per status; uncommitted ones are
+# invisible to the DELETE and stay for the next run
+STATUS_COUNTS_COMPACT = define('status_counters.compact', """
+    WITH folded AS (
+        DELETE FROM order_status_deltas
+        RETURNING status, delta
+    )
+    INSERT INTO order_status_deltas (status, delta)
+    SELECT status, SUM(delta) FROM folded GROUP BY status HAVING SUM(delta) <> 0
+""")
@@ -12,6 +12,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Listen for dynamic content (modals, etc.)
     observeDynamicContent();
+    
+    // Delivery density map (statistics page)
+    initializeDensityMap();
 });
 
 function initializeMapLinks() {
@@ -431,6 +434,106 @@ function showMapToast(message, type = 'info') {
     }, 3000);
 }
 
+function initializeDensityMap() {
+    /**
+     * Delivery density map: server-side clusters drawn as an SVG bubble plot.
+     * Each bubble opens the cluster centre in Google Maps (no API key).
+     */
+    const container = document.getElementById('deliveryDensityMap');
+    if (!container) return;
+    
+    const reload = () => loadDeliveryClusters(container);
+    
+    document.getElementById('densitySource')?.addEventListener('change', function() {
+        container.setAttribute('data-source', this.value);
+        reload();
+    });
+    
+    document.getElementById('densityZoomIn')?.addEventListener('click', function() {
+        const zoom = parseInt(container.getAttribute('data-zoom'), 10);
+        container.setAttribute('data-zoom', Math.min(zoom + 1, 18));
+        reload();
+    });
+    
+    document.getElementById('densityZoomOut')?.addEventListener('click', function() {
+        const zoom = parseInt(container.getAttribute('data-zoom'), 10);
+        container.setAttribute('data-zoom', Math.max(zoom - 1, 1));
+        reload();
+    });
+    
+    reload();
+}
+
+function loadDeliveryClusters(container) {
+    /**
+     * Fetch clusters for the container's source/zoom and render them
+     */
+    const source = container.getAttribute('data-source') || 'orders';
+    const zoom = container.getAttribute('data-zoom') || 11;
+    
+    fetch(`/api/maps/clusters?source=${encodeURIComponent(source)}&zoom=${zoom}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                container.innerHTML = `<div class="alert alert-warning">${data.message}</div>`;
+                return;
+            }
+            renderClusterPlot(container, data.clusters, parseInt(zoom, 10));
+            
+            const summary = document.getElementById('deliveryDensitySummary');
+            if (summary) {
+                summary.textContent = `${data.clusters.length} clusters from ` +
+                    `${data.total_points.toLocaleString('en-IN')} points (zoom ${data.zoom})`;
+            }
+        })
+        .catch(error => {
+            container.innerHTML = `<div class="alert alert-danger">Error loading density map: ${error.message}</div>`;
+        });
+}
+
+function renderClusterPlot(container, clusters, zoom) {
+    /**
+     * Equirectangular SVG plot of cluster centroids, bubble area ~ count
+     */
+    if (!clusters.length) {
+        container.innerHTML = '<div class="text-muted text-center py-5">No located deliveries yet</div>';
+        return;
+    }
+    
+    const width = container.clientWidth || 600;
+    const height = container.clientHeight || 360;
+    const pad = 20;
+    
+    let minLat = Infinity, maxLat = -Infinity, minLon = Infinity, maxLon = -Infinity, maxCount = 1;
+    clusters.forEach(c => {
+        minLat = Math.min(minLat, c.lat); maxLat = Math.max(maxLat, c.lat);
+        minLon = Math.min(minLon, c.lon); maxLon = Math.max(maxLon, c.lon);
+        maxCount = Math.max(maxCount, c.count);
+    });
+    
+    const spanLon = Math.max(maxLon - minLon, 1e-6);
+    const spanLat = Math.max(maxLat - minLat, 1e-6);
+    const x = lon => pad + (lon - minLon) / spanLon * (width - 2 * pad);
+    const y = lat => height - pad - (lat - minLat) / spanLat * (height - 2 * pad);
+    const r = count => 3 + Math.sqrt(count / maxCount) * 22;
+    
+    const bubbles = clusters.map(c => `
+        <a href="${c.map_link}" target="_blank" rel="noopener">
+            <circle cx="${x(c.lon).toFixed(1)}" cy="${y(c.lat).toFixed(1)}" r="${r(c.count).toFixed(1)}"
+                    fill="rgba(220, 53, 69, 0.45)" stroke="#dc3545">
+                <title>${c.count.toLocaleString('en-IN')} points near ${formatCoordinates(c.lat, c.lon, 'url')}</title>
+            </circle>
+        </a>
+    `).join('');
+    
+    container.innerHTML = `
+        <svg width="100%" height="${height}" viewBox="0 0 ${width} ${height}" role="img"
+             aria-label="Delivery density at zoom ${zoom}">
+            ${bubbles}
+        </svg>
+    `;
+}
+
 // Export functions for use in other scripts
 window.maps = {
     generateGoogleMapsLink,
@@ -441,7 +544,8 @@ window.maps = {
     getDistance,
     copyCoordinates,
     trackMapView,
-    showMapToast
+    showMapToast,
+    loadDeliveryClusters
 };
 
 // Initialize on page load
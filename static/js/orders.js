@@ -6,36 +6,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const paymentModal = new bootstrap.Modal(document.getElementById('paymentDetailsModal'));
     const customerModal = new bootstrap.Modal(document.getElementById('customerDetailsModal'));
 
-    // View order details buttons
-    document.querySelectorAll('.view-order-btn').forEach(button => {
-        button.addEventListener('click', function() {
-            const orderId = this.getAttribute('data-order-id');
-            loadOrderDetails(orderId, orderModal);
-        });
-    });
-
-    // View payment details buttons
-    document.querySelectorAll('.view-payment-btn').forEach(button => {
-        button.addEventListener('click', function() {
-            const orderId = this.getAttribute('data-order-id');
-            loadPaymentDetails(orderId, paymentModal);
-        });
-    });
+    // Row buttons, delegated so rows rendered later by the listing work too
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.view-order-btn, .view-payment-btn, .view-customer-btn, .update-status-btn');
+        if (!button) return;
 
-    // View customer details buttons
-    document.querySelectorAll('.view-customer-btn').forEach(button => {
-        button.addEventListener('click', function() {
-            const customerId = this.getAttribute('data-customer-id');
-            loadCustomerDetails(customerId, customerModal);
-        });
-    });
-
-    // Update order status buttons
-    document.querySelectorAll('.update-status-btn').forEach(button => {
-        button.addEventListener('click', function() {
-            const orderId = this.getAttribute('data-order-id');
-            showStatusUpdateModal(orderId);
-        });
+        if (button.classList.contains('view-order-btn')) {
+            loadOrderDetails(button.getAttribute('data-order-id'), orderModal);
+        } else if (button.classList.contains('view-payment-btn')) {
+            loadPaymentDetails(button.getAttribute('data-order-id'), paymentModal);
+        } else if (button.classList.contains('view-customer-btn')) {
+            loadCustomerDetails(button.getAttribute('data-customer-id'), customerModal);
+        } else {
+            showStatusUpdateModal(button.getAttribute('data-order-id'));
+        }
     });
 
     // Initialize filters
@@ -44,6 +28,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize search
     initializeSearch();
 
+    // Filters and search reload only the table rows, from /api/orders
+    initializeListing();
+
     // Initialize sort
     initializeSort();
 
@@ -53,8 +40,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Bulk actions
     document.getElementById('bulkActionSelect')?.addEventListener('change', handleBulkAction);
-    document.querySelectorAll('.order-checkbox').forEach(checkbox => {
-        checkbox.addEventListener('change', updateBulkActionState);
+    document.addEventListener('change', function(e) {
+        if (e.target.classList.contains('order-checkbox')) {
+            updateBulkActionState();
+        }
     });
 });
 
@@ -741,7 +730,7 @@ function initializeFilters() {
         
         // Apply filter button
         document.getElementById('applyFilterBtn')?.addEventListener('click', function() {
-            filterForm.submit();
+            filterForm.requestSubmit();
         });
         
         // Clear filter button
@@ -755,41 +744,257 @@ function initializeSearch() {
     const searchInput = document.getElementById('orderSearch');
     const searchBtn = document.getElementById('searchBtn');
     
-    if (searchInput && searchBtn) {
-        // Search on button click
-        searchBtn.addEventListener('click', function() {
+    if (searchInput) {
+        // Search on button click (the filter form's own button submits it)
+        searchBtn?.addEventListener('click', function() {
             performSearch();
         });
         
-        // Search on Enter key
-        searchInput.addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') {
-                performSearch();
-            }
-        });
-        
-        // Real-time search (optional)
-        if (window.ENABLE_REALTIME_SEARCH) {
+        // Real-time search; only the table rows are fetched, so it is on
+        // unless a page sets ENABLE_REALTIME_SEARCH = false
+        if (window.ENABLE_REALTIME_SEARCH !== false) {
             let searchTimeout;
             searchInput.addEventListener('input', function() {
                 clearTimeout(searchTimeout);
-                searchTimeout = setTimeout(performSearch, 500);
+                searchTimeout = setTimeout(performSearch, 300);
             });
         }
     }
 }
 
 function performSearch() {
-    const searchInput = document.getElementById('orderSearch');
-    const searchTerm = searchInput.value.trim();
-    
-    if (searchTerm) {
-        const url = new URL(window.location.href);
-        url.searchParams.set('search', searchTerm);
-        window.location.href = url.toString();
+    const filterForm = document.getElementById('orderFilterForm');
+    if (filterForm) {
+        filterForm.requestSubmit();
     }
 }
 
+// ============================================
+// ORDERS LISTING (JSON rows patched into the table)
+// ============================================
+
+const ordersListing = {
+    controller: null,
+    params: null,
+    nextCursor: null,
+    rowHtml: new Map()
+};
+
+function initializeListing() {
+    const filterForm = document.getElementById('orderFilterForm');
+    const tbody = document.getElementById('ordersTableBody');
+    if (!filterForm || !tbody) return;
+
+    filterForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        const params = new URLSearchParams();
+        new FormData(filterForm).forEach((value, key) => {
+            if (String(value).trim()) params.set(key, String(value).trim());
+        });
+        loadOrdersListing(params);
+    });
+
+    document.querySelector('#ordersLoadMore button')?.addEventListener('click', function() {
+        if (ordersListing.nextCursor) {
+            loadOrdersListing(ordersListing.params, ordersListing.nextCursor);
+        }
+    });
+}
+
+function loadOrdersListing(params, cursor) {
+    // Only the latest request counts; older ones are cancelled
+    ordersListing.controller?.abort();
+    const controller = new AbortController();
+    ordersListing.controller = controller;
+
+    const query = new URLSearchParams(params);
+    if (cursor) query.set('cursor', cursor);
+
+    document.getElementById('ordersTable')?.classList.add('opacity-50');
+
+    fetch(`/api/orders?${query.toString()}`, { signal: controller.signal })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.message);
+
+            ordersListing.params = params;
+            ordersListing.nextCursor = data.next_cursor;
+            patchOrdersTable(data.orders, Boolean(cursor));
+            if (!cursor) {
+                updateListingCounts(params, data);
+                // Keep the address bar in step, for reloads, export and print
+                const search = params.toString();
+                history.replaceState(null, '', window.location.pathname + (search ? `?${search}` : ''));
+            }
+
+            document.getElementById('ordersPagination')?.remove();
+            document.getElementById('ordersLoadMore')?.classList.toggle('d-none', !data.next_cursor);
+        })
+        .catch(error => {
+            if (error.name === 'AbortError') return;
+            console.error('Error loading orders:', error);
+            // Fall back to the server-rendered page
+            window.location.href = `${window.location.pathname}?${params.toString()}`;
+        })
+        .finally(() => {
+            if (ordersListing.controller === controller) {
+                document.getElementById('ordersTable')?.classList.remove('opacity-50');
+            }
+        });
+}
+
+function patchOrdersTable(orders, append) {
+    const tbody = document.getElementById('ordersTableBody');
+    const existing = new Map();
+    tbody.querySelectorAll('tr[data-order-id]').forEach(row => {
+        existing.set(row.getAttribute('data-order-id'), row);
+    });
+
+    // Unchanged rows stay in the DOM (keeping their checkbox state); new or
+    // changed ones are built from the row template
+    const offset = append ? tbody.children.length : 0;
+    orders.forEach((order, index) => {
+        const id = String(order.order_id);
+        const html = renderOrderRow(order);
+        let row = existing.get(id);
+        if (!row || ordersListing.rowHtml.get(id) !== html) {
+            const template = document.createElement('template');
+            template.innerHTML = html.trim();
+            const fresh = template.content.firstElementChild;
+            if (row) {
+                fresh.querySelector('.order-checkbox').checked = row.querySelector('.order-checkbox')?.checked || false;
+                row.replaceWith(fresh);
+            }
+            row = fresh;
+            ordersListing.rowHtml.set(id, html);
+        }
+        existing.delete(id);
+        const position = tbody.children[offset + index] || null;
+        if (position !== row) {
+            tbody.insertBefore(row, position);
+        }
+    });
+
+    if (!append) {
+        existing.forEach((row, id) => {
+            row.remove();
+            ordersListing.rowHtml.delete(id);
+        });
+    }
+
+    const empty = tbody.children.length === 0;
+    document.getElementById('ordersTable')?.classList.toggle('d-none', empty);
+    document.getElementById('ordersEmpty')?.classList.toggle('d-none', !empty);
+
+    // Revenue of the listed orders, as the server renders it
+    let revenue = 0;
+    tbody.querySelectorAll('tr[data-amount]').forEach(row => {
+        revenue += parseFloat(row.getAttribute('data-amount')) || 0;
+    });
+    document.querySelectorAll('[data-listed-revenue]').forEach(el => {
+        el.textContent = `₹${revenue.toFixed(0)}`;
+    });
+
+    const selectAll = document.getElementById('selectAllCheckbox');
+    if (selectAll) selectAll.checked = false;
+    updateBulkActionState();
+}
+
+function updateListingCounts(params, data) {
+    document.querySelectorAll('[data-total-count]').forEach(el => {
+        el.textContent = data.total_count;
+    });
+    if (data.count_exact) return;
+
+    // Estimated or capped; fetch the exact total as the page does
+    fetch(`/api/orders/count?${params.toString()}`)
+        .then(response => response.json())
+        .then(count => {
+            if (!count.success || ordersListing.params !== params) return;
+            document.querySelectorAll('[data-total-count]').forEach(el => {
+                el.textContent = count.total_count;
+            });
+        })
+        .catch(error => console.error('Error loading total count:', error));
+}
+
+function escapeHtml(value) {
+    return String(value ?? '')
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+function titleCase(value) {
+    return String(value ?? '').toLowerCase().replace(/\b\w/g, c => c.toUpperCase());
+}
+
+// Mirrors a row of the orders table in orders.html
+function renderOrderRow(order) {
+    const email = order.user_email || '';
+    const [day, time] = (order.order_date_formatted || '').split(',');
+    const payment = order.payment_status
+        ? `<span class="badge bg-${order.payment_status === 'completed' ? 'success' : 'warning'}">
+                ${escapeHtml(titleCase(order.payment_status))}
+           </span>`
+        : '<span class="badge bg-secondary">N/A</span>';
+
+    return `
+        <tr data-order-id="${order.order_id}" data-amount="${escapeHtml(order.total_amount)}">
+            <td>
+                <input type="checkbox" value="${order.order_id}" class="form-check-input order-checkbox">
+            </td>
+            <td>
+                <strong>#${order.order_id}</strong>
+                <br>
+                <small class="text-muted">${order.item_count} items</small>
+            </td>
+            <td>
+                <div class="d-flex align-items-center">
+                    <div>
+                        <div class="fw-medium">${escapeHtml(order.user_name)}</div>
+                        <small class="text-muted">${escapeHtml(order.user_phone)}</small>
+                        <br>
+                        <small class="text-muted">${escapeHtml(email.length > 20 ? email.slice(0, 17) + '...' : email)}</small>
+                    </div>
+                </div>
+            </td>
+            <td>
+                <div class="fw-bold">${escapeHtml(order.total_amount_formatted)}</div>
+                <small class="text-muted">${escapeHtml(order.payment_mode || 'COD')}</small>
+            </td>
+            <td>
+                <span class="status-badge ${escapeHtml(order.status)}">
+                    ${escapeHtml(titleCase(order.status))}
+                </span>
+            </td>
+            <td>${payment}</td>
+            <td>
+                <div>${escapeHtml(day)}</div>
+                <small class="text-muted">${escapeHtml((time || '').trim())}</small>
+            </td>
+            <td>
+                <div class="btn-group btn-group-sm">
+                    <button class="btn btn-outline-primary view-order-btn" data-order-id="${order.order_id}" title="View Order Details">
+                        <i class="fas fa-eye"></i>
+                    </button>
+                    <button class="btn btn-outline-info view-payment-btn" data-order-id="${order.order_id}" title="Payment Details">
+                        <i class="fas fa-credit-card"></i>
+                    </button>
+                    <button class="btn btn-outline-secondary view-customer-btn" data-customer-id="${order.user_id}" title="Customer Details">
+                        <i class="fas fa-user"></i>
+                    </button>
+                    <button class="btn btn-outline-warning update-status-btn" data-order-id="${order.order_id}" title="Update Status">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>
+    `;
+}
+
 function initializeSort() {
     const sortSelect = document.getElementById('sortSelect');
     if (sortSelect) {
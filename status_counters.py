@@ -0,0 +1,190 @@
+# admin_orders_management/status_counters.py
+import os
+import time
+import logging
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+
+import click
+
+from queries import STATUS_COUNTS, STATUS_COUNT, STATUS_COUNTS_COMPACT, ORDERS_STATUS_COUNTS
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory lock so only one worker at a time compacts the deltas
+ADVISORY_LOCK_ID = 7047001
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS order_status_deltas (
+        status VARCHAR(20) NOT NULL,
+        delta BIGINT NOT NULL
+    );
+
+    -- NULL statuses are kept as ''
+    CREATE OR REPLACE FUNCTION order_status_delta() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO order_status_deltas (status, delta) VALUES (COALESCE(OLD.status, ''), -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO order_status_deltas (status, delta) VALUES (COALESCE(NEW.status, ''), 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+
+    DROP TRIGGER IF EXISTS orders_status_delta ON orders;
+    CREATE TRIGGER orders_status_delta AFTER INSERT OR DELETE ON orders
+    FOR EACH ROW EXECUTE FUNCTION order_status_delta();
+    DROP TRIGGER IF EXISTS orders_status_delta_update ON orders;
+    CREATE TRIGGER orders_status_delta_update AFTER UPDATE OF status ON orders
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status) EXECUTE FUNCTION order_status_delta();
+"""
+
+
+def with_percentages(rows):
+    """Status count rows with each one's share of the total, like DASHBOARD_STATUS_DISTRIBUTION"""
+    total = sum(row['count'] for row in rows)
+    return [dict(row, percentage=(Decimal(row['count'] * 100) / total).quantize(Decimal('0.1'), ROUND_HALF_UP)
+                 if total else Decimal(0))
+            for row in rows]
+
+
+class StatusCounters:
+    """
+    Live order counts per status. Triggers on orders append a +1/-1 delta
+    row per insert, delete or status change, in the writer's transaction,
+    so the counts are always exact. Writers only ever insert, so they never
+    wait on each other for a shared counter row.
+
+    start() folds the deltas into one row per status every compact_interval
+    seconds on a daemon thread, so reads sum a few dozen rows whatever the
+    size of orders.
+    """
+
+    def __init__(self, connect, enabled=True, compact_interval=30):
+        self.connect = connect
+        self.enabled = enabled
+        self.compact_interval = compact_interval
+        self.last_error = None
+        self._thread = None
+        self._pid = None
+
+    # Schema
+
+    def is_installed(self, cur):
+        cur.execute("SELECT to_regclass('order_status_deltas') IS NOT NULL as present")
+        return cur.fetchone()['present']
+
+    def install(self, cur, rebuild=True):
+        """
+        Create the deltas table and the triggers and, with rebuild, recount
+        from orders. Writes to orders wait until the transaction commits,
+        so none is counted twice or missed.
+        """
+        cur.execute("LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(SCHEMA_SQL)
+        if rebuild:
+            cur.execute("TRUNCATE order_status_deltas")
+            cur.execute("""
+                INSERT INTO order_status_deltas (status, delta)
+                SELECT COALESCE(status, ''), COUNT(*) FROM orders GROUP BY 1
+            """)
+        return self.counts(cur)
+
+    def install_trigger(self, cur, tables):
+        """partitions swap callback: move the triggers to the new orders"""
+        # The counters already hold every row copied over
+        if 'orders' in tables and self.is_installed(cur):
+            cur.execute(SCHEMA_SQL)
+
+    # Reading
+
+    def statement(self):
+        """(query, params) for status/count rows, largest first, like ORDERS_STATUS_COUNTS"""
+        return STATUS_COUNTS.bind()
+
+    def count_statement(self, status):
+        """(query, params) for the count of one status"""
+        return STATUS_COUNT.bind(status=status)
+
+    def counts(self, cur):
+        cur.execute(*self.statement())
+        return cur.fetchall()
+
+    def verify(self, cur):
+        """{status: (counted, actual)} for statuses whose counter is off"""
+        # One snapshot for both, or concurrent writes would show up as drift
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        counted = {row['status']: row['count'] for row in self.counts(cur)}
+        cur.execute(*ORDERS_STATUS_COUNTS.bind())
+        actual = {row['status']: row['count'] for row in cur.fetchall()}
+        return {status: (counted.get(status, 0), actual.get(status, 0))
+                for status in set(counted) | set(actual)
+                if counted.get(status, 0) != actual.get(status, 0)}
+
+    # Maintenance
+
+    def compact(self):
+        """Fold the deltas into one row per status; returns the rows left"""
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s) as locked", (ADVISORY_LOCK_ID,))
+                if not cur.fetchone()['locked']:
+                    return None
+                cur.execute(*STATUS_COUNTS_COMPACT.bind())
+                remaining = cur.rowcount
+            conn.commit()
+        return remaining
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='status-counters', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.compact()
+                self.last_error = None
+            except Exception as e:
+                logger.error(f"Status counter compaction failed: {e}")
+                self.last_error = str(e)
+            time.sleep(self.compact_interval)
+
+
+def init_status_counters(app, counters):
+    """Register `flask status-counters ...` and compact the deltas when enabled"""
+
+    @app.cli.group('status-counters')
+    def counters_group():
+        """Live order counts per status"""
+
+    @counters_group.command('install')
+    def install_command():
+        """Create the counters and their triggers, counting the current orders"""
+        with counters.connect() as conn:
+            with conn.cursor() as cur:
+                rows = counters.install(cur)
+            conn.commit()
+        click.echo(", ".join(f"{row['status']}: {row['count']}" for row in rows) or "No orders")
+
+    @counters_group.command('verify')
+    def verify_command():
+        """Compare the counters with a full count of orders"""
+        with counters.connect() as conn:
+            with conn.cursor() as cur:
+                drift = counters.verify(cur)
+        for status, (counted, actual) in sorted(drift.items(), key=lambda entry: str(entry[0])):
+            click.echo(f"{status}: counted {counted}, actual {actual}")
+        click.echo("Counters are off; re-run install" if drift else "Counters match")
+
+    app.extensions['status_counters'] = counters
+
+    if counters.enabled:
+        counters.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=counters.start)
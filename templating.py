@@ -0,0 +1,146 @@
+# admin_orders_management/templating.py
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from flask import g, before_render_template, template_rendered
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from cache import fragment_cache
+from db_metrics import Histogram, register_metrics, escape_label
+
+logger = logging.getLogger(__name__)
+
+# Render time bucket upper bounds in seconds; layouts render in milliseconds
+RENDER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+
+
+class TemplateMetrics:
+    """Render times per page template and per cached fragment, for this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = defaultdict(lambda: Histogram(RENDER_BUCKETS))
+        self._fragments = defaultdict(lambda: Histogram(RENDER_BUCKETS))
+        self._fragment_hits = defaultdict(int)
+
+    def observe_template(self, name, seconds):
+        with self._lock:
+            self._templates[name].observe(seconds)
+
+    def observe_fragment(self, name, seconds):
+        """A fragment rendered because it was not cached"""
+        with self._lock:
+            self._fragments[name].observe(seconds)
+
+    def fragment_hit(self, name):
+        with self._lock:
+            self._fragment_hits[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'templates': {
+                    name: {'renders': h.total, 'mean_ms': round(h.sum * 1000 / h.total, 3)}
+                    for name, h in sorted(self._templates.items()) if h.total
+                },
+                'fragments': {
+                    name: {
+                        'hits': self._fragment_hits[name],
+                        'renders': self._fragments[name].total,
+                        'mean_render_ms': round(self._fragments[name].sum * 1000 / self._fragments[name].total, 3)
+                                          if self._fragments[name].total else None
+                    }
+                    for name in sorted(set(self._fragments) | set(self._fragment_hits))
+                }
+            }
+
+    def render(self):
+        """Prometheus histograms and counters for /metrics"""
+        lines = []
+        with self._lock:
+            for metric, label, histograms, help_text in (
+                    ('admin_template_render_seconds', 'template', self._templates,
+                     'Page template render time'),
+                    ('admin_fragment_render_seconds', 'fragment', self._fragments,
+                     'Render time of cached fragments on a cache miss')):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, histogram in sorted(histograms.items()):
+                    value = escape_label(name)
+                    for le, count in histogram.samples():
+                        lines.append(f'{metric}_bucket{{{label}="{value}",le="{le}"}} {count}')
+                    lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.total}')
+            lines.append("# HELP admin_fragment_cache_hits_total Fragments served from the fragment cache")
+            lines.append("# TYPE admin_fragment_cache_hits_total counter")
+            for name, hits in sorted(self._fragment_hits.items()):
+                lines.append(f'admin_fragment_cache_hits_total{{fragment="{escape_label(name)}"}} {hits}')
+        return "\n".join(lines) + "\n"
+
+
+template_metrics = TemplateMetrics()
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache 'name', key, ... %}...{% endcache %}: the block's output is
+    rendered once per name and key values and then served from the
+    environment's fragment_cache. The keys must cover everything the block
+    shows; without a fragment_cache the block is rendered every time.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.Tuple(key, 'load')]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is not None:
+            markup = cache.get(key)
+            if markup is not None:
+                template_metrics.fragment_hit(key[0])
+                return markup
+        start = time.perf_counter()
+        markup = caller()
+        template_metrics.observe_fragment(key[0], time.perf_counter() - start)
+        if cache is not None:
+            cache.set(key, markup)
+        return markup
+
+
+def init_templating(app):
+    """Enable {% cache %} fragments and record render times per page template"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    ttl = app.config.get('FRAGMENT_CACHE_SECONDS', 60)
+    if ttl > 0:
+        fragment_cache.ttl = ttl
+        app.jinja_env.fragment_cache = fragment_cache
+
+    def render_started(sender, template, context, **extra):
+        g.setdefault('template_starts', []).append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        starts = g.get('template_starts')
+        if starts:
+            template_metrics.observe_template(template.name or '<string>', time.perf_counter() - starts.pop())
+
+    # Signals only hold weak references to receivers; keep them alive with the app
+    app.extensions['template_metrics'] = template_metrics
+    app.extensions['template_signal_receivers'] = (render_started, render_finished)
+    before_render_template.connect(render_started, app)
+    template_rendered.connect(render_finished, app)
+    register_metrics(template_metrics.render)
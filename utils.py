@@ -1,14 +1,21 @@
 # admin_orders_management/utils.py
 import os
 import json
+import base64
+import time
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
 import pytz
+import psycopg
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 
+from db_metrics import current_db_stats
+from formatting import format_ist
+from queries import STATISTICS_SUMMARY, STATISTICS_TODAY
+
 logger = logging.getLogger(__name__)
 
 # Timezone
@@ -64,14 +71,8 @@ def format_ist_datetime(datetime_obj, format_str="%d %b %Y, %I:%M %p"):
         return ""
     
     try:
-        # If it's already timezone aware
-        if datetime_obj.tzinfo is not None:
-            ist_time = datetime_obj.astimezone(IST)
-        else:
-            # If it's naive, assume it's UTC (for existing data)
-            ist_time = pytz.utc.localize(datetime_obj).astimezone(IST)
-        
-        return ist_time.strftime(format_str)
+        # Naive values are assumed to be UTC (for existing data)
+        return format_ist(datetime_obj, format_str)
     except Exception as e:
         logger.error(f"Error formatting datetime: {e}")
         return str(datetime_obj)
@@ -137,91 +138,112 @@ def upload_to_cloudinary(file, folder="uploads", public_id=None, resource_type="
         logger.error(f"Cloudinary upload error: {e}")
         return None
 
+def statistics_period(period='today', start_date=None, end_date=None):
+    """STATISTICS_SUMMARY key for a requested period; anything unrecognised is all time"""
+    if period == 'custom' and start_date and end_date:
+        return 'custom'
+    if period in ('today', 'week', 'month'):
+        return period
+    return 'all'
+
+def statistics_queries(period='today', start_date=None, end_date=None):
+    """
+    Statements behind calculate_statistics() as (query, params) pairs, so
+    callers can batch them with other queries; build_statistics() turns
+    their first rows into the statistics dictionary.
+    """
+    key = statistics_period(period, start_date, end_date)
+    if key == 'custom':
+        summary = STATISTICS_SUMMARY['custom'].bind(start_date=start_date, end_date=end_date)
+    else:
+        summary = STATISTICS_SUMMARY[key].bind()
+    
+    return [summary, STATISTICS_TODAY.bind()]
+
+def build_statistics(stats, today_stats):
+    """Statistics dictionary from the rows of the statistics_queries() statements"""
+    # Convert Decimal to float for JSON serialization
+    return {
+        'total_orders': stats['total_orders'] or 0,
+        'total_revenue': float(stats['total_revenue']) if stats['total_revenue'] else 0,
+        'total_customers': stats['total_customers'] or 0,
+        'avg_order_value': float(stats['avg_order_value']) if stats['avg_order_value'] else 0,
+        'pending_orders': stats['pending_orders'] or 0,
+        'completed_orders': stats['completed_orders'] or 0,
+        'cancelled_orders': stats['cancelled_orders'] or 0,
+        'today_orders': today_stats['today_orders'] or 0,
+        'today_revenue': float(today_stats['today_revenue']) if today_stats['today_revenue'] else 0
+    }
+
+def empty_statistics():
+    return {
+        'total_orders': 0,
+        'total_revenue': 0,
+        'total_customers': 0,
+        'avg_order_value': 0,
+        'pending_orders': 0,
+        'completed_orders': 0,
+        'cancelled_orders': 0,
+        'today_orders': 0,
+        'today_revenue': 0
+    }
+
 def calculate_statistics(conn, period='today', start_date=None, end_date=None):
     """
     Calculate statistics based on period
     Returns: Dictionary with statistics
     """
     try:
-        cur = conn.cursor()
-        
-        # Calculate date ranges
-        today = datetime.now(IST).date()
+        with conn.cursor() as cur:
+            rows = []
+            for query, params in statistics_queries(period, start_date, end_date):
+                cur.execute(query, params)
+                rows.append(cur.fetchone())
         
-        if period == 'today':
-            date_condition = "DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') = CURRENT_DATE"
-        elif period == 'week':
-            date_condition = "order_date >= CURRENT_DATE - INTERVAL '7 days'"
-        elif period == 'month':
-            date_condition = "order_date >= CURRENT_DATE - INTERVAL '30 days'"
-        elif period == 'custom' and start_date and end_date:
-            date_condition = "DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') BETWEEN %s AND %s"
-            params = [start_date, end_date]
-        else:
-            date_condition = "1=1"
-            params = []
-        
-        # Build query
-        query = f"""
-            SELECT 
-                COUNT(*) as total_orders,
-                COALESCE(SUM(CASE WHEN status != 'cancelled' THEN total_amount ELSE 0 END), 0) as total_revenue,
-                COUNT(DISTINCT user_id) as total_customers,
-                AVG(CASE WHEN status != 'cancelled' THEN total_amount ELSE NULL END) as avg_order_value,
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_orders,
-                SUM(CASE WHEN status = 'completed' OR status = 'delivered' THEN 1 ELSE 0 END) as completed_orders,
-                SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_orders
-            FROM orders
-            WHERE {date_condition}
-        """
-        
-        if period == 'custom' and start_date and end_date:
-            cur.execute(query, params)
-        else:
-            cur.execute(query)
-        
-        stats = cur.fetchone()
-        
-        # Get today's stats separately
-        cur.execute("""
-            SELECT 
-                COUNT(*) as today_orders,
-                COALESCE(SUM(CASE WHEN status != 'cancelled' THEN total_amount ELSE 0 END), 0) as today_revenue
-            FROM orders
-            WHERE DATE(order_date AT TIME ZONE 'UTC' AT TIME ZONE 'Asia/Kolkata') = CURRENT_DATE
-        """)
-        
-        today_stats = cur.fetchone()
-        
-        # Convert Decimal to float for JSON serialization
-        result = {
-            'total_orders': stats['total_orders'] or 0,
-            'total_revenue': float(stats['total_revenue']) if stats['total_revenue'] else 0,
-            'total_customers': stats['total_customers'] or 0,
-            'avg_order_value': float(stats['avg_order_value']) if stats['avg_order_value'] else 0,
-            'pending_orders': stats['pending_orders'] or 0,
-            'completed_orders': stats['completed_orders'] or 0,
-            'cancelled_orders': stats['cancelled_orders'] or 0,
-            'today_orders': today_stats['today_orders'] or 0,
-            'today_revenue': float(today_stats['today_revenue']) if today_stats['today_revenue'] else 0
-        }
-        
-        cur.close()
-        return result
+        return build_statistics(*rows)
         
     except Exception as e:
         logger.error(f"Error calculating statistics: {e}")
-        return {
-            'total_orders': 0,
-            'total_revenue': 0,
-            'total_customers': 0,
-            'avg_order_value': 0,
-            'pending_orders': 0,
-            'completed_orders': 0,
-            'cancelled_orders': 0,
-            'today_orders': 0,
-            'today_revenue': 0
-        }
+        return empty_statistics()
+
+def fetch_pipelined(conn, statements):
+    """
+    Run independent statements in one pipelined batch and return a list with
+    the fetchall() result of each. statements are (query, params) or
+    (query, params, row_factory) tuples; every statement gets its own cursor,
+    all of them are sent before the first result is read, and the batch
+    costs one network round trip instead of one per query. Falls back to
+    sequential execution when libpq has no pipeline support.
+    """
+    cursors = []
+    try:
+        for statement in statements:
+            query, params = statement[0], statement[1]
+            row_factory = statement[2] if len(statement) > 2 else None
+            cursor = conn.cursor(row_factory=row_factory) if row_factory else conn.cursor()
+            cursors.append((cursor, query, params))
+        
+        if not psycopg.Pipeline.is_supported():
+            results = []
+            for cursor, query, params in cursors:
+                cursor.execute(query, params)
+                results.append(cursor.fetchall())
+            return results
+        
+        with conn.pipeline() as pipeline:
+            for cursor, query, params in cursors:
+                cursor.execute(query, params)
+            # The statements run here; execute() above only queued them
+            start = time.perf_counter()
+            pipeline.sync()
+            results = [cursor.fetchall() for cursor, _, _ in cursors]
+            stats = current_db_stats()
+            if stats is not None:
+                stats.record_wait(f"pipeline of {len(cursors)} statements", time.perf_counter() - start)
+            return results
+    finally:
+        for cursor, _, _ in cursors:
+            cursor.close()
 
 def format_currency(amount):
     """Format amount as Indian Rupees"""
@@ -319,6 +341,26 @@ def validate_date_range(start_date_str, end_date_str):
     except Exception as e:
         return None, None, f"Date validation error: {str(e)}"
 
+def encode_listing_cursor(timestamp, row_id):
+    """
+    Opaque keyset cursor for the (timestamp, id) row after which the next
+    page starts; the timestamp may be None
+    """
+    value = timestamp.isoformat() if timestamp is not None else ''
+    return base64.urlsafe_b64encode(f"{value}|{row_id}".encode()).decode().rstrip('=')
+
+def decode_listing_cursor(cursor):
+    """
+    (timestamp or None, row id) of a cursor from encode_listing_cursor;
+    raises ValueError when it is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(value) if value else None), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 def log_admin_activity(conn, user_id, activity_type, description, ip_address=None, user_agent=None):
     """
     Log admin activity to database
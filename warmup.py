@@ -0,0 +1,122 @@
+# admin_orders_management/warmup.py
+import os
+import time
+import logging
+import threading
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the back-off between retries of failed steps
+MAX_RETRY_SECONDS = 60
+
+
+class Warmup:
+    """
+    Per-process warm-up stage. Named steps run on a background thread as
+    soon as the worker starts (and again in the child after a fork); failed
+    steps are retried until they all pass. /ready answers 503 until then.
+    """
+
+    def __init__(self, retry_seconds=5):
+        self.retry_seconds = retry_seconds
+        self.steps = []
+        self.results = {}
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+        self._pid = None
+
+    def step(self, name):
+        """Decorator registering a warm-up step; steps run in registration order"""
+        def decorator(func):
+            self.steps.append((name, func))
+            return func
+        return decorator
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self.ready = False
+        self.results = {}
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pending = list(self.steps)
+        attempt = 0
+        while pending:
+            failed = []
+            for name, func in pending:
+                start = time.perf_counter()
+                try:
+                    detail = func()
+                    self.results[name] = {
+                        'ok': True,
+                        'seconds': round(time.perf_counter() - start, 3),
+                        'detail': detail
+                    }
+                except Exception as e:
+                    logger.error(f"Warm-up step '{name}' failed: {e}")
+                    self.results[name] = {
+                        'ok': False,
+                        'seconds': round(time.perf_counter() - start, 3),
+                        'error': str(e)
+                    }
+                    failed.append((name, func))
+            pending = failed
+            if pending:
+                attempt += 1
+                time.sleep(min(self.retry_seconds * 2 ** (attempt - 1), MAX_RETRY_SECONDS))
+
+        self.finished_at = time.monotonic()
+        self.ready = True
+        logger.info(f"Warm-up completed in {self.finished_at - self.started_at:.2f}s (pid {os.getpid()})")
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'pid': os.getpid(),
+            'seconds': round((self.finished_at or time.monotonic()) - self.started_at, 3)
+                       if self.started_at else None,
+            'steps': self.results
+        }
+
+
+def precompile_templates(app):
+    """Compile every template once so the bytecode cache is populated"""
+    env = app.jinja_env
+    compiled = 0
+    for name in env.list_templates(extensions=('html',)):
+        try:
+            env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            logger.error(f"Template {name} failed to compile: {e}")
+    return compiled
+
+
+def init_warmup(app, warmup):
+    """Register /ready and start warming up this process (and forked children)"""
+
+    @app.route('/ready')
+    def readiness():
+        """Readiness probe: 200 once this worker has finished warming up"""
+        status = warmup.status()
+        return jsonify(status), (200 if status['ready'] else 503)
+
+    app.extensions['warmup'] = warmup
+
+    if not app.config.get('WARMUP_ENABLED', True):
+        warmup.ready = True
+        return
+
+    warmup.start()
+    # Threads do not survive fork (gunicorn --preload); warm the child up again
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=warmup.start)